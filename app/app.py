@@ -59,6 +59,7 @@ class MonitorState:
         self.thread = None
         self.stop_event = threading.Event()
         self.ws_manager = ws_manager
+        self.monitor = None
         self._lock = threading.Lock()
     
     def is_running(self) -> bool:
@@ -107,6 +108,21 @@ class MonitorState:
             self.ws_manager.broadcast_status('stopped')
             return True
     
+    def get_monitor(self, name: str):
+        """
+        获取当前（或最近一次）监控任务中的监控器
+        
+        Args:
+            name: 监控器名称
+            
+        Returns:
+            监控器实例，尚未启动过监控时返回 None
+        """
+        monitor = self.monitor
+        if monitor is None:
+            return None
+        return monitor.get_monitor(name)
+    
     def _run_monitor(self):
         """运行监控程序"""
         logger = logging.getLogger(__name__)
@@ -123,6 +139,7 @@ class MonitorState:
             
             # 注入停止检查函数
             monitor.should_stop = lambda: self.stop_event.is_set()
+            self.monitor = monitor
             
             logger.info("开始监控任务...")
             monitor.start_monitoring()
@@ -148,10 +148,17 @@ def get_status():
             'running': False
         })
     
-    return jsonify({
+    data = {
         'status': 'running' if _monitor_state.is_running() else 'stopped',
         'running': _monitor_state.is_running()
-    })
+    }
+    
+    # HTTP 轮询的请求耗时统计
+    http_monitor = _monitor_state.get_monitor("HTTP轮询监控")
+    if http_monitor is not None and http_monitor.enabled:
+        data['http'] = http_monitor.get_status()
+    
+    return jsonify(data)
 
 
 @trigger_bp.route('/trigger', methods=['POST'])
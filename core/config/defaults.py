@@ -31,13 +31,33 @@ DEFAULT_CONFIG = {
         "check_gpu_power_gpu_ids": "all",
         "check_gpu_power_consecutive_checks": 3,
         "check_gpu_power_trigger_mode": "below",  # 触发模式: "below" 低于阈值, "above" 高于阈值
+        "check_gpu_conditions": "",               # 组合条件，如 "util < 5% and memory < 1GB"，设置后取代功耗阈值判定
+        "check_gpu_process_pids": [],             # 跟踪的进程 PID，设置后在这些进程释放 GPU 时触发
+        "check_gpu_process_names": [],            # 跟踪的进程名（完整路径或文件名）
+        "check_gpu_power_window_mode": "count",   # 判定方式: count 连续次数; mean / p95 / ewma 窗口统计量
+        "check_gpu_power_window_size": 10,        # 窗口统计的采样数
+        "check_gpu_power_ewma_alpha": 0.3,        # EWMA 平滑系数
+        "check_gpu_power_hysteresis": 0,          # 滞回区间（W），进入满足状态后需越过阈值该幅度才退出
+        "check_gpu_trace_path": "",               # 回放 nvidia-smi --format=csv 采样文件代替硬件读取（无显卡环境调试用）
+        "check_gpu_trace_speed": 1.0,             # 回放倍速，0 表示每次检查前进一轮
+        "check_gpu_smi_stream": True,             # NVML 不可用时常驻一个 nvidia-smi --loop-ms 进程采样
+        "check_gpu_smi_interval_ms": 1000,        # 流式采样间隔（毫秒）
         
         # 多文件感知（目录监控）
         "check_directory_enabled": False,
         "check_directory_path": "C:\\Users\\",
+        "check_directory_roots": [],  # 多根目录，如 [{"path": "/data", "exclude_keywords": [...], "interval": 60}]，非空时替代 check_directory_path
+        "check_directory_interval": 0,            # 检查间隔（秒），主要用于多根目录中单个根目录的覆盖项，0=每轮都检查
         "check_directory_include_folders": False,  # 是否检测文件夹变化
-        "check_directory_exclude_keywords": ["年报", "测试用素材", "往期周报", "视频模板"],  # 排除路径关键词
+        "check_directory_exclude_keywords": ["年报", "测试用素材", "往期周报", "视频模板"],  # 排除路径关键词（支持 gitignore 风格规则）
+        "check_directory_include_patterns": [],  # 文件包含模式，如 ["*.pt", "*.safetensors"]，空=不过滤
         "check_directory_report_path": "",  # 报告路径，None=扫描目录下
+        "check_directory_report_format": "text",  # 报告文件格式: text / jsonl（每行一条变化记录）
+        "check_directory_report_max_items": 10,   # 通知中每类变化最多列出的条目数（按大小取前 N 项）
+        "check_directory_rollup_depth": 1,        # 按前几级子目录汇总文件数与字节变化，0=不汇总
+        "check_directory_report_max_mb": 10,      # 报告文件大小上限（MB），超出后轮转，0=不轮转
+        "check_directory_report_backup_count": 5, # 保留的历史报告分段数量
+        "check_directory_report_compress": False, # 是否 gzip 压缩历史报告分段
         "check_directory_recheck_delay": 20,  # 二次检查延迟（秒）
         "check_directory_action_keywords": {
             "准备压制视频了哦(๑•̀ㅂ•́)ﻭ✧": ["无字幕"],
@@ -51,7 +71,24 @@ DEFAULT_CONFIG = {
         "check_directory_detect_added": True,    # 检测新增
         "check_directory_detect_removed": False,  # 检测删除
         "check_directory_detect_modified": False, # 检测修改（默认关闭，防噪）
+        "check_directory_detect_moved": False,    # 按 inode 将删除+新增合并为移动/重命名（开启后重命名也会触发）
+        "check_directory_quiet_seconds": 0,       # 静默模式：出现变化后目录持续 N 秒无变化才触发，0=使用二次确认
+        "check_directory_quiet_rescan_seconds": 300,  # 静默模式兜底完整扫描间隔（开启修改检测时），发现原地写入
         "check_directory_continuous_mode": True,  # 持续监控模式：触发通知后继续运行
+        "check_directory_scan_time_budget": 0,    # 单次检查最多扫描秒数，超出则下次继续，0=一次扫完
+        "check_directory_scan_entry_budget": 0,   # 单次检查最多处理的条目数，0=不限
+        "check_directory_content_hash": False,    # 修改检测使用内容哈希（过滤仅 touch 的变化）
+        "check_directory_hash_workers": 4,        # 哈希线程数
+        "check_directory_hash_rate_limit": 0,     # 哈希读取限速（MB/s），0=不限速
+        "check_directory_hash_cache_path": "",    # 哈希缓存文件，空=logs/ 下按扫描路径自动命名
+        
+        # 磁盘空间检测
+        "check_disk_enabled": False,
+        "check_disk_paths": [],                # 要监控的挂载点（或其中任意路径）
+        "check_disk_usage_threshold": 95,      # 使用率阈值（%），0=不按阈值触发
+        "check_disk_full_within_hours": 6,     # 按增长趋势预计 N 小时内写满时触发，0=不预测
+        "check_disk_sample_window": 60,        # 用于拟合增长速率的最近采样数
+        "check_disk_min_samples": 5,           # 做趋势预测所需的最少采样数
         
         # HTTP 轮询检测
         "check_http_enabled": False,
@@ -62,6 +99,12 @@ DEFAULT_CONFIG = {
         "check_http_expected_status": 200,
         "check_http_expected_keywords": [],
         "check_http_timeout": 10,
+        "check_http_pool_size": 4,                # 连接池大小，连接在各轮检查间保持复用
+        "check_http_max_body_mb": 10,             # 响应体最多读取的大小（MB），找到关键词即停止读取，0=不限制
+        "check_http_json_assertions": [],         # JSON 路径断言，如 '$.jobs[*].state == "SUCCEEDED"'，全部满足才触发
+        "check_http_expected_content_type": "json",  # 配置断言时 Content-Type 须包含的内容
+        "check_http_endpoints": [],               # 多端点: URL 或 {"url": ..., 覆盖项}，并发轮询
+        "check_http_quorum": "all",               # 多端点判定: all / any / 满足条件的端点数 K
         
         # API 被动触发
         "check_api_enabled": False,
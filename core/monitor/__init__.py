@@ -6,6 +6,7 @@ from core.monitor.file_monitor import FileMonitor
 from core.monitor.log_monitor import LogMonitor
 from core.monitor.gpu_monitor import GpuMonitor
 from core.monitor.directory_monitor import DirectoryMonitor
+from core.monitor.disk_monitor import DiskMonitor
 from core.monitor.http_monitor import HttpMonitor
 from core.monitor.monitor_manager import MonitorManager
 
@@ -15,6 +16,7 @@ __all__ = [
     'LogMonitor',
     'GpuMonitor',
     'DirectoryMonitor',
+    'DiskMonitor',
     'HttpMonitor',
     'MonitorManager',
 ]
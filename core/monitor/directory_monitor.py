@@ -3,59 +3,44 @@
 目录监控模块（多文件感知）
 
 递归监控指定目录中的文件变化，支持二次确认和报告生成。
+配置多个根目录时，每个根目录由独立的子监控器负责，并发扫描后合并报告。
 """
 
 import os
 import time
+import heapq
+import hashlib
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import Tuple, Optional, Dict, Any, List, Set
-from dataclasses import dataclass, field
+from collections import deque
+from typing import Tuple, Optional, Dict, Any, List, Set, Deque
+from dataclasses import dataclass
 
 from core.monitor.base import BaseMonitor
+from core.monitor.directory_scanner import (
+    FileInfo, DirectorySnapshot, DirectoryScanner, diff_snapshots, diff_rollups
+)
+from core.utils.path_matcher import PathMatcher, changed_keywords
+from core.utils.file_hasher import ContentHasher, HashCache
+from core.utils.report_sink import ReportSink
+from core.utils.action_matcher import ActionMatcher
+from core.utils.logger import get_default_log_path
 
 logger = logging.getLogger(__name__)
 
-
-@dataclass
-class FileInfo:
-    """文件信息"""
-    path: str
-    name: str
-    size: int
-    mtime: float
-    is_dir: bool
-    
-    @property
-    def mtime_str(self) -> str:
-        """格式化的修改时间"""
-        return datetime.fromtimestamp(self.mtime).strftime("%Y-%m-%d %H:%M:%S")
-    
-    @property
-    def size_str(self) -> str:
-        """格式化的文件大小"""
-        if self.is_dir:
-            return "<目录>"
-        for unit in ['B', 'KB', 'MB', 'GB']:
-            if self.size < 1024:
-                return f"{self.size:.1f} {unit}"
-            self.size /= 1024
-        return f"{self.size:.1f} TB"
+# 变化类型及其在报告中的显示名称（按报告顺序）
+CHANGE_TYPES = ("added", "removed", "modified", "moved")
+CHANGE_TYPE_NAMES = {"added": "📥 新增", "removed": "🗑️ 删除", "modified": "✏️ 修改", "moved": "🔀 移动"}
 
 
 @dataclass
 class FileChange:
     """文件变化信息"""
-    change_type: str  # "added", "removed", "modified"
+    change_type: str  # "added", "removed", "modified", "moved"
     file_info: FileInfo
     suggested_action: str = ""
-
-
-@dataclass
-class DirectorySnapshot:
-    """目录快照"""
-    scan_time: datetime
-    files: Dict[str, FileInfo] = field(default_factory=dict)
+    old_path: str = ""  # 仅 moved：移动前的相对路径
 
 
 class DirectoryMonitor(BaseMonitor):
@@ -67,10 +52,18 @@ class DirectoryMonitor(BaseMonitor):
     Attributes:
         scan_path (str): 扫描路径
         include_folders (bool): 是否检测文件夹变化
-        exclude_keywords (list): 排除路径关键词
+        exclude_keywords (list): 排除路径关键词或 gitignore 风格规则
+        include_patterns (list): 文件包含模式（如 `*.pt`），为空时不过滤
         report_path (str): 报告保存路径
+        report_format (str): 报告文件格式 ("text" 或 "jsonl")
+        report_sink (Optional[ReportSink]): 报告文件写入器（按大小轮转），多根目录模式下为 None
+        report_max_items (int): 通知中每类变化最多保留的条目数
+        rollup_depth (int): 按前几级子目录汇总变化，0 表示不汇总
         recheck_delay (int): 二次检查延迟秒数
+        quiet_seconds (float): 静默触发窗口秒数，>0 时启用静默模式
+        scan_interval (float): 多根目录模式下该根目录的检查间隔秒数
         action_keywords (dict): 操作建议关键词组
+        roots (list): 多根目录模式下各根目录的子监控器
     """
     
     def __init__(self, config: Dict[str, Any]):
@@ -82,9 +75,51 @@ class DirectoryMonitor(BaseMonitor):
         """
         self._enabled = config.get('check_directory_enabled', False)
         self.scan_path = config.get('check_directory_path', '')
+        
+        # 多根目录：每个根目录一个子监控器，可单独覆盖排除规则、检测开关与检查间隔；
+        # 此时本监控器只负责调度与合并报告，不创建报告写入器与哈希器
+        try:
+            self.scan_interval = float(config.get('check_directory_interval', 0) or 0)
+        except (ValueError, TypeError):
+            self.scan_interval = 0.0
+        self.roots: List["DirectoryMonitor"] = self._create_roots(config)
+        self._root_next_check: Dict[int, float] = {}
+        self._fired_roots: List["DirectoryMonitor"] = []
+        
         self.include_folders = config.get('check_directory_include_folders', False)
-        self.exclude_keywords = config.get('check_directory_exclude_keywords', [])
+        self.exclude_keywords = config.get('check_directory_exclude_keywords', []) or []
+        for keyword in ([] if self.roots else changed_keywords(self.exclude_keywords)):
+            logger.warning(
+                f"排除关键词 '{keyword}' 含有 / ! [ 等字符，按 gitignore 规则解析而非子串匹配，"
+                f"含义可能与旧版不同"
+            )
+        self.include_patterns = config.get('check_directory_include_patterns', []) or []
         self.report_path = config.get('check_directory_report_path', None)
+        self.report_format = config.get('check_directory_report_format', 'text')
+        try:
+            self.report_max_items = int(config.get('check_directory_report_max_items', 10))
+        except (ValueError, TypeError):
+            self.report_max_items = 10
+        try:
+            self.rollup_depth = int(config.get('check_directory_rollup_depth', 1))
+        except (ValueError, TypeError):
+            self.rollup_depth = 1
+        try:
+            report_max_bytes = int(float(config.get('check_directory_report_max_mb', 10) or 0) * 1024 * 1024)
+        except (ValueError, TypeError):
+            report_max_bytes = 10 * 1024 * 1024
+        try:
+            report_backup_count = int(config.get('check_directory_report_backup_count', 5))
+        except (ValueError, TypeError):
+            report_backup_count = 5
+        self.report_sink: Optional[ReportSink] = None
+        if not self.roots:
+            self.report_sink = ReportSink(
+                self._default_report_path(),
+                max_bytes=report_max_bytes,
+                backup_count=report_backup_count,
+                compress=config.get('check_directory_report_compress', False),
+            )
         try:
             self.recheck_delay = int(config.get('check_directory_recheck_delay', 5))
         except (ValueError, TypeError):
@@ -92,21 +127,114 @@ class DirectoryMonitor(BaseMonitor):
         self.action_keywords = config.get('check_directory_action_keywords', {})
         if not isinstance(self.action_keywords, dict):
             self.action_keywords = {}
+        self._action_matcher = ActionMatcher(self.action_keywords)
         
         # 检测类型开关
         self.detect_added = config.get('check_directory_detect_added', True)
         self.detect_removed = config.get('check_directory_detect_removed', True)
         self.detect_modified = config.get('check_directory_detect_modified', False)
+        self.detect_moved = config.get('check_directory_detect_moved', False)
         
         # 持续监控模式：触发通知后继续运行
         self.continuous_mode = config.get('check_directory_continuous_mode', False)
         
+        # 扫描预算：单次 check() 最多占用的时间/条目数，0=一次扫完
+        try:
+            self.scan_time_budget = float(config.get('check_directory_scan_time_budget', 0) or 0)
+        except (ValueError, TypeError):
+            self.scan_time_budget = 0.0
+        try:
+            self.scan_entry_budget = int(config.get('check_directory_scan_entry_budget', 0) or 0)
+        except (ValueError, TypeError):
+            self.scan_entry_budget = 0
+        
+        # 静默模式：出现变化后，目录持续 N 秒无变化才触发（替代二次确认）
+        try:
+            self.quiet_seconds = float(config.get('check_directory_quiet_seconds', 0) or 0)
+        except (ValueError, TypeError):
+            self.quiet_seconds = 0.0
+        # 静默模式下的完整重扫间隔：原地写入非热文件不改变目录 mtime，廉价探测无法发现，
+        # 开启修改检测时每隔这么久强制完整扫描一次兜底，0=不兜底
+        try:
+            self.quiet_rescan_seconds = float(config.get('check_directory_quiet_rescan_seconds', 300) or 0)
+        except (ValueError, TypeError):
+            self.quiet_rescan_seconds = 300.0
+        
+        # 内容哈希模式：仅对 stat 可疑的文件读取内容比较，过滤 touch 类噪声
+        self.content_hash = config.get('check_directory_content_hash', False)
+        self._hasher: Optional[ContentHasher] = None
+        if self.content_hash and not self.roots:
+            cache_path = config.get('check_directory_hash_cache_path', '') or self._default_hash_cache_path()
+            try:
+                rate_limit = float(config.get('check_directory_hash_rate_limit', 0) or 0)
+            except (ValueError, TypeError):
+                rate_limit = 0
+            self._hasher = ContentHasher(
+                cache=HashCache(cache_path),
+                workers=config.get('check_directory_hash_workers', 4),
+                rate_limit_mb=rate_limit,
+            )
+        
+        # 基线中尚未计算摘要的文件，按扫描预算逐轮补齐
+        self._baseline_pending: Deque[str] = deque()
+        self._budget_spent: Tuple[float, int] = (0.0, 0)  # 本轮已被基线哈希占用的 (秒, 文件数)
+        
         # 状态
         self._last_snapshot: Optional[DirectorySnapshot] = None
         self._pending_changes: Optional[List[FileChange]] = None
         self._pending_timestamp: Optional[float] = None
+        self._pending_digest: Optional[bytes] = None
         self._initialized = False
+        self._scanner: Optional[DirectoryScanner] = None
         self._last_report_data: Optional[Dict[str, Any]] = None  # 用于通知变量
+        
+        # 静默模式状态
+        self._quiet_signature: Optional[bytes] = None   # 最近一次廉价探测的签名
+        self._quiet_latest: Optional[DirectorySnapshot] = None  # 活动期间的最新快照
+        self._quiet_active = False
+        self._quiet_scanning = False
+        self._last_activity: Optional[float] = None
+        self._quiet_last_scan: Optional[float] = None  # 最近一次完整扫描完成的时间
+        self._hot_files: Set[str] = set()  # 活动期间变化过的文件，原地写入不会改变目录 mtime
+    
+    @staticmethod
+    def _create_roots(config: Dict[str, Any]) -> List["DirectoryMonitor"]:
+        """
+        根据 check_directory_roots 创建子监控器
+        
+        每项可以是路径字符串，或包含 path 与覆盖项的字典；覆盖项的键可省略
+        `check_directory_` 前缀，如 {"path": "/data", "exclude_keywords": [...], "interval": 60}。
+        """
+        roots = config.get('check_directory_roots') or []
+        if not isinstance(roots, list):
+            return []
+        base = {k: v for k, v in config.items() if k != 'check_directory_roots'}
+        children: List[DirectoryMonitor] = []
+        sinks: Dict[str, ReportSink] = {}
+        for root in roots:
+            if isinstance(root, str):
+                root = {"path": root}
+            if not isinstance(root, dict) or not root.get("path"):
+                continue
+            child_config = dict(base)
+            for key, value in root.items():
+                if not key.startswith('check_directory_'):
+                    key = f'check_directory_{key}'
+                child_config[key] = value
+            child = DirectoryMonitor(child_config)
+            # 共用同一报告文件的根目录共享写入器，避免并发轮转
+            sink_path = os.path.abspath(child.report_sink.path)
+            if sink_path in sinks:
+                child.report_sink = sinks[sink_path]
+            else:
+                sinks[sink_path] = child.report_sink
+            children.append(child)
+        return children
+    
+    def _default_hash_cache_path(self) -> str:
+        """按扫描路径区分的默认哈希缓存文件"""
+        tag = hashlib.blake2b(os.path.abspath(self.scan_path or '.').encode('utf-8'), digest_size=4).hexdigest()
+        return get_default_log_path(f'dir_hash_cache_{tag}.json')
     
     @property
     def name(self) -> str:
@@ -129,6 +257,9 @@ class DirectoryMonitor(BaseMonitor):
         if not self._enabled:
             return False, "未启用", None
         
+        if self.roots:
+            return self._check_roots()
+        
         if not self.scan_path or not os.path.exists(self.scan_path):
             logger.warning(f"目录监控路径不存在: {self.scan_path}")
             return False, "路径不存在", None
@@ -138,8 +269,15 @@ class DirectoryMonitor(BaseMonitor):
             self._initialize_snapshot()
             return False, "初始化中", None
         
-        # 扫描当前状态
-        current_snapshot = self._scan_directory()
+        self._hash_baseline_step()
+        
+        if self.quiet_seconds > 0:
+            return self._check_quiescence()
+        
+        # 扫描当前状态（分片扫描时，未完成一遍前不做比较）
+        current_snapshot = self._next_snapshot()
+        if current_snapshot is None:
+            return False, "扫描中", None
         
         # 检测变化
         changes = self._detect_changes(self._last_snapshot, current_snapshot)
@@ -148,6 +286,7 @@ class DirectoryMonitor(BaseMonitor):
             # 无变化，重置待确认状态
             self._pending_changes = None
             self._pending_timestamp = None
+            self._pending_digest = None
             return False, "未完成", None
         
         # 有变化，检查是否需要二次确认
@@ -156,6 +295,7 @@ class DirectoryMonitor(BaseMonitor):
                 # 首次检测到变化，记录并等待
                 self._pending_changes = changes
                 self._pending_timestamp = time.time()
+                self._pending_digest = current_snapshot.root_digest
                 logger.info(f"检测到 {len(changes)} 处变化，等待 {self.recheck_delay} 秒进行二次确认")
                 return False, "等待二次确认", None
             else:
@@ -164,99 +304,332 @@ class DirectoryMonitor(BaseMonitor):
                     return False, "等待二次确认", None
                 
                 # 二次确认：检查变化是否一致
-                if self._changes_match(self._pending_changes, changes):
+                if self._changes_match(self._pending_changes, changes,
+                                       self._pending_digest, current_snapshot.root_digest):
                     # 变化一致，确认触发
                     logger.info(f"二次确认通过，共 {len(changes)} 处变化")
-                    self._last_snapshot = current_snapshot
                     self._pending_changes = None
                     self._pending_timestamp = None
+                    self._pending_digest = None
                     
                     # 生成报告
-                    report = self._generate_report(changes)
+                    report = self._accept_changes(current_snapshot, changes)
                     return True, "目录变化检测", report
                 else:
                     # 变化不一致，重新等待
                     logger.info("二次确认变化不一致，继续监控")
                     self._pending_changes = changes
                     self._pending_timestamp = time.time()
+                    self._pending_digest = current_snapshot.root_digest
                     return False, "变化不稳定", None
         else:
             # 不需要二次确认，直接触发
-            self._last_snapshot = current_snapshot
-            report = self._generate_report(changes)
+            report = self._accept_changes(current_snapshot, changes)
             return True, "目录变化检测", report
     
+    def _check_roots(self) -> Tuple[bool, str, Optional[str]]:
+        """
+        多根目录检查
+        
+        只检查已到达各自检查间隔的根目录，多个根目录并发扫描；
+        任一根目录确认变化即触发，报告按根目录合并。
+        """
+        now = time.monotonic()
+        due = [(i, m) for i, m in enumerate(self.roots) if now >= self._root_next_check.get(i, 0)]
+        if not due:
+            return False, "未完成", None
+        for i, monitor in due:
+            self._root_next_check[i] = now + monitor.scan_interval
+        
+        if len(due) == 1:
+            results = [due[0][1].check()]
+        else:
+            with ThreadPoolExecutor(max_workers=len(due), thread_name_prefix="dir-root") as pool:
+                results = list(pool.map(lambda item: item[1].check(), due))
+        
+        fired = [(monitor, detail) for (_, monitor), (triggered, _, detail) in zip(due, results) if triggered]
+        if not fired:
+            statuses = {method for _, method, _ in results}
+            return False, statuses.pop() if len(statuses) == 1 else "未完成", None
+        
+        self._fired_roots = [monitor for monitor, _ in fired]
+        self._last_report_data = self._merge_root_reports(self._fired_roots)
+        report = "\n".join(detail for _, detail in fired if detail)
+        return True, "目录变化检测", report
+    
+    def _merge_root_reports(self, monitors: List["DirectoryMonitor"]) -> Dict[str, Any]:
+        """合并多个根目录的报告数据，各根目录的完整报告保存在 roots 字段中"""
+        per_root = {m.scan_path: m.get_report_data() or {} for m in monitors}
+        merged: Dict[str, Any] = {
+            "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "scan_path": ", ".join(per_root),
+            "total_changes": sum(r.get("total_changes", 0) for r in per_root.values()),
+            "max_items": max((r.get("max_items", 0) for r in per_root.values()), default=0),
+            "truncated": any(r.get("truncated") for r in per_root.values()),
+            "roots": per_root,
+        }
+        for change_type in CHANGE_TYPES:
+            merged[f"{change_type}_count"] = sum(r.get(f"{change_type}_count", 0) for r in per_root.values())
+            merged[f"{change_type}_bytes"] = sum(r.get(f"{change_type}_bytes", 0) for r in per_root.values())
+            merged[f"{change_type}_files"] = [
+                self._prefix_root(item, root)
+                for root, r in per_root.items() for item in r.get(f"{change_type}_files", [])
+            ]
+        merged["summary"] = self._format_summary(
+            merged["added_count"], merged["removed_count"], merged["modified_count"], merged["moved_count"]
+        )
+        merged["actions"] = sorted({a for r in per_root.values() for a in r.get("actions", [])})
+        merged["rollup"] = [
+            self._prefix_root(item, root) for root, r in per_root.items() for item in r.get("rollup", [])
+        ]
+        merged["rollup_text"] = "\n".join(
+            f"[{root}]\n{r['rollup_text']}" for root, r in per_root.items() if r.get("rollup_text")
+        )
+        return merged
+    
+    @staticmethod
+    def _prefix_root(item: Dict[str, Any], root: str) -> Dict[str, Any]:
+        """为合并报告中的条目加上根目录前缀，不同根目录下的同名相对路径得以区分"""
+        entry = dict(item, root=root)
+        for key in ("path", "old_path"):
+            if entry.get(key):
+                entry[key] = os.path.join(root, entry[key])
+        return entry
+    
+    def _check_quiescence(self) -> Tuple[bool, str, Optional[str]]:
+        """
+        静默模式检查
+        
+        空闲时每次只做廉价探测：stat 快照中的全部目录（新增、删除、重命名会改变
+        所在目录及其 mtime）以及活动期间变化过的“热文件”（原地写入不改变目录
+        mtime）。探测签名变化时才完整扫描一遍并记录活动时间；活动之后持续
+        quiet_seconds 秒签名不变，即以最新快照与基线比较并触发。
+        
+        原地写入非热文件探测不到，开启修改检测时每隔 quiet_rescan_seconds 秒
+        强制完整扫描一次兜底。
+        """
+        if self._quiet_signature is None:
+            self._quiet_signature = self._probe_signature(self._last_snapshot)
+            self._quiet_last_scan = time.time()
+            return False, "未完成", None
+        
+        if not self._quiet_scanning:
+            reference = self._quiet_latest or self._last_snapshot
+            signature = self._probe_signature(reference)
+            if signature != self._quiet_signature or self._quiet_rescan_due():
+                self._quiet_scanning = True
+        
+        if self._quiet_scanning:
+            snapshot = self._next_snapshot()
+            if snapshot is None:
+                return False, "扫描中", None
+            self._quiet_scanning = False
+            self._quiet_last_scan = time.time()
+            self._record_activity(snapshot)
+        
+        if not self._quiet_active:
+            return False, "未完成", None
+        if time.time() - self._last_activity < self.quiet_seconds:
+            return False, "等待静默", None
+        
+        # 已静默足够久：最新快照即为稳定状态，与基线比较
+        snapshot = self._quiet_latest
+        changes = self._detect_changes(self._last_snapshot, snapshot)
+        self._reset_quiescence()
+        self._quiet_latest = None
+        if not changes:
+            self._adopt_snapshot(snapshot)
+            self._quiet_signature = self._probe_signature(snapshot)
+            return False, "未完成", None
+        logger.info(f"目录已静默 {self.quiet_seconds:g} 秒，共 {len(changes)} 处变化")
+        report = self._accept_changes(snapshot, changes)
+        self._quiet_signature = self._probe_signature(snapshot)
+        return True, "目录变化检测", report
+    
+    def _quiet_rescan_due(self) -> bool:
+        """是否到了兜底完整扫描的时间"""
+        if not self.detect_modified or self.quiet_rescan_seconds <= 0 or self._quiet_last_scan is None:
+            return False
+        return time.time() - self._quiet_last_scan >= self.quiet_rescan_seconds
+    
+    def _record_activity(self, snapshot: DirectorySnapshot):
+        """比较新快照与上一快照，有变化时刷新活动时间与热文件集合"""
+        reference = self._quiet_latest or self._last_snapshot
+        added, removed, common = diff_snapshots(reference, snapshot)
+        changed = list(added)
+        for key in common:
+            old_info, new_info = reference.files[key], snapshot.files[key]
+            if old_info.size != new_info.size or old_info.mtime_ns != new_info.mtime_ns:
+                changed.append(key)
+        
+        if changed or removed:
+            if not self._quiet_active:
+                logger.info(f"检测到目录活动，等待 {self.quiet_seconds:g} 秒静默")
+            self._quiet_active = True
+            self._last_activity = time.time()
+            self._hot_files.difference_update(removed)
+            self._hot_files.update(k for k in changed if not snapshot.files[k].is_dir)
+        self._quiet_latest = snapshot
+        self._quiet_signature = self._probe_signature(snapshot)
+    
+    def _probe_signature(self, snapshot: DirectorySnapshot) -> bytes:
+        """对快照中的目录 mtime 与热文件 stat 计算签名（不读取目录内容）"""
+        h = hashlib.blake2b(digest_size=16)
+        for rel_dir in snapshot.tree:
+            abs_dir = os.path.join(self.scan_path, rel_dir) if rel_dir else self.scan_path
+            try:
+                h.update(f"d{os.stat(abs_dir).st_mtime_ns}\n".encode())
+            except OSError:
+                h.update(b"d-\n")
+        for key in sorted(self._hot_files):
+            try:
+                stat = os.stat(os.path.join(self.scan_path, key))
+                h.update(f"f{stat.st_size}:{stat.st_mtime_ns}\n".encode())
+            except OSError:
+                h.update(b"f-\n")
+        return h.digest()
+    
+    def _reset_quiescence(self):
+        """清除静默模式的活动状态"""
+        self._quiet_active = False
+        self._last_activity = None
+        self._hot_files = set()
+    
+    def _accept_changes(self, snapshot: DirectorySnapshot, changes: List[FileChange]) -> str:
+        """确认变化：以新快照为基线，并生成包含目录汇总的报告"""
+        rollup = diff_rollups(self._last_snapshot, snapshot) if self.rollup_depth else []
+        self._adopt_snapshot(snapshot)
+        return self._generate_report(changes, rollup)
+    
     def _initialize_snapshot(self):
-        """初始化目录快照"""
-        logger.info(f"初始化目录监控: {self.scan_path}")
-        self._last_snapshot = self._scan_directory()
+        """初始化目录快照（分片扫描时可能需要多次调用才能完成）"""
+        if self._scanner is None or not self._scanner.in_progress:
+            logger.info(f"初始化目录监控: {self.scan_path}")
+            # 每次初始化时重新编译规则，以便读取最新的 .tasknyaignore
+            self._scanner = self._create_scanner()
+        
+        snapshot = self._next_snapshot()
+        if snapshot is None:
+            return
+        self._adopt_snapshot(snapshot)
         self._initialized = True
         logger.info(f"初始快照包含 {len(self._last_snapshot.files)} 个文件/目录")
     
-    def _scan_directory(self) -> DirectorySnapshot:
+    def _create_scanner(self) -> DirectoryScanner:
+        """创建扫描器（每次创建时重新编译路径规则）"""
+        return DirectoryScanner(self.scan_path, self._build_matcher(), self.include_folders,
+                                rollup_depth=self.rollup_depth)
+    
+    def _build_matcher(self) -> PathMatcher:
+        """构建路径匹配器，并排除报告文件自身（含轮转分段）"""
+        matcher = PathMatcher.for_directory(
+            self.scan_path, self.exclude_keywords, self.include_patterns
+        )
+        matcher.add_rules(self.report_sink.exclude_rules(self.scan_path))
+        return matcher
+    
+    def _next_snapshot(self) -> Optional[DirectorySnapshot]:
+        """按预算推进扫描，完成一遍时返回新快照（预算扣除本轮基线哈希的占用）"""
+        spent_time, spent_entries = self._budget_spent
+        self._budget_spent = (0.0, 0)
+        time_budget, entry_budget = self.scan_time_budget, self.scan_entry_budget
+        if time_budget > 0:
+            time_budget -= spent_time
+            if time_budget <= 0:
+                return None
+        if entry_budget > 0:
+            entry_budget -= spent_entries
+            if entry_budget <= 0:
+                return None
+        return self._scanner.step(time_budget, entry_budget)
+    
+    def _adopt_snapshot(self, snapshot: DirectorySnapshot):
         """
-        递归扫描目录
+        将快照设为新的比较基线
         
-        Returns:
-            目录快照
+        内容哈希模式下，基线中尚无摘要的文件（首次扫描的全部文件、新增文件）
+        排队由 _hash_baseline_step 补齐：设置了扫描预算时按预算逐轮读取，
+        否则与不限预算的扫描一样立即补齐（未变化的文件命中缓存，不会重读）。
+        """
+        self._last_snapshot = snapshot
+        if self._hasher is not None:
+            files = [info for info in snapshot.files.values() if not info.is_dir]
+            self._baseline_pending = deque(info.path for info in files if info.digest is None)
+            self._hasher.cache.prune(info.hash_key for info in files)
+            self._hasher.cache.save()
+            if self.scan_time_budget <= 0 and self.scan_entry_budget <= 0:
+                self._hash_baseline_step()
+                self._budget_spent = (0.0, 0)
+    
+    def _hash_baseline_step(self):
         """
-        snapshot = DirectorySnapshot(scan_time=datetime.now())
+        按扫描预算为基线补齐一批摘要
         
-        try:
-            for root, dirs, files in os.walk(self.scan_path):
-                # 检查是否排除
-                if self._should_exclude(root):
-                    dirs[:] = []  # 不再递归
+        每个文件计入一个条目，与本轮扫描共享时间/条目预算；未设预算时一次补齐。
+        至少处理一批，保证在预算很小时仍能推进。读取前后 stat 不一致的文件
+        （基线之后又被修改）不记录摘要，之后按确定的修改处理。
+        """
+        self._budget_spent = (0.0, 0)
+        if self._hasher is None or not self._baseline_pending:
+            return
+        start = time.monotonic()
+        deadline = start + self.scan_time_budget if self.scan_time_budget > 0 else None
+        limit = self.scan_entry_budget if self.scan_entry_budget > 0 else len(self._baseline_pending)
+        batch_size = min(limit, self._hasher.workers)
+        files = self._last_snapshot.files
+        processed = 0
+        while self._baseline_pending and processed < limit:
+            batch = []
+            while self._baseline_pending and len(batch) < min(batch_size, limit - processed):
+                info = files.get(self._baseline_pending.popleft())
+                if info is not None and info.digest is None:
+                    batch.append(info)
+            processed += len(batch)
+            digests = self._hash_infos(batch)
+            for info in batch:
+                try:
+                    stat = os.stat(os.path.join(self.scan_path, info.path))
+                except OSError:
                     continue
-                
-                # 处理目录
-                if self.include_folders:
-                    for dir_name in dirs:
-                        if self._should_exclude(dir_name):
-                            continue
-                        dir_path = os.path.join(root, dir_name)
-                        rel_path = os.path.relpath(dir_path, self.scan_path)
-                        try:
-                            stat = os.stat(dir_path)
-                            snapshot.files[rel_path] = FileInfo(
-                                path=rel_path,
-                                name=dir_name,
-                                size=0,
-                                mtime=stat.st_mtime,
-                                is_dir=True
-                            )
-                        except OSError:
-                            pass
-                
-                # 处理文件
-                for file_name in files:
-                    if self._should_exclude(file_name):
-                        continue
-                    file_path = os.path.join(root, file_name)
-                    rel_path = os.path.relpath(file_path, self.scan_path)
-                    try:
-                        stat = os.stat(file_path)
-                        snapshot.files[rel_path] = FileInfo(
-                            path=rel_path,
-                            name=file_name,
-                            size=stat.st_size,
-                            mtime=stat.st_mtime,
-                            is_dir=False
-                        )
-                    except OSError:
-                        pass
-                        
-        except Exception as e:
-            logger.error(f"扫描目录失败: {e}")
+                if (stat.st_size, stat.st_mtime_ns, stat.st_ctime_ns) == (info.size, info.mtime_ns, info.ctime_ns):
+                    info.digest = digests.get(info.path)
+            if deadline is not None and time.monotonic() >= deadline:
+                break
+        self._budget_spent = (time.monotonic() - start, processed)
+        if not self._baseline_pending:
+            self._hasher.cache.save()
+    
+    def _hash_infos(self, infos) -> Dict[str, Optional[str]]:
+        """
+        批量计算文件摘要
         
-        return snapshot
+        Returns:
+            相对路径到摘要的映射
+        """
+        items = []
+        for info in infos:
+            abs_path = os.path.join(self.scan_path, info.path)
+            if info.ino == 0:
+                # 部分平台的 scandir 不提供 inode，补一次 stat
+                try:
+                    stat = os.stat(abs_path)
+                    info.dev, info.ino = stat.st_dev, stat.st_ino
+                except OSError:
+                    continue
+            items.append((abs_path, info.hash_key, info.ctime_ns, info.path))
+        digests = self._hasher.hash_many((a, k, c) for a, k, c, _ in items)
+        return {rel: digests.get(abs_path) for abs_path, _, _, rel in items}
     
-    def _should_exclude(self, path: str) -> bool:
-        """检查路径是否应被排除"""
-        for keyword in self.exclude_keywords:
-            if keyword.lower() in path.lower():
-                return True
-        return False
+    def _scan_directory(self) -> DirectorySnapshot:
+        """
+        不限预算地完整扫描一次目录
+        
+        Returns:
+            目录快照
+        """
+        if self._scanner is None:
+            self._scanner = self._create_scanner()
+        return self._scanner.scan()
     
     def _detect_changes(self, 
                         old_snapshot: DirectorySnapshot,
@@ -275,44 +648,130 @@ class DirectoryMonitor(BaseMonitor):
         old_files = old_snapshot.files
         new_files = new_snapshot.files
         
+        # 借助 Merkle 目录哈希，只比较哈希不同的子树
+        added_keys, removed_keys, common_keys = diff_snapshots(old_snapshot, new_snapshot)
+        
+        # 检测移动/重命名：新增条目的 inode 在旧快照中属于已消失的路径
+        if self.detect_moved:
+            added_keys, removed_keys = self._pair_moves(
+                old_snapshot, new_snapshot, added_keys, removed_keys, changes
+            )
+        
         # 检测新增文件
         if self.detect_added:
-            for path, info in new_files.items():
-                if path not in old_files:
-                    action = self._suggest_action(info.name, "added")
-                    changes.append(FileChange("added", info, action))
+            for path in added_keys:
+                info = new_files[path]
+                action = self._suggest_action(info.name, "added")
+                changes.append(FileChange("added", info, action))
         
         # 检测删除文件
         if self.detect_removed:
-            for path, info in old_files.items():
-                if path not in new_files:
-                    action = self._suggest_action(info.name, "removed")
-                    changes.append(FileChange("removed", info, action))
+            for path in removed_keys:
+                info = old_files[path]
+                action = self._suggest_action(info.name, "removed")
+                changes.append(FileChange("removed", info, action))
         
         # 检测修改文件（大小或时间变化）
         if self.detect_modified:
-            for path, new_info in new_files.items():
-                if path in old_files:
-                    old_info = old_files[path]
-                    if old_info.size != new_info.size or old_info.mtime != new_info.mtime:
-                        action = self._suggest_action(new_info.name, "modified")
-                        changes.append(FileChange("modified", new_info, action))
+            candidates = []
+            suspects = []
+            for path in common_keys:
+                new_info = new_files[path]
+                old_info = old_files[path]
+                stat_changed = old_info.size != new_info.size or old_info.mtime != new_info.mtime
+                if self._hasher is None or new_info.is_dir:
+                    if stat_changed:
+                        candidates.append((new_info, True))
+                    continue
+                if old_info.size != new_info.size:
+                    # 大小不同必然是内容变化，无需读取
+                    candidates.append((new_info, True))
+                elif stat_changed or old_info.ctime_ns != new_info.ctime_ns:
+                    # 保留 mtime 的重写会改变 ctime；仅 touch 的文件哈希不变。
+                    # 基线摘要尚未补齐时无从比较，按确定的修改处理
+                    if old_info.digest is None:
+                        old_info.digest = self._hasher.cache.get(old_info.hash_key, old_info.ctime_ns)
+                    if old_info.digest is None:
+                        candidates.append((new_info, True))
+                        continue
+                    candidates.append((new_info, False))
+                    suspects.append(new_info)
+                else:
+                    new_info.digest = old_info.digest
+            
+            digests = self._hash_infos(suspects) if suspects else {}
+            for new_info, certain in candidates:
+                if not certain:
+                    new_info.digest = digests.get(new_info.path)
+                    old_digest = old_files[new_info.path].digest
+                    if new_info.digest is not None and new_info.digest == old_digest:
+                        continue
+                action = self._suggest_action(new_info.name, "modified")
+                changes.append(FileChange("modified", new_info, action))
         
         return changes
     
+    def _pair_moves(self,
+                    old_snapshot: DirectorySnapshot,
+                    new_snapshot: DirectorySnapshot,
+                    added_keys: List[str],
+                    removed_keys: List[str],
+                    changes: List[FileChange]) -> Tuple[List[str], List[str]]:
+        """
+        将同一 inode 的删除+新增合并为移动
+        
+        借助扫描时构建的 inode 索引，对每个新增条目做一次 O(1) 查找。
+        要求大小与 mtime 一致，避免把 inode 复用误判为移动。
+        
+        Returns:
+            剔除移动条目后的 (新增键, 删除键)
+        """
+        if not added_keys or not removed_keys:
+            return added_keys, removed_keys
+        
+        removed_set = set(removed_keys)
+        paired: Set[str] = set()
+        remaining_added = []
+        for path in added_keys:
+            new_info = new_snapshot.files[path]
+            old_path = old_snapshot.inodes.get((new_info.dev, new_info.ino)) if new_info.ino else None
+            if old_path is not None and old_path in removed_set and old_path not in paired:
+                old_info = old_snapshot.files[old_path]
+                if old_info.is_dir == new_info.is_dir and (
+                        new_info.is_dir or
+                        (old_info.size == new_info.size and old_info.mtime_ns == new_info.mtime_ns)):
+                    paired.add(old_path)
+                    new_info.digest = new_info.digest or old_info.digest
+                    action = self._suggest_action(new_info.name, "moved")
+                    changes.append(FileChange("moved", new_info, action, old_path=old_path))
+                    continue
+            remaining_added.append(path)
+        
+        if not paired:
+            return added_keys, removed_keys
+        return remaining_added, [p for p in removed_keys if p not in paired]
+    
     def _changes_match(self, 
                        changes1: List[FileChange],
-                       changes2: List[FileChange]) -> bool:
+                       changes2: List[FileChange],
+                       digest1: Optional[bytes] = None,
+                       digest2: Optional[bytes] = None) -> bool:
         """
         检查两组变化是否一致
         
         Args:
             changes1: 第一组变化
             changes2: 第二组变化
+            digest1: 第一组变化对应快照的根目录哈希
+            digest2: 第二组变化对应快照的根目录哈希
             
         Returns:
             是否一致
         """
+        # 基线相同且目录树哈希相同，则变化必然一致
+        if digest1 is not None and digest1 == digest2:
+            return True
+        
         if len(changes1) != len(changes2):
             return False
         
@@ -332,88 +791,147 @@ class DirectoryMonitor(BaseMonitor):
         Returns:
             建议操作
         """
-        filename_lower = filename.lower()
-        
-        for action, keywords in self.action_keywords.items():
-            if isinstance(keywords, list):
-                for keyword in keywords:
-                    if keyword.lower() in filename_lower:
-                        return action
-            elif isinstance(keywords, str):
-                if keywords.lower() in filename_lower:
-                    return action
-        
-        return ""
+        return self._action_matcher.match(filename)
     
-    def _generate_report(self, changes: List[FileChange]) -> str:
+    def _generate_report(self, changes: List[FileChange],
+                         rollup: Optional[List[Dict[str, int]]] = None) -> str:
         """
         生成变化报告
         
+        完整报告逐行流式写入报告文件；内存中只保留有界视图：
+        每类变化按大小取前 N 项，外加精确的数量与字节总计。
+        
         Args:
             changes: 变化列表
+            rollup: 按子目录汇总的文件数/字节数变化（扫描时累计，无需二次遍历）
             
         Returns:
-            报告内容
+            有界的报告摘要内容
         """
         timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         
-        # 分类统计
-        added = [c for c in changes if c.change_type == "added"]
-        removed = [c for c in changes if c.change_type == "removed"]
-        modified = [c for c in changes if c.change_type == "modified"]
+        # 分类统计（单次遍历，只保留每类前 N 项）
+        counts = {t: 0 for t in CHANGE_TYPES}
+        sizes = {t: 0 for t in CHANGE_TYPES}
+        top: Dict[str, List[Tuple[int, int, FileChange]]] = {t: [] for t in CHANGE_TYPES}
+        actions: Set[str] = set()
+        for seq, change in enumerate(changes):
+            change_type = change.change_type
+            if change_type not in counts:
+                continue
+            info = change.file_info
+            size = 0 if info.is_dir else info.size
+            counts[change_type] += 1
+            sizes[change_type] += size
+            if change.suggested_action:
+                actions.add(change.suggested_action)
+            if self.report_max_items > 0:
+                # 同尺寸时先出现的优先
+                item = (size, -seq, change)
+                heap = top[change_type]
+                if len(heap) < self.report_max_items:
+                    heapq.heappush(heap, item)
+                elif item[:2] > heap[0][:2]:
+                    heapq.heapreplace(heap, item)
         
-        # 收集所有建议
-        unique_actions = sorted(list(set(c.suggested_action for c in changes if c.suggested_action)))
-
-        # 保存结构化数据用于通知变量
+        top_changes = {
+            t: [c for _, _, c in sorted(top[t], key=lambda x: x[:2], reverse=True)]
+            for t in CHANGE_TYPES
+        }
+        summary = self._format_summary(counts["added"], counts["removed"], counts["modified"], counts["moved"])
+        
+        # 目录汇总（取前 N 个变化最大的目录）
+        rollup = rollup or []
+        rollup_limit = self.report_max_items if self.report_max_items > 0 else len(rollup)
+        rollup_items = [
+            dict(item, bytes_str=self._format_size_delta(item["bytes"]))
+            for item in rollup[:rollup_limit]
+        ]
+        rollup_text = "\n".join(
+            f"{item['path']}: {item['files']:+d} 文件, {item['bytes_str']}" for item in rollup_items
+        )
+        if len(rollup) > len(rollup_items):
+            rollup_text += f"\n... 等共 {len(rollup)} 个目录"
+        
+        # 保存结构化数据用于通知变量（有界视图）
         self._last_report_data = {
             "timestamp": timestamp,
             "scan_path": self.scan_path,
             "total_changes": len(changes),
-            "added_count": len(added),
-            "removed_count": len(removed),
-            "modified_count": len(modified),
-            "added_files": [self._format_file_info(c) for c in added],
-            "removed_files": [self._format_file_info(c) for c in removed],
-            "modified_files": [self._format_file_info(c) for c in modified],
-            "all_changes": [self._format_file_info(c) for c in changes],
-            "summary": f"新增 {len(added)}, 删除 {len(removed)}, 修改 {len(modified)}",
-            "actions": unique_actions,
+            "added_count": counts["added"],
+            "removed_count": counts["removed"],
+            "modified_count": counts["modified"],
+            "moved_count": counts["moved"],
+            "added_bytes": sizes["added"],
+            "removed_bytes": sizes["removed"],
+            "modified_bytes": sizes["modified"],
+            "moved_bytes": sizes["moved"],
+            "added_files": [self._format_file_info(c) for c in top_changes["added"]],
+            "removed_files": [self._format_file_info(c) for c in top_changes["removed"]],
+            "modified_files": [self._format_file_info(c) for c in top_changes["modified"]],
+            "moved_files": [self._format_file_info(c) for c in top_changes["moved"]],
+            "max_items": self.report_max_items,
+            "truncated": any(counts[t] > len(top_changes[t]) for t in CHANGE_TYPES),
+            "summary": summary,
+            "actions": sorted(actions),
+            "rollup": rollup_items,
+            "rollup_text": rollup_text,
         }
         
-        lines = [
+        header = [
             f"=== 目录变化报告 ===",
             f"时间: {timestamp}",
             f"路径: {self.scan_path}",
-            f"变化统计: {self._last_report_data['summary']}",
-            ""
+            f"变化统计: {summary}",
         ]
+        if rollup_text:
+            header.append("目录汇总:")
+            header.extend(f"  {line}" for line in rollup_text.split("\n"))
+        header.append("")
         
-        # 详细变化
-        change_type_names = {"added": "📥 新增", "removed": "🗑️ 删除", "modified": "✏️ 修改"}
-        
-        for change in changes:
-            type_name = change_type_names.get(change.change_type, change.change_type)
-            info = change.file_info
-            
-            line = f"{type_name} {info.path}"
-            if not info.is_dir:
-                line += f" ({info.size_str})"
-            line += f" - {info.mtime_str}"
-            
-            if change.suggested_action:
-                line += f" 💡{change.suggested_action}"
-            
-            lines.append(line)
+        # 完整明细流式写入文件
+        self._save_report(header, changes, timestamp)
         
+        # 返回的详情只包含每类前 N 项
+        lines = list(header)
+        for change_type in CHANGE_TYPES:
+            for change in top_changes[change_type]:
+                lines.append(self._format_change_line(change))
+            omitted = counts[change_type] - len(top_changes[change_type])
+            if omitted > 0:
+                lines.append(f"{CHANGE_TYPE_NAMES[change_type]} ... 另有 {omitted} 项（共 {counts[change_type]} 项）")
         lines.append("")
         
-        report = "\n".join(lines)
+        return "\n".join(lines)
+    
+    @staticmethod
+    def _format_size_delta(nbytes: int) -> str:
+        """格式化带符号的字节变化量"""
+        sign = "-" if nbytes < 0 else "+"
+        size = float(abs(nbytes))
+        for unit in ['B', 'KB', 'MB', 'GB']:
+            if size < 1024:
+                return f"{sign}{size:.1f} {unit}"
+            size /= 1024
+        return f"{sign}{size:.1f} TB"
+    
+    @staticmethod
+    def _format_change_line(change: FileChange) -> str:
+        """格式化单条变化为报告文本行"""
+        type_name = CHANGE_TYPE_NAMES.get(change.change_type, change.change_type)
+        info = change.file_info
         
-        # 保存报告到文件
-        self._save_report(report)
+        if change.old_path:
+            line = f"{type_name} {change.old_path} -> {info.path}"
+        else:
+            line = f"{type_name} {info.path}"
+        if not info.is_dir:
+            line += f" ({info.size_str})"
+        line += f" - {info.mtime_str}"
         
-        return report
+        if change.suggested_action:
+            line += f" 💡{change.suggested_action}"
+        return line
     
     def _format_file_info(self, change: FileChange) -> Dict[str, Any]:
         """格式化文件变化信息为字典"""
@@ -427,34 +945,91 @@ class DirectoryMonitor(BaseMonitor):
             "mtime": info.mtime_str,
             "is_dir": info.is_dir,
             "action": change.suggested_action,
+            "old_path": change.old_path,
         }
     
+    @staticmethod
+    def _format_summary(added: int, removed: int, modified: int, moved: int) -> str:
+        """格式化变化统计摘要（无移动时保持原有格式）"""
+        summary = f"新增 {added}, 删除 {removed}, 修改 {modified}"
+        if moved:
+            summary += f", 移动 {moved}"
+        return summary
+    
     def get_report_data(self) -> Optional[Dict[str, Any]]:
         """获取最后一次报告的结构化数据"""
         return self._last_report_data
     
-    def _save_report(self, report: str):
-        """保存报告到文件"""
+    def _default_report_path(self) -> str:
+        """报告文件路径，未配置时放在扫描目录下"""
+        if self.report_path:
+            return self.report_path
+        ext = "jsonl" if self.report_format == 'jsonl' else "txt"
+        return os.path.join(self.scan_path, f"tasknya_monitor_report.{ext}")
+    
+    def _save_report(self, header: List[str], changes: List[FileChange], timestamp: str):
+        """
+        将报告逐行追加写入报告文件（超出大小上限时自动轮转）
+        
+        Args:
+            header: 报告头部行（text 格式）
+            changes: 完整变化列表
+            timestamp: 报告时间戳
+        """
         try:
-            # 确定报告路径
-            if self.report_path:
-                report_file = self.report_path
+            if self.report_format == 'jsonl':
+                def records():
+                    for change in changes:
+                        record = self._format_file_info(change)
+                        record["ts"] = timestamp
+                        record["scan_path"] = self.scan_path
+                        yield record
+                self.report_sink.write_records(records())
             else:
-                report_file = os.path.join(self.scan_path, "tasknya_monitor_report.txt")
+                def lines():
+                    yield from header
+                    for change in changes:
+                        yield self._format_change_line(change)
+                    yield "\n"
+                self.report_sink.write_lines(lines())
             
-            # 追加写入
-            with open(report_file, 'a', encoding='utf-8') as f:
-                f.write(report)
-                f.write("\n\n")
-            
-            logger.info(f"报告已保存到: {report_file}")
+            logger.info(f"报告已保存到: {self.report_sink.path}")
             
         except Exception as e:
             logger.error(f"保存报告失败: {e}")
     
+    def query_reports(self, since=None, until=None) -> List[Dict[str, Any]]:
+        """
+        按时间范围查询 JSONL 报告记录（含已轮转的分段）
+        
+        Args:
+            since: 起始时间（datetime 或 "%Y-%m-%d %H:%M:%S" 字符串，含）
+            until: 结束时间（含）
+        """
+        if not self.roots:
+            return list(self.report_sink.query(since, until))
+        # 多根目录：共用报告文件的根目录共享写入器，每个写入器只查询一次
+        sinks = {id(m.report_sink): m.report_sink for m in self.roots}
+        records = [r for sink in sinks.values() for r in sink.query(since, until)]
+        return sorted(records, key=lambda r: str(r.get("ts", "")))
+    
     def reset(self):
-        """重置监控状态"""
+        """重置监控状态（多根目录模式下只重置上次触发的根目录）"""
+        if self.roots:
+            for monitor in self._fired_roots or self.roots:
+                monitor.reset()
+            self._fired_roots = []
+            return
         self._last_snapshot = None
+        self._baseline_pending = deque()
+        self._quiet_signature = None
+        self._quiet_latest = None
+        self._quiet_scanning = False
+        self._quiet_last_scan = None
+        self._reset_quiescence()
         self._pending_changes = None
         self._pending_timestamp = None
+        self._pending_digest = None
         self._initialized = False
+        if self._scanner is not None:
+            self._scanner.cancel()
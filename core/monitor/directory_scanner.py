@@ -0,0 +1,394 @@
+# -*- coding: utf-8 -*-
+"""
+目录扫描模块
+
+提供目录快照数据结构，以及可按时间/条目预算分片执行、
+在多次 check() 之间保留遍历游标的可恢复扫描器。
+"""
+
+import os
+import time
+import hashlib
+import logging
+from datetime import datetime
+from typing import Optional, Dict, List, Iterator, Tuple
+from dataclasses import dataclass, field
+
+from core.utils.path_matcher import PathMatcher
+from core.utils.file_hasher import HashKey
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class FileInfo:
+    """文件信息"""
+    path: str
+    name: str
+    size: int
+    mtime: float
+    is_dir: bool
+    dev: int = 0
+    ino: int = 0
+    mtime_ns: int = 0
+    ctime_ns: int = 0
+    digest: Optional[str] = None
+
+    @classmethod
+    def from_stat(cls, path: str, name: str, stat: os.stat_result, is_dir: bool) -> "FileInfo":
+        """由 stat 结果构建文件信息"""
+        return cls(
+            path=path,
+            name=name,
+            size=0 if is_dir else stat.st_size,
+            mtime=stat.st_mtime,
+            is_dir=is_dir,
+            dev=stat.st_dev,
+            ino=stat.st_ino,
+            mtime_ns=stat.st_mtime_ns,
+            ctime_ns=stat.st_ctime_ns,
+        )
+
+    @property
+    def hash_key(self) -> HashKey:
+        """内容哈希缓存键"""
+        return (self.dev, self.ino, self.size, self.mtime_ns)
+
+    @property
+    def mtime_str(self) -> str:
+        """格式化的修改时间"""
+        return datetime.fromtimestamp(self.mtime).strftime("%Y-%m-%d %H:%M:%S")
+
+    @property
+    def size_str(self) -> str:
+        """格式化的文件大小"""
+        if self.is_dir:
+            return "<目录>"
+        size = float(self.size)
+        for unit in ['B', 'KB', 'MB', 'GB']:
+            if size < 1024:
+                return f"{size:.1f} {unit}"
+            size /= 1024
+        return f"{size:.1f} TB"
+
+
+@dataclass
+class DirNode:
+    """
+    目录树节点
+
+    digest 为该目录的 Merkle 哈希：由直接子文件的 (名称, 大小, mtime, ctime)
+    与子目录的 (名称, mtime, 子目录哈希) 计算，任一后代变化都会向上传导到根。
+    """
+    files: List[str] = field(default_factory=list)    # 直接子条目在快照中的键
+    subdirs: List[str] = field(default_factory=list)  # 已下探的子目录相对路径
+    mtime_ns: int = 0
+    digest: bytes = b""
+
+
+@dataclass
+class DirectorySnapshot:
+    """目录快照"""
+    scan_time: datetime
+    files: Dict[str, FileInfo] = field(default_factory=dict)
+    tree: Dict[str, DirNode] = field(default_factory=dict)  # 相对目录（根为 ""）到节点的映射
+    inodes: Dict[Tuple[int, int], str] = field(default_factory=dict)  # (st_dev, st_ino) 到快照键的索引
+    rollups: Dict[str, List[int]] = field(default_factory=dict)  # 汇总目录到 [文件数, 字节数] 的映射
+
+    @property
+    def root_digest(self) -> Optional[bytes]:
+        """根目录的 Merkle 哈希，未构建目录树时为 None"""
+        node = self.tree.get("")
+        return node.digest if node is not None else None
+
+    def iter_subtree_files(self, rel_dir: str) -> Iterator[str]:
+        """遍历某个目录下（含所有后代目录）的快照键"""
+        stack = [rel_dir]
+        while stack:
+            node = self.tree.get(stack.pop())
+            if node is None:
+                continue
+            yield from node.files
+            stack.extend(node.subdirs)
+
+
+def rollup_key(rel_dir: str, depth: int) -> str:
+    """取相对目录的前 depth 级作为汇总键，根目录下的文件归入 "." """
+    if not rel_dir or depth <= 0:
+        return "."
+    return "/".join(rel_dir.split("/")[:depth])
+
+
+def diff_rollups(old: DirectorySnapshot, new: DirectorySnapshot) -> List[Dict[str, int]]:
+    """
+    比较两个快照的目录汇总
+
+    Returns:
+        有变化的汇总目录列表，按字节变化量的绝对值降序排列，
+        每项包含 path、files（文件数变化）与 bytes（字节数变化）
+    """
+    deltas = []
+    for key in set(old.rollups) | set(new.rollups):
+        old_files, old_bytes = old.rollups.get(key, (0, 0))
+        new_files, new_bytes = new.rollups.get(key, (0, 0))
+        files, nbytes = new_files - old_files, new_bytes - old_bytes
+        if files or nbytes:
+            deltas.append({"path": key, "files": files, "bytes": nbytes})
+    deltas.sort(key=lambda d: (-abs(d["bytes"]), -abs(d["files"]), d["path"]))
+    return deltas
+
+
+def diff_snapshots(old: DirectorySnapshot, new: DirectorySnapshot):
+    """
+    比较两个快照的键集合
+
+    两个快照都带有目录树时，从根开始只下探 Merkle 哈希不同的子树，
+    复杂度与变化量成正比；否则退化为全量集合比较。
+
+    Returns:
+        (仅在新快照中的键, 仅在旧快照中的键, 两者共有且可能变化的键)
+    """
+    if not old.tree or not new.tree:
+        added = [p for p in new.files if p not in old.files]
+        removed = [p for p in old.files if p not in new.files]
+        common = [p for p in new.files if p in old.files]
+        return added, removed, common
+
+    added: List[str] = []
+    removed: List[str] = []
+    common: List[str] = []
+    stack = [""]
+    while stack:
+        rel_dir = stack.pop()
+        old_node = old.tree.get(rel_dir)
+        new_node = new.tree.get(rel_dir)
+        if old_node is None or new_node is None:
+            # 扫描中断导致节点缺失：对该子树做集合比较
+            old_keys = set(old.iter_subtree_files(rel_dir))
+            for key in new.iter_subtree_files(rel_dir):
+                (common if key in old_keys else added).append(key)
+            new_keys = set(new.iter_subtree_files(rel_dir))
+            removed.extend(key for key in old_keys if key not in new_keys)
+            continue
+        if old_node.digest == new_node.digest:
+            continue
+
+        old_files = set(old_node.files)
+        for key in new_node.files:
+            (common if key in old_files else added).append(key)
+        new_files = set(new_node.files)
+        removed.extend(key for key in old_node.files if key not in new_files)
+
+        old_subdirs = set(old_node.subdirs)
+        for sub in new_node.subdirs:
+            if sub in old_subdirs:
+                stack.append(sub)
+            else:
+                added.extend(new.iter_subtree_files(sub))
+        new_subdirs = set(new_node.subdirs)
+        for sub in old_node.subdirs:
+            if sub not in new_subdirs:
+                removed.extend(old.iter_subtree_files(sub))
+    return added, removed, common
+
+
+class DirectoryScanner:
+    """
+    可恢复的目录扫描器
+
+    基于 os.scandir 的迭代遍历：被排除的目录在下探之前剪枝，
+    包含模式在 stat 之前过滤文件。遍历游标（目录栈与当前目录的条目位置）
+    保存在实例中，step() 用尽预算后返回，下次调用从断点继续；
+    只有完整扫描一遍后才产出新的快照。
+
+    Attributes:
+        root (str): 扫描根目录
+        matcher (PathMatcher): 路径匹配器
+        include_folders (bool): 是否记录文件夹条目
+        rollup_depth (int): 按前几级目录汇总文件数与字节数，0 表示不汇总
+        passes (int): 已完成的完整扫描次数
+    """
+
+    # 每处理多少个条目检查一次时间预算
+    _CLOCK_INTERVAL = 32
+
+    def __init__(self, root: str, matcher: PathMatcher, include_folders: bool = False,
+                 rollup_depth: int = 0):
+        self.root = root
+        self.matcher = matcher
+        self.include_folders = include_folders
+        self.rollup_depth = max(0, int(rollup_depth or 0))
+        self.passes = 0
+        self._snapshot: Optional[DirectorySnapshot] = None
+        self._stack: List[str] = []
+        self._entries: List[os.DirEntry] = []
+        self._entry_index = 0
+        self._entry_dir = ""
+        self._entry_rollup: Optional[List[int]] = None
+        self._dir_order: List[str] = []
+
+    @property
+    def in_progress(self) -> bool:
+        """是否有未完成的扫描"""
+        return self._snapshot is not None
+
+    def cancel(self):
+        """丢弃当前未完成的扫描"""
+        self._snapshot = None
+        self._stack = []
+        self._entries = []
+        self._entry_index = 0
+        self._entry_rollup = None
+        self._dir_order = []
+
+    def scan(self) -> DirectorySnapshot:
+        """不限预算地完成一次完整扫描"""
+        self.cancel()
+        return self.step()
+
+    def step(self, time_budget: float = 0, entry_budget: int = 0) -> Optional[DirectorySnapshot]:
+        """
+        推进扫描
+
+        Args:
+            time_budget: 本次最多占用的秒数，<=0 表示不限
+            entry_budget: 本次最多处理的条目数，<=0 表示不限
+
+        Returns:
+            完成一遍扫描时返回快照，否则返回 None
+        """
+        if self._snapshot is None:
+            self._begin()
+
+        deadline = time.monotonic() + time_budget if time_budget and time_budget > 0 else None
+        processed = 0
+
+        try:
+            while True:
+                if self._entry_index >= len(self._entries):
+                    if not self._stack:
+                        return self._finish()
+                    self._open_next_dir()
+                    continue
+
+                entry = self._entries[self._entry_index]
+                self._entry_index += 1
+                self._visit(entry)
+                processed += 1
+
+                if entry_budget and entry_budget > 0 and processed >= entry_budget:
+                    break
+                if deadline is not None and processed % self._CLOCK_INTERVAL == 0 \
+                        and time.monotonic() >= deadline:
+                    break
+        except Exception as e:
+            logger.error(f"扫描目录失败: {e}")
+            return self._finish()
+
+        if self._entry_index >= len(self._entries) and not self._stack:
+            return self._finish()
+        return None
+
+    def _begin(self):
+        """开始新一轮扫描"""
+        self._snapshot = DirectorySnapshot(scan_time=datetime.now())
+        self._stack = [""]
+        self._entries = []
+        self._entry_index = 0
+
+    def _finish(self) -> DirectorySnapshot:
+        """结束本轮扫描并返回快照"""
+        snapshot = self._snapshot
+        self._build_digests(snapshot, self._dir_order)
+        self.cancel()
+        self.passes += 1
+        return snapshot
+
+    @staticmethod
+    def _build_digests(snapshot: DirectorySnapshot, dir_order: List[str]):
+        """
+        自底向上计算每个目录的 Merkle 哈希
+
+        目录总是在其父目录打开之后才被打开，逆序处理即可保证子目录先于父目录。
+        """
+        files = snapshot.files
+        tree = snapshot.tree
+        for rel_dir in reversed(dir_order):
+            node = tree[rel_dir]
+            h = hashlib.blake2b(digest_size=16)
+            for key in sorted(node.files):
+                info = files[key]
+                h.update(f"f{info.name}\0{info.size}\0{info.mtime_ns}\0{info.ctime_ns}\n".encode('utf-8', 'surrogateescape'))
+            for sub in sorted(node.subdirs):
+                child = tree.get(sub)
+                if child is None:
+                    continue
+                h.update(f"d{sub.rsplit('/', 1)[-1]}\0{child.mtime_ns}\0".encode('utf-8', 'surrogateescape'))
+                h.update(child.digest)
+            node.digest = h.digest()
+
+    def _open_next_dir(self):
+        """弹出下一个目录并读取其条目"""
+        rel_dir = self._stack.pop()
+        abs_dir = os.path.join(self.root, rel_dir) if rel_dir else self.root
+        self._entry_dir = rel_dir
+        self._entry_index = 0
+        if self.rollup_depth:
+            # 每个目录只计算一次汇总键，条目累加时直接使用
+            key = rollup_key(rel_dir, self.rollup_depth)
+            self._entry_rollup = self._snapshot.rollups.setdefault(key, [0, 0])
+        node = DirNode()
+        self._snapshot.tree[rel_dir] = node
+        self._dir_order.append(rel_dir)
+        try:
+            node.mtime_ns = os.stat(abs_dir).st_mtime_ns
+            with os.scandir(abs_dir) as it:
+                self._entries = list(it)
+        except OSError:
+            self._entries = []
+
+    def _visit(self, entry: os.DirEntry):
+        """处理单个目录条目"""
+        rel_dir = self._entry_dir
+        rel_path = f"{rel_dir}/{entry.name}" if rel_dir else entry.name
+        try:
+            is_dir = entry.is_dir()
+        except OSError:
+            return
+
+        if is_dir:
+            if not self.matcher.should_descend(rel_path):
+                return
+            # 与 os.walk 一致：不跟随符号链接目录
+            if not entry.is_symlink():
+                self._stack.append(rel_path)
+                self._snapshot.tree[rel_dir].subdirs.append(rel_path)
+            if self.include_folders:
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    return
+                key = os.path.normpath(rel_path)
+                self._add(rel_dir, FileInfo.from_stat(key, entry.name, stat, True))
+            return
+
+        if not self.matcher.accepts_file(rel_path):
+            return
+        try:
+            stat = entry.stat()
+        except OSError:
+            return
+        key = os.path.normpath(rel_path)
+        self._add(rel_dir, FileInfo.from_stat(key, entry.name, stat, False))
+
+    def _add(self, rel_dir: str, info: FileInfo):
+        """将条目写入快照、目录树与 inode 索引"""
+        snapshot = self._snapshot
+        snapshot.files[info.path] = info
+        snapshot.tree[rel_dir].files.append(info.path)
+        # 部分平台的 scandir 不提供 inode（为 0），此时无法参与移动检测
+        if info.ino:
+            snapshot.inodes[(info.dev, info.ino)] = info.path
+        if self._entry_rollup is not None and not info.is_dir:
+            self._entry_rollup[0] += 1
+            self._entry_rollup[1] += info.size
@@ -0,0 +1,214 @@
+# -*- coding: utf-8 -*-
+"""
+磁盘空间监控模块
+
+定期采样挂载点的磁盘用量（statvfs，O(1) 系统调用，不遍历目录树），
+在使用率超过阈值或按增长趋势预计即将写满时触发通知。
+"""
+
+import os
+import time
+import shutil
+import logging
+from collections import deque
+from typing import Tuple, Optional, Dict, Any, List, Deque
+
+from core.monitor.base import BaseMonitor
+
+logger = logging.getLogger(__name__)
+
+# 单个采样: (单调时间秒, 已用字节, 可用字节, 总字节)
+Sample = Tuple[float, int, int, int]
+
+
+def read_disk_usage(path: str) -> Tuple[int, int, int]:
+    """
+    读取路径所在文件系统的用量
+
+    Returns:
+        (已用字节, 可用字节, 总字节)，可用字节为非特权用户可用的空间
+    """
+    if hasattr(os, 'statvfs'):
+        st = os.statvfs(path)
+        total = st.f_blocks * st.f_frsize
+        used = (st.f_blocks - st.f_bfree) * st.f_frsize
+        avail = st.f_bavail * st.f_frsize
+        return used, avail, total
+    # Windows 没有 statvfs
+    usage = shutil.disk_usage(path)
+    return usage.used, usage.free, usage.total
+
+
+def fit_growth_rate(samples: List[Sample]) -> float:
+    """
+    对 (时间, 已用字节) 做最小二乘线性拟合
+
+    Returns:
+        增长速率（字节/秒），样本不足或时间跨度为 0 时返回 0
+    """
+    n = len(samples)
+    if n < 2:
+        return 0.0
+    t0 = samples[0][0]
+    mean_t = sum(s[0] - t0 for s in samples) / n
+    mean_u = sum(s[1] for s in samples) / n
+    var_t = sum((s[0] - t0 - mean_t) ** 2 for s in samples)
+    if var_t <= 0:
+        return 0.0
+    cov = sum((s[0] - t0 - mean_t) * (s[1] - mean_u) for s in samples)
+    return cov / var_t
+
+
+def _format_bytes(nbytes: float) -> str:
+    """格式化字节数"""
+    size = float(nbytes)
+    for unit in ['B', 'KB', 'MB', 'GB']:
+        if abs(size) < 1024:
+            return f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} TB"
+
+
+class DiskMonitor(BaseMonitor):
+    """
+    磁盘空间监控器
+
+    每次检查为每个路径记录一个采样并放入环形缓冲区，用最小二乘拟合增长速率，
+    满足任一条件即触发：使用率达到阈值，或按当前速率预计在指定小时数内写满。
+
+    Attributes:
+        paths (List[str]): 要监控的路径（挂载点或其中任意路径）
+        usage_threshold (float): 使用率阈值（百分比），<=0 表示不按阈值触发
+        full_within_hours (float): 预计写满的预警时长（小时），<=0 表示不按趋势触发
+        min_samples (int): 做趋势预测所需的最少采样数
+    """
+
+    def __init__(self, config: Dict[str, Any]):
+        """
+        初始化磁盘监控器
+
+        Args:
+            config: monitor 配置字典，需包含:
+                - check_disk_enabled: 是否启用
+                - check_disk_paths: 路径列表
+                - check_disk_usage_threshold: 使用率阈值（%）
+                - check_disk_full_within_hours: 预计写满预警时长（小时）
+                - check_disk_sample_window: 环形缓冲区大小
+                - check_disk_min_samples: 趋势预测最少采样数
+        """
+        self._enabled = config.get('check_disk_enabled', False)
+        paths = config.get('check_disk_paths', []) or []
+        if isinstance(paths, str):
+            paths = [paths]
+        self.paths: List[str] = [p for p in paths if p]
+        try:
+            self.usage_threshold = float(config.get('check_disk_usage_threshold', 95) or 0)
+        except (ValueError, TypeError):
+            self.usage_threshold = 95.0
+        try:
+            self.full_within_hours = float(config.get('check_disk_full_within_hours', 6) or 0)
+        except (ValueError, TypeError):
+            self.full_within_hours = 6.0
+        try:
+            window = int(config.get('check_disk_sample_window', 60))
+        except (ValueError, TypeError):
+            window = 60
+        try:
+            self.min_samples = max(2, int(config.get('check_disk_min_samples', 5)))
+        except (ValueError, TypeError):
+            self.min_samples = 5
+        self._samples: Dict[str, Deque[Sample]] = {
+            path: deque(maxlen=max(2, window)) for path in self.paths
+        }
+        self._last_status: Dict[str, Dict[str, Any]] = {}
+
+    @property
+    def name(self) -> str:
+        return "磁盘空间监控"
+
+    @property
+    def enabled(self) -> bool:
+        return self._enabled and bool(self.paths)
+
+    def check(self) -> Tuple[bool, str, Optional[str]]:
+        """
+        采样并检查磁盘空间
+
+        Returns:
+            Tuple[bool, str, Optional[str]]:
+                - bool: 是否满足触发条件
+                - str: "磁盘空间检测"
+                - Optional[str]: 用量与写满预测
+        """
+        if not self.enabled:
+            return False, "未启用", None
+
+        alerts = []
+        for path in self.paths:
+            status = self._sample(path)
+            if status is None:
+                continue
+            self._last_status[path] = status
+
+            reason = None
+            if self.usage_threshold > 0 and status["usage_percent"] >= self.usage_threshold:
+                reason = f"使用率 {status['usage_percent']:.1f}% 已达阈值 {self.usage_threshold:g}%"
+            elif (self.full_within_hours > 0 and status["hours_to_full"] is not None
+                    and status["hours_to_full"] <= self.full_within_hours):
+                reason = f"预计 {status['hours_to_full']:.1f} 小时内写满"
+            if reason:
+                alerts.append(f"{path}: {reason}，{self._format_status(status)}")
+
+        if alerts:
+            detail = "\n".join(alerts)
+            logger.info(f"磁盘空间检测触发: {detail}")
+            return True, "磁盘空间检测", detail
+        return False, "空间充足", None
+
+    def _sample(self, path: str) -> Optional[Dict[str, Any]]:
+        """记录一次采样并计算当前状态"""
+        try:
+            used, avail, total = read_disk_usage(path)
+        except OSError as e:
+            logger.warning(f"读取磁盘用量失败: {path} ({e})")
+            return None
+
+        samples = self._samples[path]
+        samples.append((time.monotonic(), used, avail, total))
+
+        rate = 0.0
+        hours_to_full = None
+        if len(samples) >= self.min_samples:
+            rate = fit_growth_rate(list(samples))
+            if rate > 0:
+                hours_to_full = avail / rate / 3600
+
+        capacity = used + avail
+        return {
+            "used": used,
+            "avail": avail,
+            "total": total,
+            "usage_percent": used / capacity * 100 if capacity else 0.0,
+            "growth_per_hour": rate * 3600,
+            "hours_to_full": hours_to_full,
+        }
+
+    @staticmethod
+    def _format_status(status: Dict[str, Any]) -> str:
+        """格式化用量与增长趋势"""
+        text = f"已用 {_format_bytes(status['used'])}，剩余 {_format_bytes(status['avail'])}"
+        if status["growth_per_hour"] > 0:
+            text += f"，增长 {_format_bytes(status['growth_per_hour'])}/小时"
+            if status["hours_to_full"] is not None:
+                text += f"，预计 {status['hours_to_full']:.1f} 小时后写满"
+        return text
+
+    def get_status(self) -> Dict[str, Dict[str, Any]]:
+        """获取各路径最近一次采样的状态"""
+        return dict(self._last_status)
+
+    def reset(self):
+        """清空采样历史"""
+        for samples in self._samples.values():
+            samples.clear()
+        self._last_status = {}
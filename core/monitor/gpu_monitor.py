@@ -2,14 +2,22 @@
 """
 GPU 功耗监控模块
 
-检测 GPU 功耗是否持续低于指定阈值。
+检测 GPU 功耗是否持续低于指定阈值，或按 `check_gpu_conditions` 对利用率、
+显存、温度等多项指标做组合判定（同一轮采样一次批量读取全部指标），或跟踪
+指定 PID / 进程名，在这些进程不再占用 GPU 时触发。支持两种判定方式：
+连续多次采样满足条件（count），或基于滑动窗口统计量（均值、p95、EWMA）
+并带滞回区间的判定，单个噪声采样不会打断长时间的空闲判断。
 """
 
+import os
 import subprocess
 import logging
-from typing import Tuple, Optional, Dict, Any, List, Union
+from typing import Tuple, Optional, Dict, Any, List, Set, Union
 
 from core.monitor.base import BaseMonitor
+from core.utils.gpu import GpuProcess, GpuReading, GpuSampler, get_gpu_sampler
+from core.utils.gpu_series import GpuTimeSeries, WINDOW_STATS
+from core.utils.gpu_conditions import GpuRule, compile_gpu_rule, format_metric
 
 logger = logging.getLogger(__name__)
 
@@ -26,6 +34,12 @@ class GpuMonitor(BaseMonitor):
         consecutive_checks (int): 需要连续满足条件的次数
         trigger_mode (str): 触发模式 ("below" 或 "above")
         low_power_count (int): 当前连续满足条件的次数
+        window_mode (str): 判定方式 ("count" 或窗口统计量 "mean"/"p95"/"ewma")
+        window_size (int): 统计窗口的采样数
+        hysteresis (float): 滞回区间（瓦特），进入满足状态后需越过阈值该幅度才退出
+        rule (Optional[GpuRule]): 编译后的组合条件，配置时取代功耗阈值判定
+        process_pids (Set[int]): 跟踪的进程 PID
+        process_names (Set[str]): 跟踪的进程名（完整路径或文件名）
     """
     
     def __init__(self, config: Dict[str, Any]):
@@ -39,6 +53,17 @@ class GpuMonitor(BaseMonitor):
                 - check_gpu_power_gpu_ids: GPU ID ("all" 或 列表)
                 - check_gpu_power_consecutive_checks: 连续检测次数
                 - check_gpu_power_trigger_mode: 触发模式 ("below" 或 "above")
+                - check_gpu_conditions: 组合条件，如 "util < 5% and memory < 1GB"
+                - check_gpu_process_pids: 跟踪的进程 PID 列表
+                - check_gpu_process_names: 跟踪的进程名列表
+                - check_gpu_power_window_mode: 判定方式 ("count"、"mean"、"p95"、"ewma")
+                - check_gpu_power_window_size: 统计窗口的采样数
+                - check_gpu_power_ewma_alpha: EWMA 平滑系数
+                - check_gpu_power_hysteresis: 滞回区间（瓦特）
+                - check_gpu_trace_path: 回放的 nvidia-smi CSV 采样文件（用于无显卡环境调试）
+                - check_gpu_trace_speed: 回放倍速
+                - check_gpu_smi_stream: NVML 不可用时是否使用 nvidia-smi 流式采样
+                - check_gpu_smi_interval_ms: 流式采样间隔（毫秒）
         """
         self._enabled = config.get('check_gpu_power_enabled', False)
         self.threshold = config.get('check_gpu_power_threshold', 50.0)
@@ -46,6 +71,63 @@ class GpuMonitor(BaseMonitor):
         self.consecutive_checks = config.get('check_gpu_power_consecutive_checks', 3)
         self.trigger_mode = config.get('check_gpu_power_trigger_mode', 'below')
         self.low_power_count = 0
+        
+        # 组合条件只在加载配置时编译一次
+        self.rule: Optional[GpuRule] = None
+        self._rule_error: Optional[str] = None
+        conditions = config.get('check_gpu_conditions')
+        if conditions:
+            try:
+                self.rule = compile_gpu_rule(conditions)
+            except ValueError as e:
+                # 回退到功耗阈值会在空闲功耗较高的显卡上误触发，因此整体判定为不满足
+                logger.error(f"GPU条件配置无效，GPU检测将不会触发: {e}")
+                self._rule_error = str(e)
+        
+        # 进程跟踪：配置了 PID 或进程名时，改为在这些进程释放 GPU 后触发
+        self.process_pids: Set[int] = {
+            int(pid) for pid in self._as_list(config.get('check_gpu_process_pids')) if pid.isdigit()
+        }
+        self.process_names: Set[str] = set(self._as_list(config.get('check_gpu_process_names')))
+        self._process_seen = False
+        self._tracked_desc = ""
+        
+        # 窗口统计判定
+        self.window_mode = config.get('check_gpu_power_window_mode', 'count')
+        if self.window_mode != 'count' and self.window_mode not in WINDOW_STATS:
+            logger.warning(f"未知的GPU功耗判定方式 {self.window_mode}，使用 count")
+            self.window_mode = 'count'
+        try:
+            self.window_size = max(1, int(config.get('check_gpu_power_window_size', 10)))
+        except (ValueError, TypeError):
+            self.window_size = 10
+        try:
+            alpha = float(config.get('check_gpu_power_ewma_alpha', 0.3))
+        except (ValueError, TypeError):
+            alpha = 0.3
+        try:
+            self.hysteresis = float(config.get('check_gpu_power_hysteresis', 0) or 0)
+        except (ValueError, TypeError):
+            self.hysteresis = 0.0
+        attrs = self.rule.attrs if self.rule else ['power_w']
+        self._series: Dict[str, GpuTimeSeries] = {
+            attr: GpuTimeSeries(self.window_size, alpha) for attr in attrs
+        }
+        self._latched: Dict[int, bool] = {}
+        self._last_sample_at = 0.0
+        
+        # 指定了采样文件时用回放后端代替硬件（只作用于本监控器，不替换共享采样器）
+        self._trace_sampler: Optional[GpuSampler] = None
+        trace_path = config.get('check_gpu_trace_path')
+        if self._enabled and trace_path:
+            self._trace_sampler = self._create_trace_sampler(trace_path, config.get('check_gpu_trace_speed', 1.0))
+        # NVML 不可用时，保持一个 nvidia-smi --loop-ms 子进程持续采样，而非每次检查都启动进程
+        elif self._enabled and config.get('check_gpu_smi_stream', True):
+            try:
+                interval_ms = int(config.get('check_gpu_smi_interval_ms', 1000))
+            except (ValueError, TypeError):
+                interval_ms = 1000
+            get_gpu_sampler().enable_stream(interval_ms)
     
     @property
     def name(self) -> str:
@@ -67,16 +149,24 @@ class GpuMonitor(BaseMonitor):
         """
         if not self._enabled:
             return False, "未启用", None
+        if self._rule_error is not None:
+            return False, "条件配置无效", None
         
-        mode_desc = "低于" if self.trigger_mode == "below" else "高于"
+        if self.track_processes:
+            return self._check_processes()
+        if self.window_mode != 'count':
+            return self._check_window()
+        
+        desc = self._describe()
             
         try:
-            if self._check_power_threshold():
+            met = self._check_conditions() if self.rule else self._check_power_threshold()
+            if met:
                 self.low_power_count += 1
-                logger.info(f"GPU功耗{mode_desc}阈值次数: [{self.low_power_count}/{self.consecutive_checks}]")
+                logger.info(f"GPU{desc}次数: [{self.low_power_count}/{self.consecutive_checks}]")
                 
                 if self.low_power_count >= self.consecutive_checks:
-                    logger.info(f"GPU功耗已连续{self.consecutive_checks}次{mode_desc}阈值{self.threshold}W，判定任务完成")
+                    logger.info(f"GPU已连续{self.consecutive_checks}次{desc}，判定任务完成")
                     return True, "GPU功耗检测", None
             else:
                 # 重置计数器
@@ -87,6 +177,175 @@ class GpuMonitor(BaseMonitor):
             
         return False, "未完成", None
     
+    def _check_window(self) -> Tuple[bool, str, Optional[str]]:
+        """
+        基于窗口统计量判定
+        
+        流式采样可用时，上次检查以来的每一轮采样都会写入窗口；
+        所有指定 GPU 的窗口都已填满且统计量处于满足状态时触发。
+        """
+        try:
+            batches = self.sampler.collect(self._last_sample_at)
+        except (subprocess.SubprocessError, FileNotFoundError):
+            logger.warning("未检测到NVIDIA显卡或nvidia-smi不可用，跳过GPU功耗检查")
+            return False, "未完成", None
+        if batches:
+            self._last_sample_at = batches[-1][0]
+        for _, readings in batches:
+            for attr, series in self._series.items():
+                series.push({r.index: getattr(r, attr) for r in readings})
+        
+        known = sorted(set().union(*(series.gpus() for series in self._series.values())))
+        check_gpus = [g for g in self._get_gpu_list(dict.fromkeys(known)) if g in known]
+        if not check_gpus:
+            return False, "未完成", None
+        
+        satisfied = True
+        parts = []
+        for gpu_id in check_gpus:
+            stats = {attr: series.stat(gpu_id, self.window_mode) for attr, series in self._series.items()}
+            if self.rule:
+                latched = self.rule.matches(GpuReading(index=gpu_id, **stats))
+            else:
+                latched = stats['power_w'] is not None and self._update_latch(gpu_id, stats['power_w'])
+            parts.append(f"GPU {gpu_id} {self.window_mode} "
+                         + " ".join(format_metric(attr, value) for attr, value in stats.items()))
+            full = all(series.is_full(gpu_id) for series in self._series.values())
+            if not (latched and full):
+                satisfied = False
+        
+        detail = ", ".join(parts)
+        logger.debug(f"GPU窗口统计: {detail}")
+        if not satisfied:
+            return False, "未完成", None
+        logger.info(f"GPU最近 {self.window_size} 次采样的 {self.window_mode} {self._describe()}，判定任务完成")
+        return True, "GPU功耗检测", detail
+    
+    @staticmethod
+    def _create_trace_sampler(path: str, speed: Any) -> Optional[GpuSampler]:
+        """创建以采样回放为后端的专用采样器，加载失败时返回 None（改用共享采样器）"""
+        from core.utils.gpu_trace import TraceReplayBackend
+        try:
+            return GpuSampler(allow_stream=False, backend=TraceReplayBackend(path, speed=float(speed)))
+        except (OSError, ValueError) as e:
+            logger.error(f"加载GPU采样文件失败: {path} ({e})")
+            return None
+    
+    @property
+    def sampler(self) -> GpuSampler:
+        """本监控器使用的采样器：配置了采样回放时为专用采样器，否则为共享采样器"""
+        return self._trace_sampler if self._trace_sampler is not None else get_gpu_sampler()
+    
+    @staticmethod
+    def _as_list(value: Any) -> List[str]:
+        """把逗号分隔的字符串或列表统一为去空白后的字符串列表"""
+        if value is None or value == '':
+            return []
+        if isinstance(value, (str, int)):
+            value = str(value).split(',')
+        return [str(v).strip() for v in value if str(v).strip()]
+    
+    @property
+    def track_processes(self) -> bool:
+        """是否处于进程跟踪模式"""
+        return bool(self.process_pids or self.process_names)
+    
+    def _is_tracked(self, process: GpuProcess) -> bool:
+        if process.pid in self.process_pids:
+            return True
+        return bool(process.name) and (
+            process.name in self.process_names or os.path.basename(process.name) in self.process_names
+        )
+    
+    def _check_processes(self) -> Tuple[bool, str, Optional[str]]:
+        """
+        检查被跟踪的进程是否已释放 GPU
+        
+        进程出现在计算进程列表中即视为占用 GPU。只有先观察到被跟踪的进程，
+        之后它们从所有指定 GPU 上消失并连续多次确认，才判定任务完成，
+        避免任务尚未启动时误触发。
+        """
+        try:
+            processes = self.sampler.refresh_processes()
+        except (subprocess.SubprocessError, FileNotFoundError):
+            logger.warning("未检测到NVIDIA显卡或nvidia-smi不可用，跳过GPU进程检查")
+            return False, "未完成", None
+        
+        tracked = [p for p in processes if self._is_tracked(p)]
+        if self.gpu_ids != 'all':
+            selected = set(self._get_gpu_list({}))
+            tracked = [p for p in tracked if p.gpu_index in selected]
+        
+        if tracked:
+            desc = ", ".join(dict.fromkeys(f"{p.pid}({p.name})" if p.name else str(p.pid) for p in tracked))
+            gpus = ", ".join(str(g) for g in sorted({p.gpu_index for p in tracked}))
+            if not self._process_seen:
+                logger.info(f"检测到被跟踪的GPU进程 {desc}，占用 GPU {gpus}")
+            self._process_seen = True
+            self._tracked_desc = f"{desc} 占用的 GPU {gpus}"
+            self.low_power_count = 0
+            return False, "未完成", None
+        
+        if not self._process_seen:
+            logger.debug("尚未检测到被跟踪的GPU进程")
+            return False, "未完成", None
+        
+        self.low_power_count += 1
+        logger.info(f"被跟踪的GPU进程已释放显卡次数: [{self.low_power_count}/{self.consecutive_checks}]")
+        if self.low_power_count >= self.consecutive_checks:
+            detail = f"进程 {self._tracked_desc} 已释放"
+            logger.info(f"{detail}，判定任务完成")
+            return True, "GPU进程检测", detail
+        return False, "未完成", None
+    
+    def _describe(self) -> str:
+        """当前判定条件的文字描述"""
+        if self.rule:
+            return f"满足条件 [{self.rule.describe()}]"
+        mode_desc = "低于" if self.trigger_mode == "below" else "高于"
+        return f"功耗{mode_desc}阈值{self.threshold}W"
+    
+    def _check_conditions(self) -> bool:
+        """
+        检查所有指定 GPU 是否满足组合条件
+        
+        全部指标来自同一次批量读取（NVML 或单次 nvidia-smi 查询）。
+        
+        Returns:
+            bool: 是否所有指定 GPU 都满足全部条件
+        """
+        try:
+            readings = {r.index: r for r in self.sampler.refresh()}
+            for gpu_id in self._get_gpu_list(readings):
+                reading = readings.get(gpu_id)
+                if reading is None:
+                    continue
+                failed = self.rule.failed(reading)
+                if failed is not None:
+                    logger.debug(f"GPU {gpu_id} 不满足条件 {failed.describe()}")
+                    return False
+            return True
+        except (subprocess.SubprocessError, FileNotFoundError):
+            logger.warning("未检测到NVIDIA显卡或nvidia-smi不可用")
+            return False
+        except Exception as e:
+            logger.error(f"检查GPU条件失败: {str(e)}")
+            return False
+    
+    def _update_latch(self, gpu_id: int, value: float) -> bool:
+        """
+        按滞回区间更新某块 GPU 的满足状态
+        
+        below 模式下低于阈值进入满足状态，高于 阈值+滞回 才退出；above 模式对称。
+        """
+        latched = self._latched.get(gpu_id, False)
+        if self.trigger_mode == "below":
+            latched = value <= self.threshold + self.hysteresis if latched else value < self.threshold
+        else:
+            latched = value >= self.threshold - self.hysteresis if latched else value > self.threshold
+        self._latched[gpu_id] = latched
+        return latched
+    
     def _check_power_threshold(self) -> bool:
         """
         检查 GPU 功耗是否满足阈值条件
@@ -95,17 +354,7 @@ class GpuMonitor(BaseMonitor):
             bool: 是否所有指定 GPU 的功耗都满足条件
         """
         try:
-            output = subprocess.check_output(
-                ['nvidia-smi', '--query-gpu=index,power.draw', '--format=csv,noheader,nounits'],
-                universal_newlines=True
-            )
-            
-            # 解析输出
-            gpu_power_info = {}
-            for line in output.strip().split('\n'):
-                if ',' in line:
-                    idx, power = line.split(',')
-                    gpu_power_info[int(idx.strip())] = float(power.strip())
+            gpu_power_info = self._read_power()
             
             logger.debug(f"当前GPU功耗: {gpu_power_info}")
             
@@ -134,6 +383,16 @@ class GpuMonitor(BaseMonitor):
             logger.error(f"检查GPU功耗失败: {str(e)}")
             return False
     
+    def _read_power(self) -> Dict[int, float]:
+        """
+        查询各 GPU 功耗
+        
+        每次都重新读取硬件（优先 NVML，不可用时调用 nvidia-smi），
+        读数同时写入共享采样器，供随后的通知复用。
+        """
+        readings = self.sampler.refresh()
+        return {r.index: r.power_w for r in readings if r.power_w is not None}
+    
     def _get_gpu_list(self, gpu_power_info: Dict[int, float]) -> List[int]:
         """
         获取要检查的 GPU 列表
@@ -152,5 +411,9 @@ class GpuMonitor(BaseMonitor):
             return [int(self.gpu_ids)]
     
     def reset(self):
-        """重置计数器"""
+        """重置计数器与窗口"""
         self.low_power_count = 0
+        for series in self._series.values():
+            series.clear()
+        self._latched = {}
+        self._process_seen = False
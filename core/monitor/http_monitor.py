@@ -3,22 +3,96 @@
 HTTP 轮询监控模块
 
 定时发送 HTTP 请求，根据响应状态码和内容判断是否触发通知。
+请求通过长期复用的 Session 发出，同一端点的 TCP / TLS 连接在各轮检查间保持，
+每次请求的耗时会被记录，供状态接口查询。GET 请求会带上上次响应的
+ETag / Last-Modified 发送条件请求，304 时直接沿用上次的判定结果。响应体按块流式读取，
+找到关键词或达到读取上限即停止。配置 JSON 路径断言时，断言在加载配置时编译一次，
+状态码与 Content-Type 都符合后才解码响应体并求值。配置多个端点时并发轮询，
+按 all / any / K-of-N 判定，每轮耗时约等于最慢的一个请求。
 """
 
 import json
+import time
 import logging
-from typing import Tuple, Optional, Dict, Any
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Tuple, Optional, Dict, Any, Deque, List
 
 import requests
+from requests.adapters import HTTPAdapter
 
 from core.monitor.base import BaseMonitor
+from core.utils.json_path import JsonAssertion, compile_json_assertion
+from core.utils.stream_matcher import StreamMatcher
 
 logger = logging.getLogger(__name__)
 
+# 状态接口统计最近多少次请求的耗时
+LATENCY_WINDOW = 50
+# 流式读取响应体的块大小
+CHUNK_SIZE = 16 * 1024
+
+
+class _BodyReader:
+    """
+    按块读取响应体，统计读取量，读取总量不超过上限（上限为 0 时不限制）
+
+    Attributes:
+        bytes_read (int): 已读取的字节数（解压后）
+        truncated (bool): 是否因达到上限而停止读取
+        stopped (bool): 调用方是否提前停止读取（如已找到关键词）
+    """
+
+    def __init__(self, response: requests.Response, limit: int):
+        self.response = response
+        self.limit = limit
+        self.bytes_read = 0
+        self.truncated = False
+        self.stopped = False
+        self.headers_at = time.perf_counter()
+        self._chunks = response.iter_content(CHUNK_SIZE)
+
+    def chunks(self):
+        """逐块返回响应体，达到上限后截断并停止"""
+        for chunk in self._chunks:
+            if not chunk:
+                continue
+            remaining = self.limit - self.bytes_read
+            # 恰好读到上限时不算截断，只有上限之后还有数据才算
+            if self.limit > 0 and len(chunk) > remaining:
+                self.truncated = True
+                if remaining:
+                    self.bytes_read += remaining
+                    yield chunk[:remaining]
+                return
+            self.bytes_read += len(chunk)
+            yield chunk
+
+    def drain(self):
+        """读完剩余内容（不超过上限），使连接可以归还连接池"""
+        if not self.truncated:
+            for _ in self.chunks():
+                pass
+
 
 class HttpMonitor(BaseMonitor):
+    """
+    HTTP 轮询监控器
+
+    Attributes:
+        url (str): 请求地址
+        pool_size (int): 连接池大小
+        endpoints (List[HttpMonitor]): 多端点模式下各端点的子监控器
+        required (int): 多端点模式下需要满足条件的端点数
+    """
 
-    def __init__(self, config: Dict[str, Any]):
+    def __init__(self, config: Dict[str, Any], session_owner: Optional["HttpMonitor"] = None):
+        """
+        Args:
+            config: monitor 配置字典
+            session_owner: 多端点模式下提供共享 Session 的父监控器
+        """
         self._enabled = config.get('check_http_enabled', False)
         self.url = config.get('check_http_url', '')
         self.method = config.get('check_http_method', 'GET').upper()
@@ -27,6 +101,94 @@ class HttpMonitor(BaseMonitor):
         self.expected_status = config.get('check_http_expected_status', 200)
         self.expected_keywords = config.get('check_http_expected_keywords', [])
         self.timeout = config.get('check_http_timeout', 10)
+        try:
+            self.pool_size = max(1, int(config.get('check_http_pool_size', 4)))
+        except (ValueError, TypeError):
+            self.pool_size = 4
+        try:
+            max_body_mb = float(config.get('check_http_max_body_mb', 10))
+        except (ValueError, TypeError):
+            max_body_mb = 10.0
+        # <=0 表示不限制读取量
+        self.max_body_bytes = max(0, int(max_body_mb * 1024 * 1024))
+        self._matcher = StreamMatcher(self.expected_keywords or [])
+        self.expected_content_type = str(config.get('check_http_expected_content_type') or 'json').lower()
+        self.json_assertions: List[JsonAssertion] = []
+        self._assertion_error: Optional[str] = None
+        assertions = config.get('check_http_json_assertions') or []
+        if isinstance(assertions, str):
+            assertions = [assertions]
+        for text in assertions:
+            try:
+                self.json_assertions.append(compile_json_assertion(str(text)))
+            except ValueError as e:
+                # 忽略无效断言会让检测退化为只看状态码而误触发，因此整体判定为不满足
+                logger.error(f"HTTP JSON 断言配置无效，检测将不会触发: {e}")
+                self._assertion_error = str(e)
+
+        self._session_owner = session_owner
+        self._session: Optional[requests.Session] = None
+        self._adapter: Optional[HTTPAdapter] = None
+        self._closed_connections = 0
+        self._lock = threading.Lock()
+        self._latencies: Deque[Dict[str, Any]] = deque(maxlen=LATENCY_WINDOW)
+        self._stats = {
+            "requests": 0,
+            "errors": 0,
+            "session_resets": 0,
+            "not_modified": 0,
+        }
+        # 条件请求：上次响应的校验值与对应的判定结果
+        self._etag: Optional[str] = None
+        self._last_modified: Optional[str] = None
+        self._last_result: Optional[Tuple[bool, str, Optional[str]]] = None
+
+        self.endpoints: List[HttpMonitor] = self._create_endpoints(config)
+        self.required = self._parse_quorum(config.get('check_http_quorum', 'all'), len(self.endpoints))
+        if self.endpoints:
+            # 共享连接池：每个主机一个子池，每个子池至少容纳并发请求数
+            self.pool_size = max(self.pool_size, len(self.endpoints))
+
+    def _create_endpoints(self, config: Dict[str, Any]) -> List["HttpMonitor"]:
+        """
+        根据 check_http_endpoints 创建各端点的子监控器
+
+        每项可以是 URL 字符串，或包含 url 与覆盖项的字典；覆盖项的键可省略
+        `check_http_` 前缀，如 {"url": "http://replica-1/ready", "expected_keywords": ["ready"]}。
+        """
+        endpoints = config.get('check_http_endpoints') or []
+        if not isinstance(endpoints, list):
+            return []
+        base = {k: v for k, v in config.items() if k not in ('check_http_endpoints', 'check_http_quorum')}
+        base['check_http_enabled'] = True
+        children: List[HttpMonitor] = []
+        for endpoint in endpoints:
+            if isinstance(endpoint, str):
+                endpoint = {"url": endpoint}
+            if not isinstance(endpoint, dict) or not endpoint.get("url"):
+                continue
+            child_config = dict(base)
+            for key, value in endpoint.items():
+                if not key.startswith('check_http_'):
+                    key = f'check_http_{key}'
+                child_config[key] = value
+            children.append(HttpMonitor(child_config, session_owner=self))
+        return children
+
+    @staticmethod
+    def _parse_quorum(quorum: Any, total: int) -> int:
+        """把 all / any / K 转换为需要满足条件的端点数"""
+        if total == 0:
+            return 0
+        if quorum == 'any':
+            return 1
+        if quorum == 'all' or quorum is None:
+            return total
+        try:
+            return min(total, max(1, int(quorum)))
+        except (ValueError, TypeError):
+            logger.warning("无效的 check_http_quorum: %s，按 all 处理", quorum)
+            return total
 
     @property
     def name(self) -> str:
@@ -34,15 +196,75 @@ class HttpMonitor(BaseMonitor):
 
     @property
     def enabled(self) -> bool:
-        return self._enabled and bool(self.url)
+        return self._enabled and (bool(self.url) or bool(self.endpoints))
+
+    def _get_session(self) -> requests.Session:
+        """获取长期复用的 Session，连接出错后会被丢弃并在此重建"""
+        if self._session_owner is not None:
+            return self._session_owner._get_session()
+        with self._lock:
+            return self._ensure_session()
+
+    def _ensure_session(self) -> requests.Session:
+        if self._session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=self.pool_size, pool_maxsize=self.pool_size)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            self._session, self._adapter = session, adapter
+        return self._session
+
+    def _close_session(self):
+        """关闭 Session 及其连接池"""
+        if self._session is not None:
+            self._closed_connections += self._pool_connections()
+            self._session.close()
+            self._session = None
+            self._adapter = None
+
+    def _pool_connections(self) -> int:
+        """当前连接池累计新建的连接数"""
+        if self._adapter is None:
+            return 0
+        pools = self._adapter.poolmanager.pools
+        total = 0
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is not None:
+                total += pool.num_connections
+        return total
+
+    def _finish(self, body: _BodyReader, start: float):
+        """
+        结束一次请求并记录耗时
+
+        等待耗时从发出请求到收到响应头，新建连接时包含 TCP / TLS 握手；
+        传输耗时为读取响应体的时间。响应体读完时连接归还连接池，
+        提前停止或被截断时连接随响应关闭。
+        """
+        if not body.stopped:
+            body.drain()
+        body.response.close()
+        end = time.perf_counter()
+        with self._lock:
+            self._stats["requests"] += 1
+            self._latencies.append({
+                "status": body.response.status_code,
+                "wait_ms": round((body.headers_at - start) * 1000, 2),
+                "transfer_ms": round((end - body.headers_at) * 1000, 2),
+                "bytes": body.bytes_read,
+                "truncated": body.truncated,
+            })
 
     def check(self) -> Tuple[bool, str, Optional[str]]:
         if not self.enabled:
             return False, "未启用", None
+        if self.endpoints:
+            return self._check_endpoints()
 
         try:
             kwargs = {
-                'headers': self.headers,
+                'headers': self._request_headers(),
                 'timeout': self.timeout,
             }
 
@@ -52,43 +274,189 @@ class HttpMonitor(BaseMonitor):
                 except (json.JSONDecodeError, TypeError):
                     kwargs['data'] = self.body
 
-            response = requests.request(self.method, self.url, **kwargs)
-
-            status_match = (response.status_code == self.expected_status)
-            if not status_match:
-                logger.debug(
-                    "HTTP 状态码不匹配: 期望 %s, 实际 %s",
-                    self.expected_status,
-                    response.status_code,
-                )
-                return False, "状态码不匹配", None
-
-            if self.expected_keywords:
-                response_text = response.text
-                for keyword in self.expected_keywords:
-                    if keyword in response_text:
-                        detail = (
-                            f"HTTP {self.method} {self.url} -> {response.status_code}, "
-                            f"关键词: {keyword}"
-                        )
-                        logger.info("HTTP 检测触发: %s", detail)
-                        return True, "HTTP轮询检测", detail
-                logger.debug("HTTP 响应中未找到期望关键词")
-                return False, "关键词不匹配", None
+            start = time.perf_counter()
+            response = self._get_session().request(self.method, self.url, stream=True, **kwargs)
+            body = _BodyReader(response, self.max_body_bytes)
+            try:
+                if response.status_code == 304 and self._last_result is not None:
+                    self._stats["not_modified"] += 1
+                    logger.debug("HTTP 响应未变化，沿用上次判定: %s", self.url)
+                    return self._last_result
 
-            detail = f"HTTP {self.method} {self.url} -> {response.status_code}"
-            logger.info("HTTP 检测触发: %s", detail)
-            return True, "HTTP轮询检测", detail
+                result = self._evaluate(body)
+                if self.method == 'GET':
+                    self._remember(response, result)
+                return result
+            finally:
+                self._finish(body, start)
 
         except requests.exceptions.Timeout:
+            self._stats["errors"] += 1
             logger.debug("HTTP 请求超时: %s", self.url)
             return False, "请求超时", None
         except requests.exceptions.ConnectionError:
+            self._stats["errors"] += 1
+            # 连接池中可能残留失效连接，下次检查重建 Session；
+            # 共享 Session 时由父监控器在所有端点都连接失败后重建
+            if self._session_owner is None:
+                with self._lock:
+                    self._close_session()
+                self._stats["session_resets"] += 1
             logger.debug("HTTP 连接失败: %s", self.url)
             return False, "连接失败", None
         except Exception as e:
+            self._stats["errors"] += 1
             logger.error("HTTP 检测异常: %s", str(e))
             return False, "检测异常", None
 
+    def _evaluate(self, body: _BodyReader) -> Tuple[bool, str, Optional[str]]:
+        """按状态码、JSON 断言与关键词判定一次响应，关键词在流式读取响应体的同时查找"""
+        response = body.response
+        status_match = (response.status_code == self.expected_status)
+        if not status_match:
+            logger.debug(
+                "HTTP 状态码不匹配: 期望 %s, 实际 %s",
+                self.expected_status,
+                response.status_code,
+            )
+            return False, "状态码不匹配", None
+
+        if self._assertion_error is not None:
+            return False, "断言配置无效", None
+
+        detail = f"HTTP {self.method} {self.url} -> {response.status_code}"
+        chunks = body.chunks()
+        if self.json_assertions:
+            failure, data = self._check_json(body)
+            if failure is not None:
+                return False, failure, None
+            detail += f", 断言: {'; '.join(a.text for a in self.json_assertions)}"
+            chunks = [data]
+
+        if self._matcher.keywords:
+            keyword = self._matcher.search(chunks, response.encoding)
+            if keyword is not None:
+                body.stopped = True
+                detail += f", 关键词: {keyword}"
+                self._log_trigger(detail)
+                return True, "HTTP轮询检测", detail
+            if body.truncated:
+                logger.debug("HTTP 响应体读取 %d 字节后仍未找到期望关键词，停止读取", body.bytes_read)
+            else:
+                logger.debug("HTTP 响应中未找到期望关键词")
+            return False, "关键词不匹配", None
+
+        self._log_trigger(detail)
+        return True, "HTTP轮询检测", detail
+
+    def _check_json(self, body: _BodyReader) -> Tuple[Optional[str], bytes]:
+        """
+        解码 JSON 响应体并逐条求值断言
+
+        Returns:
+            (不满足的原因, 响应体)，全部断言满足时原因为 None
+        """
+        response = body.response
+        content_type = response.headers.get('Content-Type', '')
+        if self.expected_content_type not in content_type.lower():
+            logger.debug("HTTP Content-Type 不匹配: 期望包含 %s, 实际 %s", self.expected_content_type, content_type)
+            return "内容类型不匹配", b""
+
+        data = b"".join(body.chunks())
+        if body.truncated:
+            logger.debug("HTTP 响应体超过 %d 字节，无法解析 JSON", self.max_body_bytes)
+            return "响应体过大", data
+        try:
+            document = json.loads(data)
+        except ValueError as e:
+            logger.debug("HTTP 响应 JSON 解析失败: %s", e)
+            return "JSON解析失败", data
+
+        for assertion in self.json_assertions:
+            if not assertion.evaluate(document):
+                logger.debug("HTTP JSON 断言不满足: %s, 实际值 %s", assertion.text, assertion.select(document))
+                return "断言不满足", data
+        return None, data
+
+    def _request_headers(self) -> Dict[str, str]:
+        """请求头，GET 请求在已有判定结果时附带条件请求头（不覆盖用户配置）"""
+        headers = dict(self.headers or {})
+        if self.method == 'GET' and self._last_result is not None:
+            if self._etag:
+                headers.setdefault('If-None-Match', self._etag)
+            if self._last_modified:
+                headers.setdefault('If-Modified-Since', self._last_modified)
+        return headers
+
+    def _remember(self, response: requests.Response, result: Tuple[bool, str, Optional[str]]):
+        """记录响应的校验值与判定结果，响应没有校验值时不缓存"""
+        self._etag = response.headers.get('ETag')
+        self._last_modified = response.headers.get('Last-Modified')
+        has_validator = bool(self._etag or self._last_modified)
+        self._last_result = result if has_validator else None
+
+    def _log_trigger(self, detail: str):
+        # 多端点模式下由父监控器汇总输出
+        if self._session_owner is None:
+            logger.info("HTTP 检测触发: %s", detail)
+        else:
+            logger.debug("HTTP 端点满足条件: %s", detail)
+
+    def _check_endpoints(self) -> Tuple[bool, str, Optional[str]]:
+        """
+        并发轮询全部端点，满足条件的端点数达到 required 时触发
+
+        所有请求共享一个连接池，每轮耗时约等于最慢的一个请求。
+        """
+        with ThreadPoolExecutor(max_workers=len(self.endpoints), thread_name_prefix="http-poll") as pool:
+            results = list(pool.map(lambda monitor: monitor.check(), self.endpoints))
+
+        if all(method == "连接失败" for _, method, _ in results):
+            with self._lock:
+                self._close_session()
+            self._stats["session_resets"] += 1
+
+        passed = [detail for triggered, _, detail in results if triggered]
+        total = len(self.endpoints)
+        logger.debug("HTTP 端点满足条件: %d/%d（需要 %d）", len(passed), total, self.required)
+        if len(passed) < self.required:
+            return False, "未完成", None
+
+        detail = f"{len(passed)}/{total} 个端点满足条件（需要 {self.required}）\n" + "\n".join(passed)
+        logger.info("HTTP 检测触发: %d/%d 个端点满足条件", len(passed), total)
+        return True, "HTTP轮询检测", detail
+
+    def get_status(self) -> Dict[str, Any]:
+        """
+        获取请求统计，供状态接口展示
+
+        Returns:
+            累计请求数、错误数、新建连接数、Session 重建次数，
+            以及最近若干次请求的平均耗时与最后一次请求的耗时
+        """
+        with self._lock:
+            latencies = list(self._latencies)
+            status = dict(self._stats, url=self.url)
+            if self._session_owner is None:
+                status["connections_opened"] = self._closed_connections + self._pool_connections()
+        if self.endpoints:
+            status["required"] = self.required
+            status["endpoints"] = {monitor.url: monitor.get_status() for monitor in self.endpoints}
+        if latencies:
+            status["avg_wait_ms"] = round(sum(l["wait_ms"] for l in latencies) / len(latencies), 2)
+            status["avg_transfer_ms"] = round(sum(l["transfer_ms"] for l in latencies) / len(latencies), 2)
+            status["last"] = latencies[-1]
+        return status
+
+    def close(self):
+        """释放连接池"""
+        with self._lock:
+            self._close_session()
+
     def reset(self):
-        pass
+        """清除条件请求缓存，下次检查重新下载并判定"""
+        self._etag = None
+        self._last_modified = None
+        self._last_result = None
+        for monitor in self.endpoints:
+            monitor.reset()
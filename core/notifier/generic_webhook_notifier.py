@@ -16,6 +16,7 @@ import requests
 
 from core.notifier.base import BaseNotifier
 from core.utils.anime_quote import get_anime_quote
+from core.utils.gpu import gpu_usage_context
 
 logger = logging.getLogger(__name__)
 
@@ -35,6 +36,7 @@ class GenericWebhookNotifier(BaseNotifier):
         - ${method}: 触发方式
         - ${hostname}: 主机名
         - ${gpu_info}: GPU 信息
+        - ${gpu_energy_kwh} / ${gpu_avg_util} / ${gpu_peak_memory} 等: 任务期间的 GPU 用量统计
         - ${detail}: 触发详情
         - ${anime_quote}: 二次元语录
     
@@ -132,6 +134,7 @@ class GenericWebhookNotifier(BaseNotifier):
             "gpu_info": training_info.get("gpu_info", ""),
             "detail": training_info.get("detail", ""),
         }
+        context.update(gpu_usage_context(training_info.get("gpu_usage")))
         
         # 处理报告数据（多文件感知）
         report = training_info.get("report", {})
@@ -144,13 +147,20 @@ class GenericWebhookNotifier(BaseNotifier):
                 "report_added_count": str(report.get("added_count", 0)),
                 "report_removed_count": str(report.get("removed_count", 0)),
                 "report_modified_count": str(report.get("modified_count", 0)),
+                "report_moved_count": str(report.get("moved_count", 0)),
                 "report_actions": ", ".join(report.get("actions", [])),
+                "report_rollup": report.get("rollup_text", ""),
             })
             
             # 格式化文件列表
-            context["report_added_list"] = self._format_file_list(report.get("added_files", []))
-            context["report_removed_list"] = self._format_file_list(report.get("removed_files", []))
-            context["report_modified_list"] = self._format_file_list(report.get("modified_files", []))
+            context["report_added_list"] = self._format_file_list(
+                report.get("added_files", []), report.get("added_count"))
+            context["report_removed_list"] = self._format_file_list(
+                report.get("removed_files", []), report.get("removed_count"))
+            context["report_modified_list"] = self._format_file_list(
+                report.get("modified_files", []), report.get("modified_count"))
+            context["report_moved_list"] = self._format_file_list(
+                report.get("moved_files", []), report.get("moved_count"))
             
             # 合并新增和删除的列表 (用户需求)
             changes = []
@@ -162,7 +172,12 @@ class GenericWebhookNotifier(BaseNotifier):
                 f_copy = f.copy()
                 f_copy['tag'] = "[删除]"
                 changes.append(f_copy)
-            context["report_change_list"] = self._format_file_list(changes)
+            for f in report.get("moved_files", []):
+                f_copy = f.copy()
+                f_copy['tag'] = "[移动]"
+                changes.append(f_copy)
+            change_total = sum(report.get(k) or 0 for k in ("added_count", "removed_count", "moved_count"))
+            context["report_change_list"] = self._format_file_list(changes, change_total)
             
             # 目录监控时，detail 优先显示统计信息
             if report.get("summary"):
@@ -170,8 +185,9 @@ class GenericWebhookNotifier(BaseNotifier):
         else:
             # 默认空值
             for key in ["report_summary", "report_total", "report_scan_path", "report_timestamp", 
-                        "report_added_count", "report_removed_count", "report_modified_count", "report_actions",
-                        "report_added_list", "report_removed_list", "report_modified_list", "report_change_list"]:
+                        "report_added_count", "report_removed_count", "report_modified_count", "report_moved_count",
+                        "report_actions", "report_added_list", "report_removed_list", "report_modified_list",
+                        "report_moved_list", "report_change_list", "report_rollup"]:
                 context[key] = "无" if "list" not in key else ""
 
         # 自动检测：如果 body 模板中包含 ${anime_quote}，则获取语录
@@ -183,8 +199,8 @@ class GenericWebhookNotifier(BaseNotifier):
         
         return context
 
-    def _format_file_list(self, files: List[Dict[str, Any]]) -> str:
-        """格式化文件列表为字符串"""
+    def _format_file_list(self, files: List[Dict[str, Any]], total: Optional[int] = None) -> str:
+        """格式化文件列表为字符串（total 为截断前的实际总数）"""
         if not files:
             return "无"
             
@@ -192,10 +208,12 @@ class GenericWebhookNotifier(BaseNotifier):
         for i, f in enumerate(files[:10]):  # 最多显示10个
             tag = f.get('tag', "") + " " if f.get('tag') else ""
             size_text = f"[{f['size_str']}]" if not f['is_dir'] else "[DIR]"
-            lines.append(f"{i+1}. {tag}{f['path']} {size_text}")
+            path = f"{f['old_path']} -> {f['path']}" if f.get('old_path') else f['path']
+            lines.append(f"{i+1}. {tag}{path} {size_text}")
         
-        if len(files) > 10:
-            lines.append(f"... 等共 {len(files)} 项")
+        total = max(total or 0, len(files))
+        if total > min(len(files), 10):
+            lines.append(f"... 等共 {total} 项")
             
         return "\n".join(lines)
     
@@ -364,6 +382,11 @@ class GenericWebhookNotifier(BaseNotifier):
             "method",
             "hostname",
             "gpu_info",
+            "gpu_energy_kwh",
+            "gpu_avg_power",
+            "gpu_avg_util",
+            "gpu_peak_memory",
+            "gpu_usage",
             "detail",
             "anime_quote",
             "report_summary",
@@ -371,5 +394,7 @@ class GenericWebhookNotifier(BaseNotifier):
             "report_actions",
             "report_added_list",
             "report_removed_list",
-            "report_modified_list"
+            "report_modified_list",
+            "report_moved_list",
+            "report_rollup"
         ]
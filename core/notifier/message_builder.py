@@ -11,6 +11,7 @@ from typing import Dict, Any, Optional, List
 from datetime import datetime
 
 from core.utils.anime_quote import get_anime_quote
+from core.utils.gpu import gpu_usage_context
 
 
 class MessageBuilder:
@@ -35,7 +36,8 @@ class MessageBuilder:
                             project_name: str,
                             method: str,
                             detail: Optional[str] = None,
-                            gpu_info: Optional[str] = None) -> Dict[str, Any]:
+                            gpu_info: Optional[str] = None,
+                            gpu_usage: Optional[Dict[int, Dict[str, Any]]] = None) -> Dict[str, Any]:
         """
         构建任务信息字典
         
@@ -46,6 +48,7 @@ class MessageBuilder:
             method: 触发方式
             detail: 触发详情
             gpu_info: GPU 信息
+            gpu_usage: 任务期间各 GPU 的用量统计（能耗、平均利用率、显存峰值）
             
         Returns:
             任务信息字典
@@ -88,6 +91,8 @@ class MessageBuilder:
         # 添加 GPU 信息
         if gpu_info:
             training_info["gpu_info"] = gpu_info
+        if gpu_usage:
+            training_info["gpu_usage"] = gpu_usage
         
         return training_info
     
@@ -108,15 +113,26 @@ class MessageBuilder:
             parts.append(f"删除 {report['removed_count']} 项")
         if report.get('modified_count', 0) > 0:
             parts.append(f"修改 {report['modified_count']} 项")
+        if report.get('moved_count', 0) > 0:
+            parts.append(f"移动 {report['moved_count']} 项")
         return ", ".join(parts) if parts else "无变化"
     
-    def _format_file_list_markdown(self, files: List[Dict[str, Any]], max_items: int = 10) -> str:
+    @staticmethod
+    def _display_path(f: Dict[str, Any]) -> str:
+        """文件显示路径，移动条目显示为 旧路径 → 新路径"""
+        if f.get('old_path'):
+            return f"{f['old_path']} → {f['path']}"
+        return f['path']
+    
+    def _format_file_list_markdown(self, files: List[Dict[str, Any]], max_items: int = 10,
+                                   total: Optional[int] = None) -> str:
         """
         格式化文件列表为Markdown格式
         
         Args:
-            files: 文件信息列表
+            files: 文件信息列表（可能已被截断为前 N 项）
             max_items: 最多显示的文件数量
+            total: 该类变化的实际总数，默认为列表长度
             
         Returns:
             Markdown格式的文件列表
@@ -128,10 +144,11 @@ class MessageBuilder:
         for i, f in enumerate(files[:max_items]):
             size_text = f"[{f['size_str']}]" if not f.get('is_dir', False) else "[目录]"
             action_text = f" 💡{f['action']}" if f.get('action') else ""
-            lines.append(f"{i+1}. {f['path']} {size_text}{action_text}")
+            lines.append(f"{i+1}. {self._display_path(f)} {size_text}{action_text}")
         
-        if len(files) > max_items:
-            lines.append(f"... 等共 {len(files)} 项")
+        total = max(total or 0, len(files))
+        if total > min(len(files), max_items):
+            lines.append(f"... 等共 {total} 项")
         
         return "\n".join(lines)
     
@@ -184,14 +201,18 @@ class MessageBuilder:
             if self.config.get('include_report_summary', True):
                 summary = self._format_report_summary(report)
                 content_items.append(f"**变化统计**: {summary}")
+                if report.get('rollup_text'):
+                    content_items.append(f"**目录汇总**:\n{report['rollup_text']}")
             
             if self.config.get('include_report_details', True):
                 if report.get('added_files'):
-                    content_items.append(f"\n**新增文件**:\n{self._format_file_list_markdown(report['added_files'])}")
+                    content_items.append(f"\n**新增文件**:\n{self._format_file_list_markdown(report['added_files'], total=report.get('added_count'))}")
                 if report.get('removed_files'):
-                    content_items.append(f"\n**删除文件**:\n{self._format_file_list_markdown(report['removed_files'])}")
+                    content_items.append(f"\n**删除文件**:\n{self._format_file_list_markdown(report['removed_files'], total=report.get('removed_count'))}")
                 if report.get('modified_files'):
-                    content_items.append(f"\n**修改文件**:\n{self._format_file_list_markdown(report['modified_files'])}")
+                    content_items.append(f"\n**修改文件**:\n{self._format_file_list_markdown(report['modified_files'], total=report.get('modified_count'))}")
+                if report.get('moved_files'):
+                    content_items.append(f"\n**移动文件**:\n{self._format_file_list_markdown(report['moved_files'], total=report.get('moved_count'))}")
             
             if self.config.get('include_report_actions', True) and report.get('actions'):
                 actions_text = ", ".join(report['actions'])
@@ -252,6 +273,7 @@ class MessageBuilder:
         .badge-add { background: #d4edda; color: #155724; }
         .badge-remove { background: #f8d7da; color: #721c24; }
         .badge-modify { background: #fff3cd; color: #856404; }
+        .badge-move { background: #e2e3f3; color: #383d7c; }
         .summary { background: #e7f3ff; padding: 15px; border-radius: 4px; margin: 10px 0; }
         .footer { text-align: center; color: #999; font-size: 12px; margin-top: 20px; }
     </style>
@@ -319,6 +341,13 @@ class MessageBuilder:
                 <strong>📊 变化统计:</strong> {summary}
             </div>
 """)
+                if report.get('rollup'):
+                    html_parts.append('<div class="file-list"><strong>📁 目录汇总:</strong>')
+                    for item in report['rollup']:
+                        html_parts.append(
+                            f'<div class="file-item">{item["path"]}: {item["files"]:+d} 文件, {item["bytes_str"]}</div>'
+                        )
+                    html_parts.append('</div>')
             
             if self.config.get('include_report_details', True):
                 # 新增文件
@@ -328,8 +357,9 @@ class MessageBuilder:
                         size_text = f['size_str'] if not f.get('is_dir', False) else "目录"
                         action_text = f" 💡{f['action']}" if f.get('action') else ""
                         html_parts.append(f'<div class="file-item"><span class="badge badge-add">新增</span>{f["path"]} ({size_text}){action_text}</div>')
-                    if len(report['added_files']) > 10:
-                        html_parts.append(f'<div class="file-item">... 等共 {len(report["added_files"])} 项</div>')
+                    added_total = max(report.get('added_count') or 0, len(report['added_files']))
+                    if added_total > min(len(report['added_files']), 10):
+                        html_parts.append(f'<div class="file-item">... 等共 {added_total} 项</div>')
                     html_parts.append('</div>')
                 
                 # 删除文件
@@ -339,8 +369,9 @@ class MessageBuilder:
                         size_text = f['size_str'] if not f.get('is_dir', False) else "目录"
                         action_text = f" 💡{f['action']}" if f.get('action') else ""
                         html_parts.append(f'<div class="file-item"><span class="badge badge-remove">删除</span>{f["path"]} ({size_text}){action_text}</div>')
-                    if len(report['removed_files']) > 10:
-                        html_parts.append(f'<div class="file-item">... 等共 {len(report["removed_files"])} 项</div>')
+                    removed_total = max(report.get('removed_count') or 0, len(report['removed_files']))
+                    if removed_total > min(len(report['removed_files']), 10):
+                        html_parts.append(f'<div class="file-item">... 等共 {removed_total} 项</div>')
                     html_parts.append('</div>')
                 
                 # 修改文件
@@ -350,8 +381,21 @@ class MessageBuilder:
                         size_text = f['size_str'] if not f.get('is_dir', False) else "目录"
                         action_text = f" 💡{f['action']}" if f.get('action') else ""
                         html_parts.append(f'<div class="file-item"><span class="badge badge-modify">修改</span>{f["path"]} ({size_text}){action_text}</div>')
-                    if len(report['modified_files']) > 10:
-                        html_parts.append(f'<div class="file-item">... 等共 {len(report["modified_files"])} 项</div>')
+                    modified_total = max(report.get('modified_count') or 0, len(report['modified_files']))
+                    if modified_total > min(len(report['modified_files']), 10):
+                        html_parts.append(f'<div class="file-item">... 等共 {modified_total} 项</div>')
+                    html_parts.append('</div>')
+                
+                # 移动文件
+                if report.get('moved_files'):
+                    html_parts.append('<div class="file-list"><strong>🔀 移动文件:</strong>')
+                    for i, f in enumerate(report['moved_files'][:10]):
+                        size_text = f['size_str'] if not f.get('is_dir', False) else "目录"
+                        action_text = f" 💡{f['action']}" if f.get('action') else ""
+                        html_parts.append(f'<div class="file-item"><span class="badge badge-move">移动</span>{self._display_path(f)} ({size_text}){action_text}</div>')
+                    moved_total = max(report.get('moved_count') or 0, len(report['moved_files']))
+                    if moved_total > min(len(report['moved_files']), 10):
+                        html_parts.append(f'<div class="file-item">... 等共 {moved_total} 项</div>')
                     html_parts.append('</div>')
             
             if self.config.get('include_report_actions', True) and report.get('actions'):
@@ -409,6 +453,7 @@ class MessageBuilder:
             "gpu_info": training_info.get("gpu_info", ""),
             "detail": training_info.get("detail", ""),
         }
+        context.update(gpu_usage_context(training_info.get("gpu_usage")))
 
         report = training_info.get("report", {})
         if report:
@@ -16,6 +16,7 @@ import requests
 from core.notifier.base import BaseNotifier
 from core.notifier.message_builder import MessageBuilder
 from core.utils.anime_quote import get_anime_quote
+from core.utils.gpu import gpu_usage_context
 
 logger = logging.getLogger(__name__)
 
@@ -131,6 +132,7 @@ class WeComNotifier(BaseNotifier):
             "gpu_info": training_info.get("gpu_info", ""),
             "detail": training_info.get("detail", ""),
         }
+        context.update(gpu_usage_context(training_info.get("gpu_usage")))
 
         report = training_info.get("report", {})
         if report:
@@ -1,7 +1,7 @@
 # Utils Module
 """工具模块"""
 
-from core.utils.gpu import get_gpu_info, get_gpu_power_info
+from core.utils.gpu import get_gpu_info, get_gpu_power_info, GpuReading, NvmlBackend
 from core.utils.logger import setup_logger
 from core.utils.anime_quote import get_anime_quote, AnimeQuoteService
 from core.utils.time_parser import parse_time_to_seconds, format_seconds_to_time
@@ -9,6 +9,8 @@ from core.utils.time_parser import parse_time_to_seconds, format_seconds_to_time
 __all__ = [
     'get_gpu_info',
     'get_gpu_power_info',
+    'GpuReading',
+    'NvmlBackend',
     'setup_logger',
     'get_anime_quote',
     'AnimeQuoteService',
@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+"""
+操作建议匹配模块
+
+将 `check_directory_action_keywords` 编译为单个正则，一次遍历文件名即可找到
+优先级最高的命中操作，并按规范化文件名缓存结果。
+"""
+
+import re
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Pattern
+
+_DIGITS = re.compile(r"\d+")
+
+
+class ActionMatcher:
+    """
+    操作建议匹配器
+
+    语义与逐个关键词做小写子串匹配一致：按配置顺序，第一个有关键词出现在
+    文件名中的操作胜出。编译后的正则在每个位置用前瞻尝试全部关键词，
+    备选项按操作优先级排列，因此同一位置总是报告优先级最高的关键词。
+
+    Attributes:
+        actions (List[str]): 按优先级排列的操作名称
+    """
+
+    def __init__(self, action_keywords: Optional[Dict[str, Any]] = None, cache_size: int = 4096):
+        self.actions: List[str] = []
+        groups = []
+        has_digit = False
+        for action, keywords in (action_keywords or {}).items():
+            if isinstance(keywords, str):
+                keywords = [keywords]
+            if not isinstance(keywords, list):
+                continue
+            keywords = [k.lower() for k in keywords if isinstance(k, str)]
+            if not keywords:
+                continue
+            has_digit = has_digit or any(c.isdigit() for k in keywords for c in k)
+            # 长关键词在前，同一操作内的备选项顺序不影响结果
+            alternatives = "|".join(re.escape(k) for k in sorted(keywords, key=len, reverse=True))
+            groups.append(f"(?P<a{len(self.actions)}>{alternatives})")
+            self.actions.append(action)
+
+        self._regex: Optional[Pattern] = re.compile(f"(?=(?:{'|'.join(groups)}))") if groups else None
+        # 关键词不含数字时，数字串不影响匹配结果，可归一化以提高缓存命中率
+        self._fold_digits = not has_digit
+        self._lookup = lru_cache(maxsize=cache_size)(self._match)
+
+    def _match(self, name: str) -> str:
+        best = len(self.actions)
+        for m in self._regex.finditer(name):
+            index = int(m.lastgroup[1:])
+            if index < best:
+                best = index
+                if best == 0:
+                    break
+        return self.actions[best] if best < len(self.actions) else ""
+
+    def match(self, filename: str) -> str:
+        """
+        返回文件名对应的建议操作，无命中时返回空字符串
+
+        Args:
+            filename: 文件名
+        """
+        if self._regex is None:
+            return ""
+        name = filename.lower()
+        if self._fold_digits:
+            name = _DIGITS.sub("0", name)
+        return self._lookup(name)
+
+    def cache_info(self):
+        """返回缓存命中统计"""
+        return self._lookup.cache_info()
@@ -0,0 +1,220 @@
+# -*- coding: utf-8 -*-
+"""
+文件内容哈希工具
+
+提供分块 blake2b 哈希、按 (st_dev, st_ino, size, mtime_ns) 索引的持久化缓存，
+以及按 MB/s 限速的线程池批量哈希，避免扫描挤占训练任务的磁盘 I/O。
+"""
+
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 缓存键: (st_dev, st_ino, size, mtime_ns)
+HashKey = Tuple[int, int, int, int]
+
+CHUNK_SIZE = 1024 * 1024
+DIGEST_SIZE = 16
+
+
+class RateLimiter:
+    """
+    字节速率限制器
+
+    每次读取后按实际字节数预约时间片，多个线程共享同一预算。
+
+    Attributes:
+        bytes_per_sec (float): 每秒允许读取的字节数，<=0 表示不限速
+    """
+
+    def __init__(self, mb_per_sec: float = 0):
+        self.bytes_per_sec = float(mb_per_sec or 0) * 1024 * 1024
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def consume(self, nbytes: int):
+        """为 nbytes 字节的读取预约额度，必要时阻塞等待"""
+        if self.bytes_per_sec <= 0 or nbytes <= 0:
+            return
+        with self._lock:
+            now = time.monotonic()
+            start = max(self._next, now)
+            self._next = start + nbytes / self.bytes_per_sec
+        delay = start - now
+        if delay > 0:
+            time.sleep(delay)
+
+
+class HashCache:
+    """
+    内容哈希缓存
+
+    以 (st_dev, st_ino, size, mtime_ns) 为键，同时记录 ctime_ns：
+    保留 mtime 的重写会改变 ctime，此时缓存视为失效。
+
+    Attributes:
+        path (Optional[str]): 持久化文件路径，为空时仅保存在内存
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self._entries: Dict[HashKey, Tuple[int, str]] = {}
+        self._lock = threading.Lock()
+        self._dirty = False
+        if path:
+            self.load()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: HashKey, ctime_ns: int) -> Optional[str]:
+        """查询缓存，ctime 不一致时返回 None"""
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] == ctime_ns:
+            return entry[1]
+        return None
+
+    def put(self, key: HashKey, ctime_ns: int, digest: str):
+        """写入缓存"""
+        with self._lock:
+            self._entries[key] = (ctime_ns, digest)
+            self._dirty = True
+
+    def prune(self, live_keys: Iterable[HashKey]):
+        """只保留仍存在于快照中的条目"""
+        live = set(live_keys)
+        with self._lock:
+            stale = [k for k in self._entries if k not in live]
+            for k in stale:
+                del self._entries[k]
+            if stale:
+                self._dirty = True
+
+    def load(self):
+        """从磁盘加载缓存"""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            for dev, ino, size, mtime_ns, ctime_ns, digest in data.get('entries', []):
+                self._entries[(dev, ino, size, mtime_ns)] = (ctime_ns, digest)
+            logger.info(f"已加载哈希缓存 {len(self._entries)} 条: {self.path}")
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.warning(f"哈希缓存读取失败，将重新计算: {e}")
+            self._entries.clear()
+
+    def save(self):
+        """将缓存写回磁盘（仅在有变更时）"""
+        if not self.path or not self._dirty:
+            return
+        with self._lock:
+            entries = [[*key, ctime_ns, digest] for key, (ctime_ns, digest) in self._entries.items()]
+            self._dirty = False
+        tmp_path = self.path + '.tmp'
+        try:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'version': 1, 'entries': entries}, f)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            logger.error(f"保存哈希缓存失败: {e}")
+
+
+class ContentHasher:
+    """
+    批量内容哈希器
+
+    在线程池中对文件做分块 blake2b 哈希，命中缓存的文件不会被重新读取。
+
+    Attributes:
+        cache (HashCache): 哈希缓存
+        workers (int): 线程数
+        limiter (RateLimiter): 读取限速器
+    """
+
+    def __init__(self,
+                 cache: Optional[HashCache] = None,
+                 workers: int = 4,
+                 rate_limit_mb: float = 0,
+                 chunk_size: int = CHUNK_SIZE):
+        self.cache = cache if cache is not None else HashCache()
+        self.workers = max(1, int(workers or 1))
+        self.limiter = RateLimiter(rate_limit_mb)
+        self.chunk_size = chunk_size
+        self.bytes_read = 0
+        self._stats_lock = threading.Lock()
+
+    def hash_file(self, path: str) -> Optional[str]:
+        """
+        计算单个文件的 blake2b 摘要
+
+        Returns:
+            十六进制摘要，读取失败时返回 None
+        """
+        h = hashlib.blake2b(digest_size=DIGEST_SIZE)
+        try:
+            with open(path, 'rb') as f:
+                while True:
+                    chunk = f.read(self.chunk_size)
+                    if not chunk:
+                        break
+                    # 按实际读到的字节计费，小文件与末尾的空读取不占用整块额度
+                    self.limiter.consume(len(chunk))
+                    with self._stats_lock:
+                        self.bytes_read += len(chunk)
+                    h.update(chunk)
+        except OSError as e:
+            logger.debug(f"读取文件失败，跳过哈希: {path} ({e})")
+            return None
+        return h.hexdigest()
+
+    def hash_many(self, items: Iterable[Tuple[str, HashKey, int]]) -> Dict[str, Optional[str]]:
+        """
+        批量获取文件摘要
+
+        Args:
+            items: (绝对路径, 缓存键, ctime_ns) 序列
+
+        Returns:
+            绝对路径到摘要的映射
+        """
+        results: Dict[str, Optional[str]] = {}
+        pending = []
+        for path, key, ctime_ns in items:
+            cached = self.cache.get(key, ctime_ns)
+            if cached is not None:
+                results[path] = cached
+            else:
+                pending.append((path, key, ctime_ns))
+
+        if not pending:
+            return results
+        hits = len(results)
+
+        def work(item):
+            path, key, ctime_ns = item
+            digest = self.hash_file(path)
+            if digest is not None:
+                self.cache.put(key, ctime_ns, digest)
+            return path, digest
+
+        if len(pending) == 1 or self.workers == 1:
+            for item in pending:
+                path, digest = work(item)
+                results[path] = digest
+        else:
+            with ThreadPoolExecutor(max_workers=self.workers) as pool:
+                for path, digest in pool.map(work, pending):
+                    results[path] = digest
+        logger.debug(f"内容哈希: 缓存命中 {hits}, 读取 {len(pending)} 个文件")
+        return results
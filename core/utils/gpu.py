@@ -2,44 +2,798 @@
 """
 GPU 工具模块
 
-提供 GPU 信息获取相关的工具函数。
+提供 GPU 信息获取相关的工具函数。优先通过 NVML 在进程内读取
+（初始化一次并缓存设备句柄），不可用时回退到调用 nvidia-smi。
 """
 
+import time
+import atexit
 import subprocess
 import logging
-from typing import Dict, Optional
+import threading
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Deque, Dict, List, Optional, Tuple
 
 logger = logging.getLogger(__name__)
 
 
+@dataclass
+class GpuReading:
+    """单块 GPU 的一次读数，读取失败的字段为 None"""
+    index: int
+    name: str = ""
+    power_w: Optional[float] = None
+    util_percent: Optional[float] = None
+    memory_used_mb: Optional[float] = None
+    memory_total_mb: Optional[float] = None
+    temperature_c: Optional[float] = None
+
+
+@dataclass
+class GpuProcess:
+    """占用 GPU 的一个计算进程，同一进程使用多块 GPU 时每块各一条"""
+    pid: int
+    gpu_index: int
+    name: str = ""
+    used_memory_mb: Optional[float] = None
+
+
+class _Integral:
+    """
+    对不规则采样的时间序列做梯形积分，只保存常数个累加量
+    """
+
+    __slots__ = ('area', 'span', 'count', 'peak', 'last_ts', 'last_value')
+
+    def __init__(self):
+        self.area = 0.0
+        self.span = 0.0
+        self.count = 0
+        self.peak: Optional[float] = None
+        self.last_ts: Optional[float] = None
+        self.last_value: Optional[float] = None
+
+    def add(self, value: Optional[float], ts: float):
+        if value is None:
+            return
+        if self.last_ts is not None and ts > self.last_ts:
+            dt = ts - self.last_ts
+            self.area += (self.last_value + value) / 2 * dt
+            self.span += dt
+        self.last_ts, self.last_value = ts, value
+        self.count += 1
+        if self.peak is None or value > self.peak:
+            self.peak = value
+
+    @property
+    def mean(self) -> Optional[float]:
+        """按时间加权的均值，只有一个采样时为该采样值"""
+        if self.span > 0:
+            return self.area / self.span
+        return self.last_value
+
+    @property
+    def covered(self) -> bool:
+        """是否至少有两个采样且跨越了一段时间，否则积分与均值没有意义"""
+        return self.count >= 2 and self.span > 0
+
+
+class GpuUsageMeter:
+    """
+    整个任务期间的 GPU 用量统计
+
+    每块 GPU 只维护几个累加量（能耗积分、利用率时间加权和、显存峰值），
+    每个采样 O(1) 更新，不保存历史采样。
+    """
+
+    def __init__(self):
+        self._power: Dict[int, _Integral] = {}
+        self._util: Dict[int, _Integral] = {}
+        self._memory: Dict[int, _Integral] = {}
+        self._lock = threading.Lock()
+
+    def add(self, readings: List[GpuReading], ts: Optional[float] = None):
+        """累加一轮读数"""
+        ts = time.monotonic() if ts is None else ts
+        with self._lock:
+            for r in readings:
+                self._power.setdefault(r.index, _Integral()).add(r.power_w, ts)
+                self._util.setdefault(r.index, _Integral()).add(r.util_percent, ts)
+                self._memory.setdefault(r.index, _Integral()).add(r.memory_used_mb, ts)
+
+    def snapshot(self) -> Dict[int, Dict[str, Optional[float]]]:
+        """
+        获取各 GPU 的统计结果
+
+        只有一个采样（或采样没有跨越时间）的指标为 None，
+        避免把单次读数当作整段任务的能耗、均值与峰值。
+
+        Returns:
+            GPU 编号 -> {energy_kwh, avg_power_w, avg_util_percent, peak_memory_mb, seconds}
+        """
+        with self._lock:
+            result = {}
+            for index in sorted(self._power):
+                power, util, memory = self._power[index], self._util[index], self._memory[index]
+                result[index] = {
+                    "energy_kwh": power.area / 3.6e6 if power.covered else None,
+                    "avg_power_w": power.mean if power.covered else None,
+                    "avg_util_percent": util.mean if util.covered else None,
+                    "peak_memory_mb": memory.peak if memory.covered else None,
+                    "seconds": max(power.span, util.span, memory.span),
+                }
+            return result
+
+    def reset(self):
+        """开始新一轮统计"""
+        with self._lock:
+            self._power.clear()
+            self._util.clear()
+            self._memory.clear()
+
+
+class NvmlBackend:
+    """
+    NVML 采样后端
+
+    首次使用时导入 pynvml 并初始化，之后复用设备句柄，每次读取都是进程内调用，
+    不再派生 nvidia-smi 子进程。初始化失败（未安装 pynvml、无驱动或无显卡）后
+    不再重试；读取过程中出错则丢弃句柄，下次重新初始化。
+
+    Attributes:
+        enabled (bool): 是否允许使用 NVML
+    """
+
+    def __init__(self, module: Any = None, enabled: bool = True):
+        """
+        Args:
+            module: NVML 模块对象，默认延迟导入 pynvml（测试时可传入替身）
+            enabled: 为 False 时始终视为不可用
+        """
+        self.enabled = enabled
+        self._module = module
+        self._handles: Optional[List[Any]] = None
+        self._failed = False
+        self._lock = threading.Lock()
+
+    def _ensure_initialized(self) -> bool:
+        if self._handles is not None:
+            return True
+        if not self.enabled or self._failed:
+            return False
+        try:
+            if self._module is None:
+                import pynvml
+                self._module = pynvml
+            nvml = self._module
+            nvml.nvmlInit()
+            count = nvml.nvmlDeviceGetCount()
+            self._handles = [nvml.nvmlDeviceGetHandleByIndex(i) for i in range(count)]
+            logger.info(f"NVML 已初始化，检测到 {count} 块 GPU")
+            return True
+        except Exception as e:
+            self._failed = True
+            logger.debug(f"NVML 不可用，回退到 nvidia-smi: {e}")
+            return False
+
+    @property
+    def available(self) -> bool:
+        """NVML 是否可用（必要时触发初始化）"""
+        with self._lock:
+            return self._ensure_initialized()
+
+    def read(self) -> Optional[List[GpuReading]]:
+        """
+        读取所有 GPU 的功耗、利用率、显存与温度
+
+        Returns:
+            读数列表，NVML 不可用或读取失败时返回 None
+        """
+        with self._lock:
+            if not self._ensure_initialized():
+                return None
+            nvml = self._module
+            try:
+                return [self._read_device(nvml, i, h) for i, h in enumerate(self._handles)]
+            except Exception as e:
+                logger.warning(f"NVML 读取失败，下次重新初始化: {e}")
+                self._handles = None
+                return None
+
+    def read_processes(self) -> Optional[List[GpuProcess]]:
+        """
+        读取所有 GPU 上的计算进程
+
+        Returns:
+            进程列表，NVML 不可用或读取失败时返回 None
+        """
+        with self._lock:
+            if not self._ensure_initialized():
+                return None
+            nvml = self._module
+            try:
+                processes = []
+                for index, handle in enumerate(self._handles):
+                    for info in nvml.nvmlDeviceGetComputeRunningProcesses(handle):
+                        try:
+                            name = nvml.nvmlSystemGetProcessName(info.pid)
+                        except nvml.NVMLError:
+                            name = ""
+                        if isinstance(name, bytes):
+                            name = name.decode('utf-8', 'replace')
+                        # 容器内等场景下驱动可能拿不到显存占用，此时为 None
+                        memory = getattr(info, 'usedGpuMemory', None)
+                        processes.append(GpuProcess(
+                            pid=int(info.pid),
+                            gpu_index=index,
+                            name=name,
+                            used_memory_mb=memory / (1024 * 1024) if memory is not None else None,
+                        ))
+                return processes
+            except Exception as e:
+                logger.warning(f"NVML 读取进程失败，下次重新初始化: {e}")
+                self._handles = None
+                return None
+
+    @staticmethod
+    def _read_device(nvml: Any, index: int, handle: Any) -> GpuReading:
+        """读取单块 GPU，不支持的字段保留为 None"""
+        def field(fn):
+            try:
+                return fn()
+            except nvml.NVMLError:
+                return None
+
+        name = nvml.nvmlDeviceGetName(handle)
+        if isinstance(name, bytes):
+            name = name.decode('utf-8', 'replace')
+        power = field(lambda: nvml.nvmlDeviceGetPowerUsage(handle))
+        util = field(lambda: nvml.nvmlDeviceGetUtilizationRates(handle))
+        memory = field(lambda: nvml.nvmlDeviceGetMemoryInfo(handle))
+        temp = field(lambda: nvml.nvmlDeviceGetTemperature(handle, nvml.NVML_TEMPERATURE_GPU))
+        return GpuReading(
+            index=index,
+            name=name,
+            power_w=power / 1000.0 if power is not None else None,
+            util_percent=float(util.gpu) if util is not None else None,
+            memory_used_mb=memory.used / (1024 * 1024) if memory is not None else None,
+            memory_total_mb=memory.total / (1024 * 1024) if memory is not None else None,
+            temperature_c=float(temp) if temp is not None else None,
+        )
+
+    def shutdown(self):
+        """释放 NVML"""
+        with self._lock:
+            if self._handles is not None:
+                try:
+                    self._module.nvmlShutdown()
+                except Exception:
+                    pass
+            self._handles = None
+
+
+_nvml_backend = NvmlBackend()
+
+
+def get_nvml_backend() -> NvmlBackend:
+    """获取进程内共享的 NVML 后端"""
+    return _nvml_backend
+
+
+def set_nvml_backend(backend: NvmlBackend) -> NvmlBackend:
+    """
+    替换共享的 NVML 后端（用于测试或禁用 NVML）
+
+    Returns:
+        原来的后端
+    """
+    global _nvml_backend
+    previous, _nvml_backend = _nvml_backend, backend
+    return previous
+
+
+# nvidia-smi 查询字段与 GpuReading 属性的对应关系；
+# 监控路径把 index、power.draw 放在最前，便于只关心功耗的调用方
+SMI_FIELDS = {
+    "index": "index",
+    "power.draw": "power_w",
+    "name": "name",
+    "memory.used": "memory_used_mb",
+    "memory.total": "memory_total_mb",
+    "temperature.gpu": "temperature_c",
+    "utilization.gpu": "util_percent",
+}
+SAMPLE_QUERY = list(SMI_FIELDS)
+
+
+# 单次 nvidia-smi 调用的超时（秒），避免驱动卡死时阻塞监控循环
+SMI_TIMEOUT = 10
+
+
+def parse_smi_line(fields: List[str], line: str) -> Optional[GpuReading]:
+    """
+    按查询字段顺序解析一行 nvidia-smi CSV 输出
+
+    缺失或非数值（如 `[N/A]`）的列为 None；无法解析出 GPU 编号时返回 None。
+    """
+    parts = [x.strip() for x in line.split(',')]
+    if len(parts) < 2:
+        return None
+    values = {}
+    for field_name, raw in zip(fields, parts):
+        attr = SMI_FIELDS[field_name]
+        if attr == "name":
+            values[attr] = raw
+            continue
+        try:
+            values[attr] = float(raw)
+        except ValueError:
+            values[attr] = None
+    if values.get("index") is None:
+        return None
+    values["index"] = int(values["index"])
+    return GpuReading(**values)
+
+
+def query_nvidia_smi(fields: List[str]) -> List[GpuReading]:
+    """
+    调用一次 nvidia-smi 查询指定字段
+
+    Raises:
+        subprocess.SubprocessError, FileNotFoundError: nvidia-smi 不可用或超时
+    """
+    output = subprocess.check_output(
+        ['nvidia-smi', f"--query-gpu={','.join(fields)}", '--format=csv,noheader,nounits'],
+        universal_newlines=True,
+        timeout=SMI_TIMEOUT
+    )
+    readings = []
+    for line in output.strip().split('\n'):
+        reading = parse_smi_line(fields, line)
+        if reading is not None:
+            readings.append(reading)
+    return readings
+
+
+def query_gpu_uuids() -> Dict[str, int]:
+    """
+    查询 GPU UUID 到编号的映射（--query-compute-apps 只给出 UUID）
+
+    Raises:
+        subprocess.SubprocessError, FileNotFoundError: nvidia-smi 不可用或超时
+    """
+    output = subprocess.check_output(
+        ['nvidia-smi', '--query-gpu=index,uuid', '--format=csv,noheader,nounits'],
+        universal_newlines=True,
+        timeout=SMI_TIMEOUT
+    )
+    uuids = {}
+    for line in output.strip().split('\n'):
+        parts = [p.strip() for p in line.split(',')]
+        if len(parts) == 2 and parts[0].isdigit():
+            uuids[parts[1]] = int(parts[0])
+    return uuids
+
+
+def query_compute_apps(uuids: Dict[str, int]) -> List[GpuProcess]:
+    """
+    调用一次 nvidia-smi 查询所有 GPU 上的计算进程
+
+    Args:
+        uuids: GPU UUID 到编号的映射
+
+    Raises:
+        subprocess.SubprocessError, FileNotFoundError: nvidia-smi 不可用或超时
+    """
+    output = subprocess.check_output(
+        ['nvidia-smi', '--query-compute-apps=pid,process_name,gpu_uuid,used_memory',
+         '--format=csv,noheader,nounits'],
+        universal_newlines=True,
+        timeout=SMI_TIMEOUT
+    )
+    processes = []
+    for line in output.strip().split('\n'):
+        parts = [p.strip() for p in line.split(',')]
+        # 进程名中可能含逗号，按首尾字段定位
+        if len(parts) < 4 or not parts[0].isdigit() or parts[-2] not in uuids:
+            continue
+        try:
+            memory = float(parts[-1])
+        except ValueError:
+            memory = None
+        processes.append(GpuProcess(
+            pid=int(parts[0]),
+            gpu_index=uuids[parts[-2]],
+            name=", ".join(parts[1:-2]),
+            used_memory_mb=memory,
+        ))
+    return processes
+
+
+class SmiStreamSampler:
+    """
+    nvidia-smi 流式采样器
+
+    保持一个 `nvidia-smi --loop-ms` 子进程常驻，由后台线程解析其持续输出的 CSV，
+    每轮所有 GPU 的读数作为一个采样放入有界缓冲区。子进程退出或超过看门狗时限
+    没有任何输出（驱动卡死）时，在下一次读取时终止并按指数退避重启。
+
+    Attributes:
+        interval_ms (int): 采样间隔（毫秒）
+        samples (Deque): 最近的采样 (单调时间, 读数列表)
+        watchdog_timeout (float): 无输出多少秒视为卡死
+        restarts (int): 已重启次数
+        available (bool): nvidia-smi 是否可以启动
+    """
+
+    def __init__(self,
+                 fields: Optional[List[str]] = None,
+                 interval_ms: int = 1000,
+                 buffer_size: int = 120,
+                 watchdog_timeout: Optional[float] = None,
+                 popen: Any = None):
+        self.fields = list(fields or SAMPLE_QUERY)
+        self.interval_ms = max(100, int(interval_ms))
+        self.samples: Deque[Tuple[float, List[GpuReading]]] = deque(maxlen=max(1, buffer_size))
+        self.watchdog_timeout = watchdog_timeout or max(5.0, self.interval_ms / 1000 * 5)
+        self.restarts = 0
+        self.available = True
+        self._popen = popen or subprocess.Popen
+        self._proc = None
+        self._thread: Optional[threading.Thread] = None
+        self._last_output = 0.0
+        self._next_start = 0.0
+        self._lock = threading.Lock()
+
+    def _start(self):
+        """启动子进程与读取线程"""
+        cmd = ['nvidia-smi', f"--query-gpu={','.join(self.fields)}",
+               '--format=csv,noheader,nounits', f'--loop-ms={self.interval_ms}']
+        try:
+            proc = self._popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                               universal_newlines=True, bufsize=1)
+        except (OSError, ValueError) as e:
+            self.available = False
+            logger.debug(f"无法启动 nvidia-smi 流式采样: {e}")
+            return
+        self._proc = proc
+        self._last_output = time.monotonic()
+        self._thread = threading.Thread(target=self._reader, args=(proc,),
+                                        name="nvidia-smi-reader", daemon=True)
+        self._thread.start()
+        logger.info(f"已启动 nvidia-smi 流式采样（间隔 {self.interval_ms}ms）")
+
+    def _reader(self, proc):
+        """读取子进程输出，按轮次组装采样，直到子进程退出"""
+        current: Dict[int, GpuReading] = {}
+        gpu_count: Optional[int] = None
+        try:
+            for line in proc.stdout:
+                self._last_output = time.monotonic()
+                reading = parse_smi_line(self.fields, line)
+                if reading is None:
+                    continue
+                if reading.index in current:
+                    # 编号重复说明新一轮开始，由此得到 GPU 数量
+                    gpu_count = len(current)
+                    self._push(current)
+                    current = {}
+                current[reading.index] = reading
+                if gpu_count is not None and len(current) >= gpu_count:
+                    self._push(current)
+                    current = {}
+        except (OSError, ValueError):
+            pass
+
+    def _push(self, current: Dict[int, GpuReading]):
+        self.samples.append((time.monotonic(), [current[i] for i in sorted(current)]))
+
+    def ensure_running(self) -> bool:
+        """检查子进程状态，必要时（按退避间隔）重启"""
+        with self._lock:
+            if not self.available:
+                return False
+            now = time.monotonic()
+            proc = self._proc
+            if proc is not None:
+                if proc.poll() is None:
+                    if now - self._last_output <= self.watchdog_timeout:
+                        return True
+                    logger.warning(f"nvidia-smi 超过 {self.watchdog_timeout:g} 秒无输出，重启采样进程")
+                    self._kill(proc)
+                else:
+                    logger.warning("nvidia-smi 流式采样进程已退出，准备重启")
+                self._proc = None
+                self.restarts += 1
+            if now < self._next_start:
+                return False
+            self._next_start = now + min(60, 2 ** min(self.restarts, 6))
+            self._start()
+            return self._proc is not None
+
+    def latest(self, max_age: Optional[float] = None) -> Optional[List[GpuReading]]:
+        """
+        获取最近一轮读数
+
+        Args:
+            max_age: 可接受的最大采样年龄（秒），默认两个采样间隔再加 1 秒
+
+        Returns:
+            读数列表，子进程未就绪或采样过旧时返回 None
+        """
+        if not self.ensure_running() or not self.samples:
+            return None
+        timestamp, readings = self.samples[-1]
+        if max_age is None:
+            max_age = self.interval_ms / 1000 * 2 + 1
+        if time.monotonic() - timestamp > max_age:
+            return None
+        return readings
+
+    @staticmethod
+    def _kill(proc):
+        try:
+            proc.kill()
+            proc.wait(timeout=1)
+        except Exception:
+            pass
+
+    def stop(self):
+        """终止子进程"""
+        with self._lock:
+            if self._proc is not None:
+                self._kill(self._proc)
+                self._proc = None
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+            self._thread = None
+
+
+class GpuSampler:
+    """
+    进程内共享的 GPU 采样器
+
+    同一轮检查中，监控器判断触发条件时的读数会被缓存，发送通知时在 TTL 内
+    直接复用，保证一次检查最多查询一次硬件，且通知展示的正是触发时的读数。
+
+    Attributes:
+        ttl (float): 缓存有效期（秒）
+    """
+
+    def __init__(self, ttl: float = 5.0, allow_stream: bool = True, backend: Optional["NvmlBackend"] = None):
+        """
+        Args:
+            ttl: 缓存有效期（秒）
+            allow_stream: 是否允许启用 nvidia-smi 流式采样
+            backend: 专用的采样后端（如采样回放），默认使用共享的 NVML 后端
+        """
+        self.ttl = ttl
+        self.allow_stream = allow_stream
+        self._backend = backend
+        self.stream: Optional[SmiStreamSampler] = None
+        self._readings: Optional[List[GpuReading]] = None
+        self._timestamp = 0.0
+        self._uuids: Optional[Dict[str, int]] = None
+        self._lock = threading.Lock()
+        self._atexit_registered = False
+        self.usage = GpuUsageMeter()
+    
+    @property
+    def backend(self) -> "NvmlBackend":
+        """当前使用的采样后端"""
+        return self._backend if self._backend is not None else _nvml_backend
+
+    def enable_stream(self, interval_ms: int = 1000):
+        """
+        启用 nvidia-smi 流式采样（仅在 NVML 不可用、首次需要读数时才启动子进程）
+        """
+        if not self.allow_stream:
+            return
+        if self.stream is not None and self.stream.interval_ms == max(100, int(interval_ms)):
+            return
+        if self.stream is not None:
+            self.stream.stop()
+        self.stream = SmiStreamSampler(interval_ms=interval_ms)
+        # 重新启用（如持续模式重启）时只替换流，退出钩子只注册一次
+        if not self._atexit_registered:
+            atexit.register(self._stop_stream)
+            self._atexit_registered = True
+    
+    def _stop_stream(self):
+        """进程退出时停止当前的流式采样子进程"""
+        if self.stream is not None:
+            self.stream.stop()
+
+    def refresh(self) -> List[GpuReading]:
+        """
+        立即查询硬件并更新缓存：优先 NVML，其次流式采样的最新一轮，
+        都不可用时调用一次 nvidia-smi
+
+        Raises:
+            subprocess.SubprocessError, FileNotFoundError: 两种方式都不可用
+        """
+        readings = self.backend.read()
+        if readings is None and self.stream is not None:
+            readings = self.stream.latest()
+        if readings is None:
+            readings = query_nvidia_smi(SAMPLE_QUERY)
+        self.publish(readings)
+        return readings
+
+    def collect(self, since: float = 0.0) -> List[Tuple[float, List[GpuReading]]]:
+        """
+        获取某时刻之后的全部新采样，供时间序列使用
+
+        流式采样可用时返回缓冲区中 since 之后的每一轮读数（可能为空，
+        表示尚无新数据）；否则立即查询一次。
+
+        Args:
+            since: 上次收集到的最后一个采样的单调时间
+
+        Returns:
+            (单调时间, 读数列表) 序列，按时间顺序
+
+        Raises:
+            subprocess.SubprocessError, FileNotFoundError: 硬件不可查询
+        """
+        if self.stream is not None and not self.backend.available:
+            latest = self.stream.latest()
+            if latest is not None:
+                self.publish(latest)
+                return [(ts, readings) for ts, readings in list(self.stream.samples) if ts > since]
+        readings = self.refresh()
+        return [(time.monotonic(), readings)]
+    
+    def refresh_processes(self) -> List[GpuProcess]:
+        """
+        立即查询 GPU 计算进程：优先 NVML，不可用时调用 nvidia-smi
+        （GPU UUID 映射只查询一次）。进程跟踪每轮都需要最新列表，不做缓存
+
+        Raises:
+            subprocess.SubprocessError, FileNotFoundError: 两种方式都不可用
+        """
+        processes = self.backend.read_processes()
+        if processes is None:
+            if self._uuids is None:
+                self._uuids = query_gpu_uuids()
+            processes = query_compute_apps(self._uuids)
+        return processes
+
+    def publish(self, readings: List[GpuReading]):
+        """写入一次读数，并计入任务期间的用量统计"""
+        with self._lock:
+            # 流式采样在两轮输出之间返回同一个列表对象，不重复计入
+            is_new = readings is not self._readings
+            self._readings = readings
+            self._timestamp = time.monotonic()
+        if is_new:
+            self.usage.add(readings, self._timestamp)
+
+    def latest(self, max_age: Optional[float] = None) -> Optional[List[GpuReading]]:
+        """
+        获取缓存的读数
+
+        Args:
+            max_age: 最大可接受的缓存年龄（秒），默认使用 ttl
+
+        Returns:
+            未过期的读数，没有时返回 None
+        """
+        max_age = self.ttl if max_age is None else max_age
+        with self._lock:
+            if self._readings is None or time.monotonic() - self._timestamp > max_age:
+                return None
+            return self._readings
+
+    def get(self) -> List[GpuReading]:
+        """优先返回缓存读数，过期时重新查询"""
+        readings = self.latest()
+        return readings if readings is not None else self.refresh()
+
+    def clear(self):
+        """清空缓存"""
+        with self._lock:
+            self._readings = None
+            self._timestamp = 0.0
+
+
+_gpu_sampler = GpuSampler()
+
+
+def get_gpu_sampler() -> GpuSampler:
+    """获取进程内共享的 GPU 采样器"""
+    return _gpu_sampler
+
+
+def set_gpu_sampler(sampler: GpuSampler) -> GpuSampler:
+    """
+    替换共享的 GPU 采样器（用于测试）
+
+    Returns:
+        原来的采样器
+    """
+    global _gpu_sampler
+    previous, _gpu_sampler = _gpu_sampler, sampler
+    return previous
+
+
+def _format_number(value: Optional[float]) -> str:
+    """按 nvidia-smi 的风格输出数值"""
+    if value is None:
+        return "N/A"
+    return f"{value:.2f}" if value != int(value) else f"{int(value)}"
+
+
+def _format_gpu_readings(readings: List[GpuReading]) -> str:
+    """格式化 GPU 读数"""
+    formatted_info = []
+    for r in readings:
+        gpu_info = f"GPU {r.index} ({r.name}):\n"
+        gpu_info += f"- 功耗: {_format_number(r.power_w)}W\n"
+        gpu_info += f"- 温度: {_format_number(r.temperature_c)}°C\n"
+        mem_used = round(r.memory_used_mb) if r.memory_used_mb is not None else None
+        mem_total = round(r.memory_total_mb) if r.memory_total_mb is not None else None
+        gpu_info += f"- 显存: {_format_number(mem_used)}/{_format_number(mem_total)}MB"
+        formatted_info.append(gpu_info)
+    return "\n".join(formatted_info) if formatted_info else "无法解析GPU信息"
+
+
+def gpu_usage_context(usage: Optional[Dict[int, Dict[str, Optional[float]]]]) -> Dict[str, str]:
+    """
+    把用量统计转换为通知模板变量，没有采样时各变量为空字符串
+
+    Args:
+        usage: GpuUsageMeter.snapshot() 的结果
+    """
+    usage = usage or {}
+    energy = [u["energy_kwh"] for u in usage.values() if u.get("energy_kwh") is not None]
+    power = [u["avg_power_w"] for u in usage.values() if u.get("avg_power_w") is not None]
+    util = [u["avg_util_percent"] for u in usage.values() if u.get("avg_util_percent") is not None]
+    memory = [u["peak_memory_mb"] for u in usage.values() if u.get("peak_memory_mb") is not None]
+
+    lines = []
+    for index, u in usage.items():
+        parts = []
+        if u.get("energy_kwh") is not None:
+            parts.append(f"能耗 {u['energy_kwh']:.3f} kWh")
+        if u.get("avg_util_percent") is not None:
+            parts.append(f"平均利用率 {u['avg_util_percent']:.1f}%")
+        if u.get("peak_memory_mb") is not None:
+            parts.append(f"显存峰值 {round(u['peak_memory_mb'])}MB")
+        if parts:
+            lines.append(f"GPU {index}: " + ", ".join(parts))
+
+    return {
+        "gpu_energy_kwh": f"{sum(energy):.3f}" if energy else "",
+        "gpu_avg_power": f"{sum(power):.1f}" if power else "",
+        "gpu_avg_util": f"{sum(util) / len(util):.1f}" if util else "",
+        "gpu_peak_memory": f"{round(max(memory))}" if memory else "",
+        "gpu_usage": "\n".join(lines),
+    }
+
+
 def get_gpu_info() -> str:
     """
     获取 GPU 详细信息
     
+    TTL 内有完整的缓存读数（如刚触发 GPU 监控）时直接复用，不再查询硬件。
+    
     Returns:
         str: 格式化的 GPU 信息描述
     """
+    readings = _gpu_sampler.latest()
+    if readings and all(r.name for r in readings):
+        return _format_gpu_readings(readings)
     try:
-        output = subprocess.check_output(
-            ['nvidia-smi', '--query-gpu=index,name,memory.used,memory.total,power.draw,temperature.gpu', 
-             '--format=csv,noheader,nounits'],
-            universal_newlines=True
-        )
-        
-        gpu_list = output.strip().split('\n')
-        formatted_info = []
-        
-        for gpu in gpu_list:
-            parts = [x.strip() for x in gpu.split(',')]
-            if len(parts) >= 6:
-                idx, name, mem_used, mem_total, power, temp = parts[:6]
-                gpu_info = f"GPU {idx} ({name}):\n"
-                gpu_info += f"- 功耗: {power}W\n"
-                gpu_info += f"- 温度: {temp}°C\n"
-                gpu_info += f"- 显存: {mem_used}/{mem_total}MB"
-                formatted_info.append(gpu_info)
-        
-        return "\n".join(formatted_info) if formatted_info else "无法解析GPU信息"
+        readings = _nvml_backend.read()
+        if readings is None:
+            readings = query_nvidia_smi(
+                ['index', 'name', 'memory.used', 'memory.total', 'power.draw', 'temperature.gpu']
+            )
+        if readings:
+            _gpu_sampler.publish(readings)
+        return _format_gpu_readings(readings)
         
     except (subprocess.SubprocessError, FileNotFoundError):
         return "未检测到NVIDIA显卡或nvidia-smi不可用"
@@ -56,18 +810,8 @@ def get_gpu_power_info() -> Optional[Dict[int, float]]:
         Dict[int, float]: GPU ID 到功耗的映射，如果获取失败则返回 None
     """
     try:
-        output = subprocess.check_output(
-            ['nvidia-smi', '--query-gpu=index,power.draw', '--format=csv,noheader,nounits'],
-            universal_newlines=True
-        )
-        
-        gpu_power_info = {}
-        for line in output.strip().split('\n'):
-            if ',' in line:
-                idx, power = line.split(',')
-                gpu_power_info[int(idx.strip())] = float(power.strip())
-        
-        return gpu_power_info
+        readings = _gpu_sampler.refresh()
+        return {r.index: r.power_w for r in readings if r.power_w is not None}
         
     except (subprocess.SubprocessError, FileNotFoundError):
         logger.warning("未检测到NVIDIA显卡或nvidia-smi不可用")
@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+"""
+GPU 组合条件模块
+
+将 `check_gpu_conditions` 中的表达式（如 "util < 5% and memory < 1GB"）
+在加载配置时编译一次，之后每次检查只需对同一批读数逐条比较。
+"""
+
+import re
+import operator
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Union
+
+from core.utils.gpu import GpuReading
+
+# 指标别名 -> GpuReading 属性
+METRIC_ALIASES: Dict[str, str] = {
+    "power": "power_w",
+    "power.draw": "power_w",
+    "util": "util_percent",
+    "utilization": "util_percent",
+    "utilization.gpu": "util_percent",
+    "memory": "memory_used_mb",
+    "mem": "memory_used_mb",
+    "memory.used": "memory_used_mb",
+    "temp": "temperature_c",
+    "temperature": "temperature_c",
+    "temperature.gpu": "temperature_c",
+}
+
+# 各属性在描述中使用的单位
+METRIC_UNITS: Dict[str, str] = {
+    "power_w": "W",
+    "util_percent": "%",
+    "memory_used_mb": "MB",
+    "temperature_c": "°C",
+}
+
+# 各属性在描述中使用的名称
+METRIC_LABELS: Dict[str, str] = {
+    "power_w": "功耗",
+    "util_percent": "利用率",
+    "memory_used_mb": "显存",
+    "temperature_c": "温度",
+}
+
+# 数值单位 -> 换算到属性单位的倍数（显存以 MB 计）
+_UNIT_SCALE: Dict[str, float] = {
+    "": 1.0, "w": 1.0, "%": 1.0, "c": 1.0, "°c": 1.0,
+    "mb": 1.0, "mib": 1.0, "gb": 1024.0, "gib": 1024.0,
+}
+
+_OPERATORS: Dict[str, Callable[[float, float], bool]] = {
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+    "==": operator.eq,
+    "!=": operator.ne,
+}
+
+_CLAUSE = re.compile(
+    r"^\s*(?P<metric>[a-z_.]+)\s*(?P<op><=|>=|==|!=|<|>)\s*"
+    r"(?P<value>-?\d+(?:\.\d+)?)\s*(?P<unit>%|°?c|w|[mg]i?b)?\s*$",
+    re.IGNORECASE,
+)
+_AND = re.compile(r"\s+and\s+|\s*&&\s*", re.IGNORECASE)
+
+
+@dataclass(frozen=True)
+class GpuCondition:
+    """单个比较条件，value 已换算为属性单位"""
+    attr: str
+    op: str
+    value: float
+
+    def evaluate(self, reading: GpuReading) -> bool:
+        """读数缺少该指标时视为不满足"""
+        current = getattr(reading, self.attr, None)
+        return current is not None and _OPERATORS[self.op](current, self.value)
+
+    def describe(self) -> str:
+        return f"{METRIC_LABELS[self.attr]} {self.op} {self.value:g}{METRIC_UNITS[self.attr]}"
+
+
+class GpuRule:
+    """
+    编译后的组合条件，所有条件同时满足（AND）才算满足
+
+    Attributes:
+        conditions (List[GpuCondition]): 条件列表
+    """
+
+    def __init__(self, conditions: List[GpuCondition]):
+        self.conditions = conditions
+
+    @property
+    def attrs(self) -> List[str]:
+        """条件涉及的读数属性（去重，保持顺序）"""
+        return list(dict.fromkeys(c.attr for c in self.conditions))
+
+    def matches(self, reading: GpuReading) -> bool:
+        return all(c.evaluate(reading) for c in self.conditions)
+
+    def failed(self, reading: GpuReading) -> Optional[GpuCondition]:
+        """返回第一个不满足的条件，全部满足时返回 None"""
+        for condition in self.conditions:
+            if not condition.evaluate(reading):
+                return condition
+        return None
+
+    def describe(self) -> str:
+        return " and ".join(c.describe() for c in self.conditions)
+
+
+def format_metric(attr: str, value: Optional[float]) -> str:
+    """格式化单个指标值，如 利用率 3.0%"""
+    if value is None:
+        return f"{METRIC_LABELS[attr]} N/A"
+    return f"{METRIC_LABELS[attr]} {value:.1f}{METRIC_UNITS[attr]}"
+
+
+def _compile_clause(text: str) -> GpuCondition:
+    m = _CLAUSE.match(text)
+    if not m:
+        raise ValueError(f"无法解析的GPU条件: {text!r}")
+    metric = m.group("metric").lower()
+    attr = METRIC_ALIASES.get(metric)
+    if attr is None:
+        raise ValueError(f"未知的GPU指标: {m.group('metric')!r}，可用: {', '.join(sorted(METRIC_ALIASES))}")
+    unit = (m.group("unit") or "").lower()
+    if unit in ("gb", "gib", "mb", "mib") and attr != "memory_used_mb":
+        raise ValueError(f"单位 {m.group('unit')} 只能用于显存条件: {text!r}")
+    return GpuCondition(attr, m.group("op"), float(m.group("value")) * _UNIT_SCALE[unit])
+
+
+def compile_gpu_rule(spec: Union[str, List[str]]) -> GpuRule:
+    """
+    编译组合条件
+
+    Args:
+        spec: 以 and / && 连接的表达式字符串，或表达式列表（各项之间同样为 AND）
+
+    Raises:
+        ValueError: 表达式无法解析
+    """
+    items = [spec] if isinstance(spec, str) else list(spec or [])
+    conditions = []
+    for item in items:
+        for clause in _AND.split(str(item)):
+            if clause.strip():
+                conditions.append(_compile_clause(clause))
+    if not conditions:
+        raise ValueError("GPU条件为空")
+    return GpuRule(conditions)
@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+"""
+GPU 时间序列模块
+
+为每块 GPU 维护固定容量的环形缓冲区（标准库 array 存储），
+提供窗口均值、分位数与指数滑动平均（EWMA）等统计量。
+"""
+
+import math
+from array import array
+from typing import Dict, Iterable, List, Optional
+
+# 支持的窗口统计量
+WINDOW_STATS = ("mean", "p95", "ewma", "max", "min")
+
+
+class RingBuffer:
+    """
+    定长浮点环形缓冲区
+
+    写入 O(1)，同时维护滑动和，窗口均值无需遍历。
+
+    Attributes:
+        capacity (int): 容量
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = max(1, int(capacity))
+        self._data = array('d', bytes(8 * self.capacity))
+        self._head = 0
+        self._count = 0
+        self._sum = 0.0
+
+    def __len__(self) -> int:
+        return self._count
+
+    @property
+    def full(self) -> bool:
+        """窗口是否已填满"""
+        return self._count >= self.capacity
+
+    def push(self, value: float):
+        """写入一个值，已满时覆盖最旧的值"""
+        if self._count >= self.capacity:
+            self._sum -= self._data[self._head]
+        else:
+            self._count += 1
+        self._data[self._head] = value
+        self._sum += value
+        self._head = (self._head + 1) % self.capacity
+
+    def values(self) -> List[float]:
+        """按时间顺序返回窗口内的值"""
+        if self._count < self.capacity:
+            return self._data[:self._count].tolist()
+        return self._data[self._head:].tolist() + self._data[:self._head].tolist()
+
+    def mean(self) -> Optional[float]:
+        return self._sum / self._count if self._count else None
+
+    def percentile(self, q: float) -> Optional[float]:
+        """最近邻秩法分位数，q 取 0-100"""
+        if not self._count:
+            return None
+        ordered = sorted(self._data[:self._count])
+        rank = max(1, math.ceil(q / 100 * self._count))
+        return ordered[rank - 1]
+
+    def max(self) -> Optional[float]:
+        return max(self._data[:self._count]) if self._count else None
+
+    def min(self) -> Optional[float]:
+        return min(self._data[:self._count]) if self._count else None
+
+    def clear(self):
+        self._head = 0
+        self._count = 0
+        self._sum = 0.0
+
+
+class GpuTimeSeries:
+    """
+    多 GPU 的单一指标时间序列
+
+    每块 GPU 一个环形缓冲区，并增量维护 EWMA。一次 push 写入同一时刻
+    所有 GPU 的读数，统计量按 GPU 批量返回。
+
+    Attributes:
+        capacity (int): 窗口大小（采样数）
+        alpha (float): EWMA 平滑系数，越大越偏重新值
+    """
+
+    def __init__(self, capacity: int = 10, alpha: float = 0.3):
+        self.capacity = max(1, int(capacity))
+        self.alpha = min(1.0, max(0.0, float(alpha)))
+        self._buffers: Dict[int, RingBuffer] = {}
+        self._ewma: Dict[int, float] = {}
+
+    def push(self, sample: Dict[int, float]):
+        """写入一个时刻的读数（GPU 编号 -> 数值）"""
+        for gpu_id, value in sample.items():
+            if value is None:
+                continue
+            buffer = self._buffers.get(gpu_id)
+            if buffer is None:
+                buffer = self._buffers[gpu_id] = RingBuffer(self.capacity)
+            buffer.push(value)
+            previous = self._ewma.get(gpu_id)
+            self._ewma[gpu_id] = value if previous is None else \
+                self.alpha * value + (1 - self.alpha) * previous
+
+    def extend(self, samples: Iterable[Dict[int, float]]):
+        """按时间顺序写入多个时刻的读数"""
+        for sample in samples:
+            self.push(sample)
+
+    def gpus(self) -> List[int]:
+        return sorted(self._buffers)
+
+    def is_full(self, gpu_id: int) -> bool:
+        buffer = self._buffers.get(gpu_id)
+        return buffer is not None and buffer.full
+
+    def stat(self, gpu_id: int, kind: str) -> Optional[float]:
+        """
+        获取某块 GPU 的窗口统计量
+
+        Args:
+            gpu_id: GPU 编号
+            kind: 统计量，见 WINDOW_STATS
+        """
+        buffer = self._buffers.get(gpu_id)
+        if buffer is None or not len(buffer):
+            return None
+        if kind == "ewma":
+            return self._ewma.get(gpu_id)
+        if kind == "p95":
+            return buffer.percentile(95)
+        if kind == "max":
+            return buffer.max()
+        if kind == "min":
+            return buffer.min()
+        return buffer.mean()
+
+    def stats(self, kind: str) -> Dict[int, Optional[float]]:
+        """批量获取所有 GPU 的窗口统计量"""
+        return {gpu_id: self.stat(gpu_id, kind) for gpu_id in self._buffers}
+
+    def clear(self):
+        self._buffers.clear()
+        self._ewma.clear()
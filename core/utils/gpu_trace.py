@@ -0,0 +1,203 @@
+# -*- coding: utf-8 -*-
+"""
+GPU 采样回放模块
+
+回放 `nvidia-smi --query-gpu=... --format=csv` 录制的采样文件，作为 NVML 后端的
+替身接入共享采样器，在没有显卡的机器上驱动 GPU 监控的触发逻辑，也便于测量
+各采样后端每轮检查的开销。
+
+录制示例::
+
+    nvidia-smi --query-gpu=timestamp,index,power.draw,utilization.gpu,memory.used \\
+               --format=csv --loop-ms=1000 > trace.csv
+"""
+
+import re
+import time
+import bisect
+import logging
+from datetime import datetime
+from typing import Callable, Iterable, List, Optional, Tuple, Union
+
+from core.utils.gpu import SMI_FIELDS, GpuProcess, GpuReading
+
+logger = logging.getLogger(__name__)
+
+# 表头中的单位后缀，如 "power.draw [W]"
+_HEADER_UNIT = re.compile(r"\s*\[[^\]]*\]\s*$")
+# 带单位的数值，如 "65.43 W"、"1024 MiB"、"3 %"
+_VALUE_WITH_UNIT = re.compile(r"^(-?\d+(?:\.\d+)?)\s*(?:W|%|MiB|MB|C)?$")
+_TIMESTAMP_FORMATS = ("%Y/%m/%d %H:%M:%S.%f", "%Y/%m/%d %H:%M:%S")
+
+# 一轮采样: (相对于第一轮的秒数, 读数列表)
+Frame = Tuple[float, List[GpuReading]]
+
+
+def _parse_timestamp(text: str) -> Optional[float]:
+    for fmt in _TIMESTAMP_FORMATS:
+        try:
+            return datetime.strptime(text, fmt).timestamp()
+        except ValueError:
+            continue
+    return None
+
+
+def _parse_value(attr: str, text: str):
+    if attr == "name":
+        return text
+    m = _VALUE_WITH_UNIT.match(text)
+    if not m:
+        return None  # [N/A]、[Not Supported] 等
+    return int(m.group(1)) if attr == "index" else float(m.group(1))
+
+
+def parse_trace(lines: Iterable[str], interval: float = 1.0) -> List[Frame]:
+    """
+    解析 nvidia-smi CSV 采样记录
+
+    首行须为表头（即不带 noheader 录制），字段顺序任意，可带或不带单位。
+    有 timestamp 列时按时间戳分组为一轮；没有时同一 GPU 编号再次出现即开始新的一轮，
+    相邻两轮间隔按 interval 计。
+
+    Args:
+        lines: CSV 文本行
+        interval: 无 timestamp 列时每轮的间隔（秒）
+
+    Raises:
+        ValueError: 表头缺少 index 列
+    """
+    rows = iter(lines)
+    header = next((line for line in rows if line.strip()), None)
+    if header is None:
+        return []
+    fields = [_HEADER_UNIT.sub("", h.strip()) for h in header.split(",")]
+    if "index" not in fields:
+        raise ValueError(f"采样记录缺少 index 列: {header.strip()}")
+
+    frames: List[Frame] = []
+    origin: Optional[float] = None
+    current_key = None
+    for line in rows:
+        if not line.strip():
+            continue
+        values = [v.strip() for v in line.split(",")]
+        reading = {}
+        timestamp = None
+        for field, text in zip(fields, values):
+            if field == "timestamp":
+                timestamp = _parse_timestamp(text)
+            elif field in SMI_FIELDS:
+                attr = SMI_FIELDS[field]
+                reading[attr] = _parse_value(attr, text)
+        if reading.get("index") is None:
+            continue
+        reading = GpuReading(**reading)
+
+        if timestamp is not None:
+            if origin is None:
+                origin = timestamp
+            new_frame = not frames or timestamp != current_key
+            offset = timestamp - origin
+            current_key = timestamp
+        else:
+            new_frame = not frames or any(r.index == reading.index for r in frames[-1][1])
+            offset = len(frames) * interval if new_frame else frames[-1][0]
+        if new_frame:
+            frames.append((offset, []))
+        frames[-1][1].append(reading)
+    return frames
+
+
+class TraceReplayBackend:
+    """
+    采样回放后端
+
+    接口与 NvmlBackend 一致，可作为 GpuSampler(backend=...) 的专用后端，
+    也可通过 set_nvml_backend() 接入共享采样器。
+    speed > 0 时按真实时间的 speed 倍速回放（首次读取时开始计时）；
+    speed 为 0 时每次读取前进一轮，便于测试逐轮驱动。回放结束后
+    loop 为 True 则从头开始，否则停留在最后一轮。
+
+    Attributes:
+        frames (List[Frame]): 全部采样
+        speed (float): 回放倍速，0 表示逐轮步进
+        loop (bool): 是否循环回放
+    """
+
+    def __init__(self,
+                 source: Union[str, Iterable[str]],
+                 speed: float = 1.0,
+                 loop: bool = False,
+                 interval: float = 1.0,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        Args:
+            source: 采样文件路径，或 CSV 文本行
+            speed: 回放倍速，0 表示每次读取前进一轮
+            loop: 回放结束后是否从头开始
+            interval: 无 timestamp 列时每轮的间隔（秒）
+            clock: 时钟函数（测试时可替换）
+        """
+        if isinstance(source, str):
+            with open(source, 'r', encoding='utf-8') as f:
+                self.frames = parse_trace(f, interval)
+        else:
+            self.frames = parse_trace(source, interval)
+        if not self.frames:
+            raise ValueError("采样记录为空")
+        self.speed = max(0.0, float(speed))
+        self.loop = loop
+        self._clock = clock
+        self._offsets = [offset for offset, _ in self.frames]
+        self._started_at: Optional[float] = None
+        self._step = 0
+        self.reads = 0
+        logger.info(f"GPU 采样回放: {len(self.frames)} 轮，时长 {self._offsets[-1]:.1f} 秒")
+
+    @property
+    def available(self) -> bool:
+        return True
+
+    @property
+    def finished(self) -> bool:
+        """是否已回放到最后一轮（循环回放时始终为 False）"""
+        return not self.loop and self._position() >= len(self.frames) - 1
+
+    def _position(self) -> int:
+        """当前应返回的采样序号"""
+        if self.speed == 0:
+            index = max(0, self._step - 1)
+        elif self._started_at is None:
+            index = 0
+        else:
+            elapsed = (self._clock() - self._started_at) * self.speed
+            duration = self._offsets[-1]
+            if self.loop and duration > 0:
+                # 最后一轮与第一轮之间按一个平均间隔衔接
+                period = duration + duration / max(1, len(self.frames) - 1)
+                elapsed %= period
+            index = bisect.bisect_right(self._offsets, elapsed) - 1
+        if self.loop:
+            return index % len(self.frames)
+        return min(index, len(self.frames) - 1)
+
+    def read(self) -> Optional[List[GpuReading]]:
+        """返回当前回放位置的读数"""
+        self.reads += 1
+        if self.speed == 0:
+            self._step += 1
+        elif self._started_at is None:
+            self._started_at = self._clock()
+        return list(self.frames[self._position()][1])
+
+    def read_processes(self) -> Optional[List[GpuProcess]]:
+        """采样记录不含进程信息"""
+        return []
+
+    def rewind(self):
+        """回到第一轮"""
+        self._started_at = None
+        self._step = 0
+
+    def shutdown(self):
+        pass
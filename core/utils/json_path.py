@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+"""
+JSON 路径断言模块
+
+将形如 `$.jobs[*].state == "SUCCEEDED"`、`$.progress >= 1.0` 的表达式
+在加载配置时编译一次，之后对解码后的 JSON 文档直接求值。
+
+支持的路径语法：`$` 根节点、`.key` / `['key']` 取字段、`[n]` 取下标（可为负数）、
+`[*]` / `.*` 展开数组或对象的全部元素。路径匹配到多个值时，所有值都满足比较才算通过；
+路径没有匹配到任何值时不通过。省略比较部分时要求所有值为真值。
+"""
+
+import re
+import ast
+import json
+import operator
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+_OPERATORS: Dict[str, Callable[[Any, Any], bool]] = {
+    "==": operator.eq,
+    "!=": operator.ne,
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+}
+
+_STEP = re.compile(r"""
+      \.(?P<name>[A-Za-z_][\w-]*)
+    | \.\*(?P<dotstar>)
+    | \[\s*(?P<index>-?\d+)\s*\]
+    | \[\s*\*\s*\](?P<star>)
+    | \[\s*(?P<quoted>'(?:[^'\\]|\\.)*'|"(?:[^"\\]|\\.)*")\s*\]
+""", re.VERBOSE)
+_COMPARISON = re.compile(r"^\s*(?P<op>==|!=|<=|>=|<|>)\s*(?P<value>.+?)\s*$")
+
+# 路径的一步: ("key", 字段名) / ("index", 下标) / ("wild", None)
+Step = Tuple[str, Any]
+
+
+def _parse_literal(text: str) -> Any:
+    """解析比较右侧的字面量：JSON 值，或单引号字符串"""
+    try:
+        return json.loads(text)
+    except ValueError:
+        pass
+    if len(text) >= 2 and text[0] == text[-1] == "'":
+        return ast.literal_eval(text)
+    raise ValueError(f"无法解析的比较值: {text}")
+
+
+def _parse_path(text: str) -> Tuple[List[Step], str]:
+    """解析路径部分，返回步骤列表与剩余文本"""
+    text = text.strip()
+    if not text.startswith("$"):
+        raise ValueError(f"JSON 路径须以 $ 开头: {text}")
+    steps: List[Step] = []
+    pos = 1
+    while True:
+        m = _STEP.match(text, pos)
+        if not m:
+            break
+        kind = m.lastgroup
+        if kind == "name":
+            steps.append(("key", m.group("name")))
+        elif kind == "quoted":
+            steps.append(("key", ast.literal_eval(m.group("quoted"))))
+        elif kind == "index":
+            steps.append(("index", int(m.group("index"))))
+        else:
+            steps.append(("wild", None))
+        pos = m.end()
+    return steps, text[pos:]
+
+
+def _compare(op: str, actual: Any, expected: Any) -> bool:
+    # JSON 的 true 与 1 不视为相等
+    if isinstance(actual, bool) != isinstance(expected, bool):
+        return op == "!="
+    try:
+        return _OPERATORS[op](actual, expected)
+    except TypeError:
+        return False
+
+
+class JsonAssertion:
+    """
+    编译后的 JSON 路径断言
+
+    Attributes:
+        text (str): 原始表达式
+        steps (List[Step]): 路径步骤
+        op (Optional[str]): 比较运算符，为 None 时检查真值
+        expected (Any): 比较值
+    """
+
+    def __init__(self, text: str, steps: List[Step], op: Optional[str], expected: Any):
+        self.text = text
+        self.steps = steps
+        self.op = op
+        self.expected = expected
+
+    def select(self, document: Any) -> List[Any]:
+        """返回路径匹配到的全部值"""
+        values = [document]
+        for kind, arg in self.steps:
+            matched = []
+            for value in values:
+                if kind == "key":
+                    if isinstance(value, dict) and arg in value:
+                        matched.append(value[arg])
+                elif kind == "index":
+                    if isinstance(value, list) and -len(value) <= arg < len(value):
+                        matched.append(value[arg])
+                elif isinstance(value, dict):
+                    matched.extend(value.values())
+                elif isinstance(value, list):
+                    matched.extend(value)
+            values = matched
+        return values
+
+    def evaluate(self, document: Any) -> bool:
+        values = self.select(document)
+        if not values:
+            return False
+        if self.op is None:
+            return all(values)
+        return all(_compare(self.op, value, self.expected) for value in values)
+
+    def __repr__(self) -> str:
+        return f"JsonAssertion({self.text!r})"
+
+
+def compile_json_assertion(text: str) -> JsonAssertion:
+    """
+    编译一条断言
+
+    Raises:
+        ValueError: 表达式无法解析
+    """
+    steps, rest = _parse_path(text)
+    if not rest.strip():
+        return JsonAssertion(text.strip(), steps, None, None)
+    m = _COMPARISON.match(rest)
+    if not m:
+        raise ValueError(f"无法解析的 JSON 断言: {text}")
+    return JsonAssertion(text.strip(), steps, m.group("op"), _parse_literal(m.group("value")))
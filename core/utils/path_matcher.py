@@ -0,0 +1,256 @@
+# -*- coding: utf-8 -*-
+"""
+路径匹配工具
+
+将排除关键词、gitignore 风格规则与包含模式编译为一次性的匹配器，
+供目录扫描在下探之前剪枝使用。
+"""
+
+import os
+import re
+import logging
+from typing import Iterable, List, Optional, Pattern, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 扫描根目录下的忽略规则文件名
+IGNORE_FILENAME = ".tasknyaignore"
+
+# 含有以下字符的条目按 gitignore 规则解析，否则按旧版子串关键词处理
+_RULE_CHARS = set("*?[/!")
+# 旧版关键词中出现以下字符时，按规则解析会改变含义（锚定路径、取反、字符类）
+_MEANING_CHANGING_CHARS = set("/![")
+
+_FLAGS = re.IGNORECASE if os.name == "nt" else 0
+
+
+def changed_keywords(rules: Iterable[str]) -> List[str]:
+    """
+    找出按 gitignore 规则解析后不再是子串匹配的旧版关键词
+
+    `*`、`?` 在旧版子串匹配中几乎不可能命中，视为有意写成的规则；
+    含 `/`、`!`、`[` 的条目在旧版中是普通子串，现在分别表示锚定路径、取反与字符类。
+
+    Args:
+        rules: 配置中的排除关键词
+    """
+    changed = []
+    for raw in rules:
+        if not isinstance(raw, str):
+            continue
+        rule = raw.strip()
+        if rule and not rule.startswith("#") and not _MEANING_CHANGING_CHARS.isdisjoint(rule):
+            changed.append(rule)
+    return changed
+
+
+def _glob_to_regex(pattern: str) -> str:
+    """
+    将 gitignore 风格的 glob 转换为正则片段
+
+    支持 `*`、`?`、`[...]` 与 `**`。
+    """
+    i, n = 0, len(pattern)
+    parts = []
+    while i < n:
+        c = pattern[i]
+        if c == "*":
+            if pattern.startswith("**", i):
+                i += 2
+                if i < n and pattern[i] == "/":
+                    # "**/" 匹配零或多级目录
+                    parts.append("(?:.*/)?")
+                    i += 1
+                else:
+                    parts.append(".*")
+                continue
+            parts.append("[^/]*")
+        elif c == "?":
+            parts.append("[^/]")
+        elif c == "[":
+            j = pattern.find("]", i + 1)
+            if j == -1:
+                parts.append(re.escape(c))
+            else:
+                body = pattern[i + 1:j]
+                if body.startswith("!"):
+                    body = "^" + body[1:]
+                parts.append("[" + body.replace("\\", "\\\\") + "]")
+                i = j
+        else:
+            parts.append(re.escape(c))
+        i += 1
+    return "".join(parts)
+
+
+def compile_glob(pattern: str) -> Tuple[Pattern, bool]:
+    """
+    编译单条 gitignore 风格模式
+
+    Args:
+        pattern: 模式字符串（不含前导 `!`）
+
+    Returns:
+        (正则对象, 是否仅匹配目录)
+    """
+    dir_only = pattern.endswith("/")
+    pattern = pattern.rstrip("/")
+    # 除末尾斜杠外含有 "/" 的模式锚定到扫描根目录
+    anchored = "/" in pattern
+    pattern = pattern.lstrip("/")
+    prefix = "^" if anchored else "^(?:.*/)?"
+    return re.compile(prefix + _glob_to_regex(pattern) + "$", _FLAGS), dir_only
+
+
+class PathMatcher:
+    """
+    编译后的路径匹配器
+
+    规则来源:
+        - 旧版排除关键词: 对相对路径做大小写不敏感的子串匹配
+        - gitignore 风格规则: glob、`**`、锚定目录（含 `/`）、`dir/` 仅目录、`!` 取反，
+          后出现的规则优先
+        - 包含模式: 非空时仅保留匹配任一模式的文件（目录不受影响，以便继续下探）
+
+    所有路径均为相对扫描根目录、以 `/` 分隔的路径。
+
+    Attributes:
+        include_patterns (List[str]): 包含模式
+    """
+
+    def __init__(self,
+                 exclude_rules: Optional[Iterable[str]] = None,
+                 include_patterns: Optional[Iterable[str]] = None):
+        """
+        初始化匹配器
+
+        Args:
+            exclude_rules: 排除关键词或 gitignore 风格规则
+            include_patterns: 文件包含模式（如 `*.pt`）
+        """
+        self._keywords: List[str] = []
+        self._rules: List[Tuple[Pattern, bool, bool]] = []  # (regex, dir_only, negated)
+        self._keyword_re: Optional[Pattern] = None
+        self.add_rules(exclude_rules or [])
+
+        self.include_patterns = [p for p in (include_patterns or []) if p and p.strip()]
+        self._include_re: Optional[Pattern] = None
+        if self.include_patterns:
+            regexes = [compile_glob(p.strip())[0].pattern for p in self.include_patterns]
+            self._include_re = re.compile("|".join(f"(?:{r})" for r in regexes), _FLAGS)
+
+    def add_rules(self, rules: Iterable[str]):
+        """
+        追加排除规则
+
+        Args:
+            rules: 关键词或 gitignore 风格规则列表，忽略空行与 `#` 注释
+        """
+        for raw in rules:
+            if not isinstance(raw, str):
+                continue
+            rule = raw.strip()
+            if not rule or rule.startswith("#"):
+                continue
+            if _RULE_CHARS.isdisjoint(rule):
+                # 相对路径统一以 `/` 分隔，旧版按 Windows 路径写的 `runs\tmp` 同样转换
+                self._keywords.append(rule.replace("\\", "/"))
+                continue
+            negated = rule.startswith("!")
+            if negated:
+                rule = rule[1:]
+            if not rule:
+                continue
+            regex, dir_only = compile_glob(rule)
+            self._rules.append((regex, dir_only, negated))
+
+        if self._keywords:
+            self._keyword_re = re.compile(
+                "|".join(re.escape(k) for k in self._keywords), re.IGNORECASE
+            )
+        # 无取反规则时，可以合并为单个正则（按仅目录与否分组）
+        self._has_negation = any(neg for _, _, neg in self._rules)
+        self._merged_any: Optional[Pattern] = None
+        self._merged_dir: Optional[Pattern] = None
+        if not self._has_negation:
+            any_rules = [r.pattern for r, dir_only, _ in self._rules if not dir_only]
+            dir_rules = [r.pattern for r, dir_only, _ in self._rules if dir_only]
+            if any_rules:
+                self._merged_any = re.compile("|".join(f"(?:{r})" for r in any_rules), _FLAGS)
+            if dir_rules:
+                self._merged_dir = re.compile("|".join(f"(?:{r})" for r in dir_rules), _FLAGS)
+
+    def load_ignore_file(self, path: str) -> bool:
+        """
+        从忽略文件追加规则
+
+        Args:
+            path: 忽略文件路径
+
+        Returns:
+            是否成功读取
+        """
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                self.add_rules(f.read().splitlines())
+            logger.info(f"已加载忽略规则文件: {path}")
+            return True
+        except FileNotFoundError:
+            return False
+        except Exception as e:
+            logger.error(f"读取忽略规则文件失败: {e}")
+            return False
+
+    def is_excluded(self, rel_path: str, is_dir: bool = False) -> bool:
+        """
+        判断路径是否被排除规则命中（不考虑包含模式）
+
+        Args:
+            rel_path: 相对路径
+            is_dir: 是否为目录
+        """
+        if self._keyword_re is not None and self._keyword_re.search(rel_path):
+            return True
+        if not self._rules:
+            return False
+        if not self._has_negation:
+            if self._merged_any is not None and self._merged_any.match(rel_path):
+                return True
+            return is_dir and self._merged_dir is not None and bool(self._merged_dir.match(rel_path))
+        # 存在取反规则时，后出现的规则优先
+        for regex, dir_only, negated in reversed(self._rules):
+            if dir_only and not is_dir:
+                continue
+            if regex.match(rel_path):
+                return not negated
+        return False
+
+    def should_descend(self, rel_path: str) -> bool:
+        """目录是否需要继续下探（被排除的目录整体剪枝）"""
+        return not self.is_excluded(rel_path, is_dir=True)
+
+    def accepts_file(self, rel_path: str) -> bool:
+        """文件是否应纳入快照（排除规则 + 包含模式）"""
+        if self._include_re is not None and not self._include_re.match(rel_path):
+            return False
+        return not self.is_excluded(rel_path, is_dir=False)
+
+    @classmethod
+    def for_directory(cls,
+                      root: str,
+                      exclude_rules: Optional[Iterable[str]] = None,
+                      include_patterns: Optional[Iterable[str]] = None) -> "PathMatcher":
+        """
+        为扫描根目录构建匹配器，并自动加载根目录下的 `.tasknyaignore`
+
+        Args:
+            root: 扫描根目录
+            exclude_rules: 配置中的排除规则
+            include_patterns: 配置中的包含模式
+        """
+        matcher = cls(exclude_rules, include_patterns)
+        # 忽略规则文件本身不参与变化检测
+        matcher.add_rules(["/" + IGNORE_FILENAME])
+        if root:
+            matcher.load_ignore_file(os.path.join(root, IGNORE_FILENAME))
+        return matcher
@@ -0,0 +1,262 @@
+# -*- coding: utf-8 -*-
+"""
+报告输出模块
+
+提供按大小轮转、可选 gzip 压缩历史分段的报告文件写入器，
+以及按时间戳定位 JSONL 记录的查询辅助函数。
+"""
+
+import os
+import gzip
+import json
+import shutil
+import logging
+import threading
+from datetime import datetime
+from typing import Any, Dict, IO, Iterable, Iterator, List, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+def _normalize_ts(value: Union[str, datetime, None]) -> Optional[str]:
+    """将时间统一为可按字典序比较的字符串"""
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return value.strftime(TIMESTAMP_FORMAT)
+    return str(value)
+
+
+def _record_ts(line: Union[str, bytes]) -> Optional[str]:
+    """解析一行 JSONL 记录的时间戳，非 JSON 行返回 None"""
+    try:
+        record = json.loads(line)
+    except (ValueError, TypeError):
+        return None
+    if isinstance(record, dict):
+        ts = record.get("ts")
+        return str(ts) if ts is not None else None
+    return None
+
+
+class ReportSink:
+    """
+    轮转报告文件
+
+    写入当前文件 `path`，超过 max_bytes 后依次轮转为 `path.1`、`path.2`……
+    （压缩时为 `path.1.gz`），最多保留 backup_count 个历史分段。
+
+    Attributes:
+        path (str): 当前报告文件路径
+        max_bytes (int): 单个文件的大小上限，<=0 表示不轮转
+        backup_count (int): 保留的历史分段数量
+        compress (bool): 是否 gzip 压缩历史分段
+    """
+
+    def __init__(self,
+                 path: str,
+                 max_bytes: int = 0,
+                 backup_count: int = 5,
+                 compress: bool = False):
+        self.path = path
+        self.max_bytes = max(0, int(max_bytes or 0))
+        self.backup_count = max(0, int(backup_count or 0))
+        self.compress = bool(compress)
+        self._lock = threading.Lock()
+
+    def _segment_path(self, index: int, compressed: Optional[bool] = None) -> str:
+        """第 index 个历史分段的路径"""
+        if compressed is None:
+            compressed = self.compress
+        return f"{self.path}.{index}" + (".gz" if compressed else "")
+
+    def _existing_segment(self, index: int) -> Optional[str]:
+        """查找第 index 个历史分段（压缩或未压缩）"""
+        for compressed in (True, False):
+            candidate = self._segment_path(index, compressed)
+            if os.path.exists(candidate):
+                return candidate
+        return None
+
+    def segments(self) -> List[str]:
+        """按时间从旧到新列出现存的报告文件（含当前文件）"""
+        files = []
+        index = 1
+        while True:
+            segment = self._existing_segment(index)
+            if segment is None:
+                break
+            files.append(segment)
+            index += 1
+        files.reverse()
+        if os.path.exists(self.path):
+            files.append(self.path)
+        return files
+
+    def write_lines(self, lines: Iterable[str]):
+        """
+        追加写入若干行，写入后按需轮转
+
+        同一批次的行总是写入同一个文件，不会被轮转拆开。
+        """
+        with self._lock:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.path, 'a', encoding='utf-8') as f:
+                for line in lines:
+                    f.write(line)
+                    f.write("\n")
+                size = f.tell()
+            if self.max_bytes and size >= self.max_bytes:
+                self._rotate()
+
+    def write_records(self, records: Iterable[Dict[str, Any]]):
+        """以 JSONL 格式追加写入记录"""
+        self.write_lines(json.dumps(r, ensure_ascii=False) for r in records)
+
+    def rotate(self):
+        """立即轮转当前文件"""
+        with self._lock:
+            self._rotate()
+
+    def _rotate(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            if self.backup_count <= 0:
+                os.remove(self.path)
+                return
+            # 删除最旧的分段，其余依次后移
+            oldest = self._existing_segment(self.backup_count)
+            if oldest is not None:
+                os.remove(oldest)
+            for index in range(self.backup_count - 1, 0, -1):
+                segment = self._existing_segment(index)
+                if segment is not None:
+                    os.replace(segment, self._segment_path(index + 1, segment.endswith(".gz")))
+            if self.compress:
+                target = self._segment_path(1, True)
+                with open(self.path, 'rb') as src, gzip.open(target, 'wb') as dst:
+                    shutil.copyfileobj(src, dst)
+                os.remove(self.path)
+            else:
+                os.replace(self.path, self._segment_path(1, False))
+            logger.info(f"报告文件已轮转: {self.path}")
+        except OSError as e:
+            logger.error(f"报告文件轮转失败: {e}")
+
+    def exclude_rules(self, scan_root: str) -> List[str]:
+        """
+        生成排除自身文件的 gitignore 风格规则
+
+        报告文件位于扫描目录内时返回锚定到根目录的规则，否则返回空列表。
+        """
+        if not scan_root:
+            return []
+        try:
+            rel = os.path.relpath(os.path.abspath(self.path), os.path.abspath(scan_root))
+        except ValueError:
+            # Windows 下跨盘符
+            return []
+        if rel == os.curdir or rel.startswith(os.pardir):
+            return []
+        rel = rel.replace(os.sep, "/")
+        # 转义 glob 元字符，文件名按字面匹配
+        escaped = "".join(f"[{c}]" if c in "*?[" else c for c in rel)
+        return ["/" + escaped, "/" + escaped + ".*"]
+
+    @staticmethod
+    def _open(path: str) -> IO[bytes]:
+        if path.endswith(".gz"):
+            return gzip.open(path, 'rb')
+        return open(path, 'rb')
+
+    @staticmethod
+    def _first_ts(path: str) -> Optional[str]:
+        """读取分段中第一条记录的时间戳"""
+        try:
+            with ReportSink._open(path) as f:
+                for line in f:
+                    ts = _record_ts(line)
+                    if ts is not None:
+                        return ts
+        except OSError:
+            pass
+        return None
+
+    @staticmethod
+    def _seek_to(f: IO[bytes], size: int, since: str):
+        """
+        在未压缩文件中二分定位到第一条时间戳 >= since 的记录附近
+
+        记录按追加顺序写入，时间戳单调不减；定位失败时退回文件开头。
+        """
+        lo, hi = 0, size
+        while hi - lo > 4096:
+            mid = (lo + hi) // 2
+            f.seek(mid)
+            f.readline()  # 跳过不完整的行
+            ts = None
+            while ts is None:
+                line = f.readline()
+                if not line:
+                    break
+                ts = _record_ts(line)
+            if ts is None or ts >= since:
+                hi = mid
+            else:
+                lo = mid
+        f.seek(lo)
+        if lo:
+            f.readline()
+
+    def query(self,
+              since: Union[str, datetime, None] = None,
+              until: Union[str, datetime, None] = None) -> Iterator[Dict[str, Any]]:
+        """
+        按时间范围读取 JSONL 记录（含已轮转的分段）
+
+        下一分段首条记录早于 since 的分段整体跳过；
+        未压缩分段内部按时间戳二分定位，无需从头读取。
+
+        Args:
+            since: 起始时间（含）
+            until: 结束时间（含）
+
+        Yields:
+            报告记录字典
+        """
+        since_ts = _normalize_ts(since)
+        until_ts = _normalize_ts(until)
+        files = self.segments()
+
+        start = 0
+        if since_ts is not None:
+            for index in range(len(files) - 1):
+                next_first = self._first_ts(files[index + 1])
+                if next_first is not None and next_first < since_ts:
+                    start = index + 1
+
+        for path in files[start:]:
+            try:
+                with self._open(path) as f:
+                    if since_ts is not None and not path.endswith(".gz"):
+                        self._seek_to(f, os.path.getsize(path), since_ts)
+                    for line in f:
+                        try:
+                            record = json.loads(line)
+                        except (ValueError, TypeError):
+                            continue
+                        if not isinstance(record, dict):
+                            continue
+                        ts = str(record.get("ts", ""))
+                        if since_ts is not None and ts < since_ts:
+                            continue
+                        if until_ts is not None and ts > until_ts:
+                            return
+                        yield record
+            except OSError as e:
+                logger.warning(f"读取报告文件失败: {path} ({e})")
@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+"""
+流式关键词匹配模块
+
+在按块到达的字节流中查找关键词，关键词跨越块边界时同样能命中，
+找到后立即停止消费数据流，内存占用只与块大小同阶。
+"""
+
+import re
+from typing import Dict, Iterable, List, Optional, Pattern, Tuple
+
+
+class StreamMatcher:
+    """
+    流式关键词匹配器
+
+    关键词编译为单个字节正则（每种编码只编译一次），每块只扫描
+    「上一块末尾 最长关键词长度-1 字节 + 新块」，返回数据流中最先出现的关键词。
+
+    Attributes:
+        keywords (List[str]): 关键词列表
+    """
+
+    def __init__(self, keywords: Iterable[str]):
+        self.keywords: List[str] = [k for k in keywords if isinstance(k, str) and k]
+        self._compiled: Dict[str, Tuple[Pattern, int]] = {}
+
+    def _compile(self, encoding: str) -> Tuple[Pattern, int]:
+        compiled = self._compiled.get(encoding)
+        if compiled is None:
+            patterns = []
+            for keyword in self.keywords:
+                try:
+                    patterns.append(keyword.encode(encoding))
+                except (UnicodeEncodeError, LookupError):
+                    # 声明的编码无法表示关键词（如 ISO-8859-1 下的中文），按 UTF-8 匹配
+                    patterns.append(keyword.encode('utf-8'))
+            regex = re.compile(b"|".join(b"(?P<k%d>%s)" % (i, re.escape(p)) for i, p in enumerate(patterns)))
+            compiled = self._compiled[encoding] = (regex, max(len(p) for p in patterns) - 1)
+        return compiled
+
+    def search(self, chunks: Iterable[bytes], encoding: Optional[str] = None) -> Optional[str]:
+        """
+        在字节块序列中查找关键词，命中后不再继续读取
+
+        Args:
+            chunks: 字节块序列（可以是惰性的生成器）
+            encoding: 数据流的编码，默认 UTF-8
+
+        Returns:
+            命中的关键词，读完仍未命中时返回 None
+        """
+        if not self.keywords:
+            return None
+        regex, keep = self._compile((encoding or 'utf-8').lower())
+        tail = b""
+        for chunk in chunks:
+            window = tail + chunk
+            m = regex.search(window)
+            if m:
+                return self.keywords[int(m.lastgroup[1:])]
+            tail = window[-keep:] if keep else b""
+        return None
@@ -19,6 +19,7 @@ from core.config import ConfigManager, DEFAULT_CONFIG
 from core.monitor import MonitorManager
 from core.notifier import WebhookNotifier, GenericWebhookNotifier, EmailNotifier, WeComNotifier, MessageBuilder
 from core.utils import get_gpu_info, setup_logger
+from core.utils.gpu import get_gpu_sampler
 from core.utils.logger import get_default_log_path
 
 # 配置日志
@@ -101,6 +102,18 @@ class TrainingMonitor:
         """
         return self._monitor_manager.check()
     
+    def get_monitor(self, name: str):
+        """
+        按名称获取监控器
+        
+        Args:
+            name: 监控器名称，如 "HTTP轮询监控"
+            
+        Returns:
+            监控器实例，不存在时返回 None
+        """
+        return self._monitor_manager.get_monitor(name)
+    
     def _check_gpu_power_below_threshold(self, threshold: float, gpu_ids) -> bool:
         """
         检查GPU功耗是否低于阈值（向后兼容方法）
@@ -172,6 +185,8 @@ class TrainingMonitor:
         timeout = self.config['monitor']['timeout']
         
         logger.info(f"开始监控任务进程: {project_name}")
+        # GPU 能耗与利用率按本次任务统计
+        get_gpu_sampler().usage.reset()
         
         if self.config['monitor'].get('check_api_enabled', False):
             from core.monitor.api_trigger import ApiTriggerServer
@@ -211,7 +226,8 @@ class TrainingMonitor:
                     project_name=project_name,
                     method=method,
                     detail=detail,
-                    gpu_info=self.get_gpu_info() if self._should_include_gpu_info(method) else None
+                    gpu_info=self.get_gpu_info() if self._should_include_gpu_info(method) else None,
+                    gpu_usage=get_gpu_sampler().usage.snapshot()
                 )
                 
                 # 如果是目录监控触发，尝试获取详细报告数据
@@ -230,6 +246,7 @@ class TrainingMonitor:
                         logger.info("持续监控模式：重置目录监控器，继续检测")
                         dir_monitor.reset()
                         self.start_time = datetime.now()  # 重置计时
+                        get_gpu_sampler().usage.reset()
                         continue  # 不 break，继续监控
                 
                 break
@@ -263,7 +280,7 @@ class TrainingMonitor:
         Returns:
             是否包含GPU信息
         """
-        return (method == "GPU功耗检测" or 
+        return (method in ("GPU功耗检测", "GPU进程检测") or 
                 self.config['monitor'].get('check_gpu_power_enabled', False) or
                 self.config['webhook'].get('include_gpu_info', True) or
                 self.config['generic_webhook'].get('enabled', False))
@@ -0,0 +1,98 @@
+"""
+测量各 GPU 采样后端每轮检查的开销。
+
+对每个可用后端，用同一个 GpuMonitor 配置反复调用 check()，统计每轮耗时。
+采样回放后端总是可用；NVML 与 nvidia-smi 只在本机有显卡时参与测量。
+
+用法:
+    python scripts/bench_gpu_backends.py [--trace trace.csv] [--ticks 200]
+"""
+
+import os
+import sys
+import time
+import shutil
+import logging
+import argparse
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.monitor import GpuMonitor
+from core.utils.gpu import GpuSampler, NvmlBackend, set_gpu_sampler, set_nvml_backend
+from core.utils.gpu_trace import TraceReplayBackend
+
+MONITOR_CONFIG = {
+    'check_gpu_power_enabled': True,
+    'check_gpu_power_threshold': 50.0,
+    'check_gpu_power_consecutive_checks': 10 ** 9,  # 只测开销，不触发
+    'check_gpu_conditions': "util < 5% and memory < 1GB",
+    'check_gpu_smi_stream': False,
+}
+
+
+def synthetic_trace(gpus=8, frames=600):
+    """生成一段训练结束后转入空闲的采样记录"""
+    lines = ["index, power.draw [W], utilization.gpu [%], memory.used [MiB]"]
+    for frame in range(frames):
+        busy = frame < frames // 2
+        for gpu in range(gpus):
+            power = 280 + gpu if busy else 65 + gpu
+            lines.append(f"{gpu}, {power:.2f} W, {95 if busy else 0} %, {30000 if busy else 500} MiB")
+    return lines
+
+
+def measure(backend, ticks, stream=False):
+    """用指定后端运行 ticks 次检查，返回每轮耗时（微秒）"""
+    set_nvml_backend(backend)
+    set_gpu_sampler(GpuSampler(allow_stream=stream))
+    config = dict(MONITOR_CONFIG, check_gpu_smi_stream=stream)
+    monitor = GpuMonitor(config)
+    costs = []
+    try:
+        for _ in range(ticks):
+            start = time.perf_counter()
+            monitor.check()
+            costs.append((time.perf_counter() - start) * 1e6)
+    finally:
+        backend.shutdown()
+    return costs
+
+
+def report(name, costs):
+    if not costs:
+        return
+    ordered = sorted(costs)
+    p95 = ordered[max(0, int(len(ordered) * 0.95) - 1)]
+    print(f"{name:<16} {len(costs):>6} {statistics.mean(costs):>12.1f} {statistics.median(costs):>12.1f} {p95:>12.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="GPU 采样后端开销测量")
+    parser.add_argument('--trace', help="nvidia-smi --format=csv 采样文件，默认使用合成数据")
+    parser.add_argument('--ticks', type=int, default=200, help="每个后端的检查次数")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.ERROR)
+
+    source = args.trace or synthetic_trace()
+    print(f"{'backend':<16} {'ticks':>6} {'mean(us)':>12} {'median(us)':>12} {'p95(us)':>12}")
+
+    report("trace-replay", measure(TraceReplayBackend(source, speed=0, loop=True), args.ticks))
+
+    nvml = NvmlBackend()
+    if nvml.available:
+        report("nvml", measure(nvml, args.ticks))
+    else:
+        print(f"{'nvml':<16} 不可用")
+
+    if shutil.which('nvidia-smi') is None:
+        print(f"{'nvidia-smi':<16} 不可用")
+        return
+    # nvidia-smi 每轮启动进程，开销较大，减少次数
+    smi_ticks = max(1, args.ticks // 10)
+    report("nvidia-smi", measure(NvmlBackend(enabled=False), smi_ticks))
+    report("nvidia-smi-loop", measure(NvmlBackend(enabled=False), smi_ticks, stream=True))
+
+
+if __name__ == "__main__":
+    main()
@@ -16,6 +16,17 @@ from unittest.mock import MagicMock, patch
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 
+@pytest.fixture(autouse=True)
+def _isolate_gpu_sampling():
+    """默认禁用 NVML 与流式采样并使用全新的共享采样器，使 GPU 测试在有无显卡的机器上都走 nvidia-smi 的 mock"""
+    from core.utils.gpu import GpuSampler, NvmlBackend, set_gpu_sampler, set_nvml_backend
+    previous_backend = set_nvml_backend(NvmlBackend(enabled=False))
+    previous_sampler = set_gpu_sampler(GpuSampler(allow_stream=False))
+    yield
+    set_nvml_backend(previous_backend)
+    set_gpu_sampler(previous_sampler)
+
+
 @pytest.fixture
 def project_root():
     """项目根目录"""
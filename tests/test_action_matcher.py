@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+"""
+操作建议匹配测试
+"""
+
+from core.utils.action_matcher import ActionMatcher
+
+
+def _naive(action_keywords, filename):
+    """逐个关键词子串匹配的参考实现"""
+    name = filename.lower()
+    for action, keywords in action_keywords.items():
+        if isinstance(keywords, str):
+            keywords = [keywords]
+        if any(k.lower() in name for k in keywords):
+            return action
+    return ""
+
+
+class TestActionMatcher:
+    """操作建议匹配器测试"""
+
+    KEYWORDS = {
+        "压制": ["无字幕", "RAW"],
+        "归档": ["final", "raw_backup"],
+        "检查": "ckpt",
+    }
+
+    def test_priority_follows_config_order(self):
+        """多个操作命中时，配置中靠前的操作优先，与位置无关"""
+        matcher = ActionMatcher(self.KEYWORDS)
+        assert matcher.match("final_RAW.mp4") == "压制"
+        assert matcher.match("raw_backup.tar") == "压制"
+        assert matcher.match("Final_ckpt.pt") == "归档"
+        assert matcher.match("model.ckpt") == "检查"
+        assert matcher.match("readme.md") == ""
+
+    def test_matches_reference_implementation(self):
+        """结果与逐个关键词匹配一致"""
+        matcher = ActionMatcher(self.KEYWORDS)
+        names = ["a_无字幕_1.mkv", "ckpt_final", "FINAL", "x.raw", "raw", "zz", "ckpt-raw_backup"]
+        for name in names:
+            assert matcher.match(name) == _naive(self.KEYWORDS, name)
+
+    def test_digit_runs_share_cache_entry(self):
+        """关键词不含数字时，仅编号不同的文件名共享缓存"""
+        matcher = ActionMatcher(self.KEYWORDS)
+        for i in range(100):
+            assert matcher.match(f"epoch_{i}_ckpt.pt") == "检查"
+        assert matcher.cache_info().misses == 1
+
+    def test_digit_keywords_not_folded(self):
+        """关键词含数字时不做归一化"""
+        matcher = ActionMatcher({"旧版": ["v1"]})
+        assert matcher.match("model_v1.pt") == "旧版"
+        assert matcher.match("model_v2.pt") == ""
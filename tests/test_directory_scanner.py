@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+"""
+目录扫描器测试
+
+测试 Merkle 目录哈希与基于子树的快照比较。
+"""
+
+import os
+
+from core.monitor.directory_scanner import DirectoryScanner, diff_snapshots, diff_rollups
+from core.utils.path_matcher import PathMatcher
+
+
+def _touch(path, content='x'):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as f:
+        f.write(content)
+
+
+def _scan(root):
+    return DirectoryScanner(root, PathMatcher()).scan()
+
+
+class TestMerkleDigest:
+    """Merkle 目录哈希测试"""
+
+    def test_root_digest_stable_without_changes(self, temp_dir):
+        """目录未变化时根哈希不变"""
+        _touch(os.path.join(temp_dir, 'a', 'x.pt'))
+        _touch(os.path.join(temp_dir, 'b', 'y.pt'))
+        assert _scan(temp_dir).root_digest == _scan(temp_dir).root_digest
+
+    def test_change_propagates_to_root_only_along_path(self, temp_dir):
+        """后代变化向上传导，兄弟子树哈希保持不变"""
+        _touch(os.path.join(temp_dir, 'a', 'x.pt'))
+        _touch(os.path.join(temp_dir, 'b', 'y.pt'))
+        old = _scan(temp_dir)
+        _touch(os.path.join(temp_dir, 'a', 'x.pt'), 'changed')
+        new = _scan(temp_dir)
+
+        assert old.root_digest != new.root_digest
+        assert old.tree['a'].digest != new.tree['a'].digest
+        assert old.tree['b'].digest == new.tree['b'].digest
+
+    def test_diff_descends_only_into_changed_subtrees(self, temp_dir):
+        """比较时只返回变化子树中的条目"""
+        _touch(os.path.join(temp_dir, 'a', 'x.pt'))
+        for i in range(20):
+            _touch(os.path.join(temp_dir, 'b', f'{i}.pt'))
+        old = _scan(temp_dir)
+        _touch(os.path.join(temp_dir, 'a', 'new.pt'))
+        _touch(os.path.join(temp_dir, 'c', 'deep', 'z.pt'))
+        os.remove(os.path.join(temp_dir, 'a', 'x.pt'))
+        new = _scan(temp_dir)
+
+        added, removed, common = diff_snapshots(old, new)
+        assert sorted(added) == sorted([
+            os.path.join('a', 'new.pt'),
+            os.path.join('c', 'deep', 'z.pt'),
+        ])
+        assert removed == [os.path.join('a', 'x.pt')]
+        # 未变化的子树 b 不参与比较
+        assert not any(p.startswith('b') for p in common)
+
+
+class TestRollups:
+    """目录汇总测试"""
+
+    def test_rollup_delta_by_top_level_dir(self, temp_dir):
+        """按一级目录汇总文件数与字节变化"""
+        _touch(os.path.join(temp_dir, 'runs', 'exp1', 'a.pt'), 'x' * 10)
+        _touch(os.path.join(temp_dir, 'root.txt'), 'x')
+        scanner = DirectoryScanner(temp_dir, PathMatcher(), rollup_depth=1)
+        old = scanner.scan()
+        assert old.rollups['runs'] == [1, 10]
+        assert old.rollups['.'] == [1, 1]
+
+        _touch(os.path.join(temp_dir, 'runs', 'exp2', 'b.pt'), 'x' * 30)
+        _touch(os.path.join(temp_dir, 'runs', 'exp2', 'c.pt'), 'x' * 5)
+        os.remove(os.path.join(temp_dir, 'root.txt'))
+        new = scanner.scan()
+
+        assert diff_rollups(old, new) == [
+            {"path": "runs", "files": 2, "bytes": 35},
+            {"path": ".", "files": -1, "bytes": -1},
+        ]
+
+    def test_rollup_depth_two(self, temp_dir):
+        """汇总层级为 2 时按二级目录区分"""
+        _touch(os.path.join(temp_dir, 'runs', 'exp1', 'deep', 'a.pt'))
+        _touch(os.path.join(temp_dir, 'runs', 'exp2', 'b.pt'))
+        snapshot = DirectoryScanner(temp_dir, PathMatcher(), rollup_depth=2).scan()
+        assert set(snapshot.rollups) >= {'runs/exp1', 'runs/exp2'}
+        assert snapshot.rollups['runs/exp1'] == [1, 1]
@@ -0,0 +1,154 @@
+# -*- coding: utf-8 -*-
+"""
+内容哈希测试
+
+测试 file_hasher 模块以及目录监控的内容哈希模式。
+"""
+
+import os
+import time
+
+from core.utils.file_hasher import ContentHasher, HashCache, RateLimiter
+from core.monitor.directory_monitor import DirectoryMonitor
+
+
+def _write(path, content):
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(content)
+
+
+class TestHashCache:
+    """哈希缓存测试"""
+
+    def test_cache_persist_and_reload(self, temp_dir):
+        """缓存可以写回磁盘并重新加载"""
+        cache_path = os.path.join(temp_dir, 'cache.json')
+        cache = HashCache(cache_path)
+        cache.put((1, 2, 3, 4), 5, 'abc')
+        cache.save()
+
+        reloaded = HashCache(cache_path)
+        assert reloaded.get((1, 2, 3, 4), 5) == 'abc'
+        # ctime 不一致视为失效
+        assert reloaded.get((1, 2, 3, 4), 6) is None
+
+    def test_hash_many_uses_cache(self, temp_dir):
+        """命中缓存的文件不会被重新读取"""
+        path = os.path.join(temp_dir, 'a.bin')
+        _write(path, 'x' * 1000)
+        st = os.stat(path)
+        key = (st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns)
+
+        hasher = ContentHasher(workers=2)
+        first = hasher.hash_many([(path, key, st.st_ctime_ns)])
+        assert hasher.bytes_read == 1000
+        second = hasher.hash_many([(path, key, st.st_ctime_ns)])
+        assert second == first
+        assert hasher.bytes_read == 1000
+
+    def test_rate_limiter_paces_reads(self):
+        """限速器按预算推迟读取"""
+        limiter = RateLimiter(mb_per_sec=1)
+        start = time.monotonic()
+        limiter.consume(256 * 1024)
+        limiter.consume(256 * 1024)
+        assert time.monotonic() - start >= 0.2
+
+    def test_rate_limit_charges_actual_bytes(self, temp_dir):
+        """限速按实际读取的字节计费，小文件不占用整块额度"""
+        items = []
+        for i in range(20):
+            path = os.path.join(temp_dir, f'{i}.txt')
+            _write(path, 'x' * 150)
+            st = os.stat(path)
+            items.append((path, (st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns), st.st_ctime_ns))
+
+        hasher = ContentHasher(workers=1, rate_limit_mb=1)
+        start = time.monotonic()
+        digests = hasher.hash_many(items)
+        assert len(digests) == 20
+        assert hasher.bytes_read == 3000
+        # 3000 字节在 1 MB/s 下约 3 毫秒；按整块计费则需要 20 秒以上
+        assert time.monotonic() - start < 1
+
+
+class TestDirectoryContentHash:
+    """目录监控内容哈希模式测试"""
+
+    def test_touch_only_not_reported(self, temp_dir):
+        """仅修改时间变化的文件不视为修改"""
+        os.makedirs(os.path.join(temp_dir, 'data'))
+        path = os.path.join(temp_dir, 'data', 'ckpt.pt')
+        _write(path, 'weights')
+        monitor = DirectoryMonitor({
+            'check_directory_enabled': True,
+            'check_directory_path': os.path.join(temp_dir, 'data'),
+            'check_directory_detect_added': False,
+            'check_directory_detect_modified': True,
+            'check_directory_recheck_delay': 0,
+            'check_directory_content_hash': True,
+            'check_directory_hash_cache_path': os.path.join(temp_dir, 'cache.json'),
+            'check_directory_report_path': os.path.join(temp_dir, 'report.txt'),
+        })
+        monitor.check()
+
+        st = os.stat(path)
+        os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 5_000_000_000))
+        triggered, _, _ = monitor.check()
+        assert triggered is False
+
+    def test_rewrite_with_preserved_mtime_detected(self, temp_dir):
+        """保留修改时间的同尺寸重写可以被发现"""
+        os.makedirs(os.path.join(temp_dir, 'data'))
+        path = os.path.join(temp_dir, 'data', 'ckpt.pt')
+        _write(path, 'aaaa')
+        monitor = DirectoryMonitor({
+            'check_directory_enabled': True,
+            'check_directory_path': os.path.join(temp_dir, 'data'),
+            'check_directory_detect_added': False,
+            'check_directory_detect_modified': True,
+            'check_directory_recheck_delay': 0,
+            'check_directory_content_hash': True,
+            'check_directory_hash_cache_path': os.path.join(temp_dir, 'cache.json'),
+            'check_directory_report_path': os.path.join(temp_dir, 'report.txt'),
+        })
+        monitor.check()
+
+        st = os.stat(path)
+        time.sleep(0.01)
+        _write(path, 'bbbb')
+        os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns))
+        triggered, method, _ = monitor.check()
+        assert triggered is True
+        assert method == "目录变化检测"
+        assert monitor.get_report_data()['modified_count'] == 1
+
+    def test_baseline_hashing_follows_scan_budget(self, temp_dir):
+        """设置扫描预算时基线摘要逐轮补齐，新增文件不会在触发时整体读取"""
+        data = os.path.join(temp_dir, 'data')
+        os.makedirs(data)
+        for i in range(4):
+            _write(os.path.join(data, f'{i}.pt'), 'x' * 1000)
+        config = {
+            'check_directory_enabled': True,
+            'check_directory_path': data,
+            'check_directory_detect_modified': True,
+            'check_directory_recheck_delay': 0,
+            'check_directory_content_hash': True,
+            'check_directory_hash_cache_path': os.path.join(temp_dir, 'cache.json'),
+            'check_directory_report_path': os.path.join(temp_dir, 'report.txt'),
+            'check_directory_scan_entry_budget': 1,
+        }
+        monitor = DirectoryMonitor(config)
+        while not monitor._initialized:
+            monitor.check()
+        assert monitor._hasher.bytes_read == 0
+
+        reads = []
+        for _ in range(6):
+            before = monitor._hasher.bytes_read
+            monitor.check()
+            reads.append(monitor._hasher.bytes_read - before)
+        assert max(reads) <= 1000
+        assert sum(reads) == 4000
+        assert all(info.digest for info in monitor._last_snapshot.files.values() if not info.is_dir)
@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+"""
+GPU 时间序列测试
+"""
+
+import pytest
+
+from core.utils.gpu_series import RingBuffer, GpuTimeSeries
+
+
+class TestRingBuffer:
+    """环形缓冲区测试"""
+
+    def test_overwrites_oldest_and_keeps_running_mean(self):
+        """写满后覆盖最旧的值，滑动均值随之更新"""
+        buffer = RingBuffer(3)
+        for value in [1, 2, 3, 4]:
+            buffer.push(value)
+        assert buffer.values() == [2.0, 3.0, 4.0]
+        assert buffer.mean() == pytest.approx(3.0)
+        assert buffer.full
+
+    def test_percentile(self):
+        """最近邻秩法分位数"""
+        buffer = RingBuffer(20)
+        for value in range(1, 21):
+            buffer.push(value)
+        assert buffer.percentile(95) == 19.0
+        assert buffer.percentile(100) == 20.0
+
+
+class TestGpuTimeSeries:
+    """多 GPU 时间序列测试"""
+
+    def test_per_gpu_stats_and_ewma(self):
+        """按 GPU 分别统计，EWMA 增量更新"""
+        series = GpuTimeSeries(capacity=2, alpha=0.5)
+        series.extend([{0: 10.0, 1: 100.0}, {0: 20.0, 1: None}])
+        assert series.stats("mean") == {0: 15.0, 1: 100.0}
+        assert series.stat(0, "ewma") == pytest.approx(15.0)
+        assert series.is_full(0) and not series.is_full(1)
+
+
+class TestGpuConditions:
+    """组合条件编译测试"""
+
+    def test_compile_units_and_aliases(self):
+        """单位换算与指标别名"""
+        from core.utils.gpu import GpuReading
+        from core.utils.gpu_conditions import compile_gpu_rule
+        rule = compile_gpu_rule("utilization.gpu < 5% && mem <= 1.5GB and temp < 60")
+        assert [(c.attr, c.op, c.value) for c in rule.conditions] == [
+            ("util_percent", "<", 5.0), ("memory_used_mb", "<=", 1536.0), ("temperature_c", "<", 60.0)]
+        assert rule.matches(GpuReading(index=0, util_percent=1, memory_used_mb=1000, temperature_c=40))
+        assert not rule.matches(GpuReading(index=0, util_percent=1, memory_used_mb=1000))
+
+    def test_rejects_bad_expressions(self):
+        """无法解析或单位不匹配时报错"""
+        from core.utils.gpu_conditions import compile_gpu_rule
+        for spec in ["fan < 5", "power < 1GB", "util <", ""]:
+            with pytest.raises(ValueError):
+                compile_gpu_rule(spec)
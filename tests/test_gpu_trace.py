@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+"""
+GPU 采样回放测试
+"""
+
+import pytest
+
+from core.monitor import GpuMonitor
+from core.utils.gpu import get_gpu_sampler, get_nvml_backend, set_nvml_backend
+from core.utils.gpu_trace import TraceReplayBackend, parse_trace
+
+TRACE = """timestamp, index, power.draw [W], utilization.gpu [%], memory.used [MiB]
+2024/05/01 10:00:00.000, 0, 280.50 W, 97 %, 30000 MiB
+2024/05/01 10:00:00.000, 1, 275.00 W, 95 %, 29000 MiB
+2024/05/01 10:00:02.000, 0, 70.00 W, 0 %, 500 MiB
+2024/05/01 10:00:02.000, 1, [N/A], 0 %, 500 MiB
+2024/05/01 10:00:04.000, 0, 69.00 W, 0 %, 500 MiB
+2024/05/01 10:00:04.000, 1, 68.00 W, 1 %, 400 MiB
+""".splitlines()
+
+
+class TestParseTrace:
+    """采样记录解析测试"""
+
+    def test_groups_rows_by_timestamp_and_strips_units(self):
+        frames = parse_trace(TRACE)
+        assert [offset for offset, _ in frames] == [0.0, 2.0, 4.0]
+        first = frames[0][1]
+        assert [(r.index, r.power_w, r.util_percent, r.memory_used_mb) for r in first] == [
+            (0, 280.5, 97.0, 30000.0), (1, 275.0, 95.0, 29000.0)]
+        assert frames[1][1][1].power_w is None
+
+    def test_without_timestamp_uses_interval(self):
+        """没有时间戳时，GPU 编号重复出现即开始新的一轮"""
+        lines = ["index, power.draw", "0, 10", "1, 11", "0, 12", "1, 13"]
+        frames = parse_trace(lines, interval=0.5)
+        assert [offset for offset, _ in frames] == [0.0, 0.5]
+        assert [r.power_w for r in frames[1][1]] == [12.0, 13.0]
+
+    def test_requires_index_column(self):
+        with pytest.raises(ValueError):
+            parse_trace(["power.draw [W]", "10 W"])
+
+
+class TestTraceReplayBackend:
+    """回放后端测试"""
+
+    def test_replays_at_accelerated_speed(self):
+        """按倍速映射到采样时间，结束后停留在最后一轮"""
+        now = [100.0]
+        backend = TraceReplayBackend(TRACE, speed=2.0, clock=lambda: now[0])
+        assert backend.read()[0].power_w == 280.5
+        now[0] += 1.0  # 回放 2 秒
+        assert backend.read()[0].power_w == 70.0
+        now[0] += 10.0
+        assert backend.read()[0].power_w == 69.0
+        assert backend.finished
+
+    def test_step_mode_loops(self):
+        backend = TraceReplayBackend(TRACE, speed=0, loop=True)
+        powers = [backend.read()[0].power_w for _ in range(4)]
+        assert powers == [280.5, 70.0, 69.0, 280.5]
+
+    def test_drives_gpu_monitor_conditions(self):
+        """回放驱动组合条件判定，不调用 nvidia-smi"""
+        previous = set_nvml_backend(TraceReplayBackend(TRACE, speed=0))
+        try:
+            monitor = GpuMonitor({
+                'check_gpu_power_enabled': True,
+                'check_gpu_power_consecutive_checks': 2,
+                'check_gpu_conditions': "util < 5% and memory < 1GB",
+            })
+            assert [monitor.check()[0] for _ in range(3)] == [False, False, True]
+        finally:
+            set_nvml_backend(previous)
+
+    def test_monitor_installs_trace_from_config(self, tmp_path):
+        """配置的采样回放只作用于该监控器，不替换共享的后端与采样器"""
+        trace = tmp_path / "trace.csv"
+        trace.write_text("\n".join(TRACE), encoding="utf-8")
+        backend, sampler = get_nvml_backend(), get_gpu_sampler()
+        monitor = GpuMonitor({
+            'check_gpu_power_enabled': True,
+            'check_gpu_trace_path': str(trace),
+            'check_gpu_trace_speed': 0,
+        })
+        assert isinstance(monitor.sampler.backend, TraceReplayBackend)
+        assert monitor.sampler is not sampler
+        assert get_nvml_backend() is backend
+        assert get_gpu_sampler() is sampler
+        assert monitor.check()[0] is False
+        assert monitor.sampler.backend.reads == 1
@@ -120,6 +120,8 @@ class TestBackwardCompatibility:
         assert callable(monitor.send_notification)
         assert callable(monitor.get_gpu_info)
         assert callable(monitor.start_monitoring)
+        assert monitor.get_monitor("HTTP轮询监控") is not None
+        assert monitor.get_monitor("不存在的监控器") is None
     
     def test_config_structure(self, temp_config_file):
         """测试配置结构保持一致"""
@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+"""
+JSON 路径断言测试
+"""
+
+import pytest
+
+from core.utils.json_path import compile_json_assertion
+
+
+class TestJsonAssertion:
+    """JSON 路径断言编译与求值测试"""
+
+    DOC = {
+        "jobs": [{"state": "SUCCEEDED", "id": 1}, {"state": "SUCCEEDED", "id": 2}],
+        "progress": 1.0,
+        "done": True,
+        "meta": {"run name": "exp-1", "stages": {"a": 3, "b": 5}},
+    }
+
+    def test_paths_and_operators(self):
+        """字段、下标、通配与各比较运算符"""
+        cases = [
+            ('$.jobs[*].state == "SUCCEEDED"', True),
+            ("$.jobs[0].state == 'SUCCEEDED'", True),
+            ("$.jobs[-1].id > 1", True),
+            ("$.jobs[*].id > 1", False),
+            ("$.progress >= 1.0", True),
+            ("$.progress < 1", False),
+            ("$['meta']['run name'] != \"exp-2\"", True),
+            ("$.meta.stages.* <= 5", True),
+            ("$.done", True),
+            ("$.done == true", True),
+        ]
+        for text, expected in cases:
+            assert compile_json_assertion(text).evaluate(self.DOC) is expected, text
+
+    def test_missing_path_and_type_mismatch(self):
+        """路径不存在、类型不可比较、布尔与数字混比时不满足"""
+        assert compile_json_assertion("$.missing == 1").evaluate(self.DOC) is False
+        assert compile_json_assertion("$.jobs[5].state").evaluate(self.DOC) is False
+        assert compile_json_assertion('$.progress > "a"').evaluate(self.DOC) is False
+        assert compile_json_assertion("$.done == 1").evaluate(self.DOC) is False
+        assert compile_json_assertion("$.jobs[*].state").evaluate({"jobs": []}) is False
+
+    def test_invalid_expressions(self):
+        """格式错误时编译阶段报错"""
+        for text in ["jobs.state == 1", "$.a = 1", "$.a == ", "$.a == done", "$.a[x] == 1"]:
+            with pytest.raises(ValueError):
+                compile_json_assertion(text)
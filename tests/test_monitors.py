@@ -6,12 +6,15 @@
 """
 
 import os
+import json
+import time
 import pytest
 import tempfile
 from unittest.mock import patch, MagicMock
 
 from core.monitor import FileMonitor, LogMonitor, GpuMonitor, MonitorManager
 from core.monitor.directory_monitor import DirectoryMonitor
+from core.monitor.disk_monitor import DiskMonitor
 
 
 class TestFileMonitor:
@@ -403,3 +406,757 @@ class TestDirectoryMonitor:
         monitor.reset()
         assert monitor._initialized is False
         assert monitor._last_snapshot is None
+    
+    def test_directory_monitor_budgeted_scan_resumes(self, temp_dir):
+        """测试分片扫描：预算用尽时保留游标，扫完一遍才比较"""
+        for i in range(5):
+            with open(os.path.join(temp_dir, f'f{i}.txt'), 'w') as f:
+                f.write('x')
+        config = {
+            'check_directory_enabled': True,
+            'check_directory_path': temp_dir,
+            'check_directory_recheck_delay': 0,
+            'check_directory_scan_entry_budget': 2,
+            'check_directory_report_path': os.path.join(temp_dir, 'report.txt'),
+        }
+        monitor = DirectoryMonitor(config)
+        
+        # 5 个条目，每次最多处理 2 个：前两次仍在初始化
+        assert monitor.check()[1] == "初始化中"
+        assert monitor.check()[1] == "初始化中"
+        assert monitor.check()[1] == "初始化中"
+        assert monitor._initialized is True
+        assert len(monitor._last_snapshot.files) == 5
+        
+        with open(os.path.join(temp_dir, 'new.pt'), 'w') as f:
+            f.write('x')
+        
+        results = [monitor.check() for _ in range(3)]
+        assert [r[1] for r in results[:2]] == ["扫描中", "扫描中"]
+        triggered, method, _ = results[2]
+        assert triggered is True
+        assert method == "目录变化检测"
+    
+    def test_directory_monitor_rename_reported_as_moved(self, temp_dir):
+        """测试重命名被合并为一条移动记录"""
+        data_dir = os.path.join(temp_dir, 'data')
+        os.makedirs(data_dir)
+        with open(os.path.join(data_dir, 'ckpt_tmp'), 'w') as f:
+            f.write('weights')
+        config = {
+            'check_directory_enabled': True,
+            'check_directory_path': data_dir,
+            'check_directory_detect_removed': True,
+            'check_directory_detect_moved': True,
+            'check_directory_recheck_delay': 0,
+            'check_directory_report_path': os.path.join(temp_dir, 'report.txt'),
+        }
+        monitor = DirectoryMonitor(config)
+        monitor.check()
+        
+        os.rename(os.path.join(data_dir, 'ckpt_tmp'), os.path.join(data_dir, 'ckpt_final'))
+        triggered, _, report = monitor.check()
+        
+        assert triggered is True
+        data = monitor.get_report_data()
+        assert data['moved_count'] == 1
+        assert data['added_count'] == 0
+        assert data['removed_count'] == 0
+        assert data['moved_files'][0]['old_path'] == 'ckpt_tmp'
+        assert data['moved_files'][0]['path'] == 'ckpt_final'
+        assert "ckpt_tmp -> ckpt_final" in report
+    
+    def test_directory_monitor_moved_disabled_by_default(self, temp_dir):
+        """未开启移动检测时，重命名仍按新增/删除报告"""
+        data_dir = os.path.join(temp_dir, 'data')
+        os.makedirs(data_dir)
+        with open(os.path.join(data_dir, 'ckpt_tmp'), 'w') as f:
+            f.write('weights')
+        monitor = DirectoryMonitor({
+            'check_directory_enabled': True,
+            'check_directory_path': data_dir,
+            'check_directory_recheck_delay': 0,
+            'check_directory_report_path': os.path.join(temp_dir, 'report.txt'),
+        })
+        monitor.check()
+        
+        os.rename(os.path.join(data_dir, 'ckpt_tmp'), os.path.join(data_dir, 'ckpt_final'))
+        monitor.check()
+        data = monitor.get_report_data()
+        assert data['moved_count'] == 0
+        assert data['added_count'] == 1
+    
+    def test_directory_monitor_report_bounded_with_exact_counts(self, temp_dir):
+        """测试报告只保留前 N 项，数量统计保持精确，完整明细写入 JSONL"""
+        data_dir = os.path.join(temp_dir, 'data')
+        os.makedirs(data_dir)
+        report_path = os.path.join(temp_dir, 'report.jsonl')
+        config = {
+            'check_directory_enabled': True,
+            'check_directory_path': data_dir,
+            'check_directory_recheck_delay': 0,
+            'check_directory_report_path': report_path,
+            'check_directory_report_format': 'jsonl',
+            'check_directory_report_max_items': 2,
+        }
+        monitor = DirectoryMonitor(config)
+        monitor.check()
+        
+        for i in range(6):
+            with open(os.path.join(data_dir, f'f{i}.bin'), 'w') as f:
+                f.write('x' * (i + 1))
+        triggered, _, report = monitor.check()
+        
+        assert triggered is True
+        data = monitor.get_report_data()
+        assert data['added_count'] == 6
+        assert data['added_bytes'] == sum(range(1, 7))
+        assert data['truncated'] is True
+        assert [f['name'] for f in data['added_files']] == ['f5.bin', 'f4.bin']
+        assert "另有 4 项" in report
+        
+        with open(report_path, encoding='utf-8') as f:
+            records = [json.loads(line) for line in f]
+        assert len(records) == 6
+        assert all(r['type'] == 'added' for r in records)
+    
+    def test_directory_monitor_report_rollup(self, temp_dir):
+        """测试报告包含按一级子目录汇总的变化"""
+        data_dir = os.path.join(temp_dir, 'data')
+        os.makedirs(os.path.join(data_dir, 'exp42'))
+        config = {
+            'check_directory_enabled': True,
+            'check_directory_path': data_dir,
+            'check_directory_recheck_delay': 0,
+            'check_directory_report_path': os.path.join(temp_dir, 'report.txt'),
+        }
+        monitor = DirectoryMonitor(config)
+        monitor.check()
+        
+        for i in range(3):
+            with open(os.path.join(data_dir, 'exp42', f'ckpt{i}.pt'), 'w') as f:
+                f.write('x' * 1024)
+        triggered, _, report = monitor.check()
+        
+        assert triggered is True
+        data = monitor.get_report_data()
+        assert data['rollup'][0]['path'] == 'exp42'
+        assert data['rollup'][0]['files'] == 3
+        assert data['rollup_text'] == "exp42: +3 文件, +3.0 KB"
+        assert "exp42: +3 文件" in report
+    
+    def test_directory_monitor_quiescence_fires_after_stable_window(self, temp_dir):
+        """测试静默模式：活动之后持续静默才触发，且空闲时不做完整扫描"""
+        data_dir = os.path.join(temp_dir, 'data')
+        os.makedirs(data_dir)
+        config = {
+            'check_directory_enabled': True,
+            'check_directory_path': data_dir,
+            'check_directory_quiet_seconds': 0.2,
+            'check_directory_report_path': os.path.join(temp_dir, 'report.txt'),
+        }
+        monitor = DirectoryMonitor(config)
+        monitor.check()
+        assert monitor.check()[0] is False
+        passes = monitor._scanner.passes
+        
+        # 空闲时只做廉价探测
+        monitor.check()
+        assert monitor._scanner.passes == passes
+        
+        path = os.path.join(data_dir, 'out.bin')
+        with open(path, 'w') as f:
+            f.write('x')
+        assert monitor.check()[1] == "等待静默"
+        
+        # 原地追加写入不会改变目录 mtime，依靠热文件探测
+        with open(path, 'a') as f:
+            f.write('yyyy')
+        time.sleep(0.15)
+        assert monitor.check()[1] == "等待静默"
+        time.sleep(0.1)
+        assert monitor.check()[1] == "等待静默"
+        
+        time.sleep(0.25)
+        triggered, method, _ = monitor.check()
+        assert triggered is True
+        assert method == "目录变化检测"
+        assert monitor.get_report_data()['added_files'][0]['size'] == 5
+        assert monitor.check()[0] is False
+    
+    def test_directory_monitor_quiescence_rescan_finds_in_place_write(self, temp_dir):
+        """测试静默模式兜底重扫：原地改写非热文件也能被发现"""
+        data_dir = os.path.join(temp_dir, 'data')
+        os.makedirs(data_dir)
+        path = os.path.join(data_dir, 'ckpt.pt')
+        with open(path, 'w') as f:
+            f.write('aaaa')
+        config = {
+            'check_directory_enabled': True,
+            'check_directory_path': data_dir,
+            'check_directory_detect_modified': True,
+            'check_directory_quiet_seconds': 0.1,
+            'check_directory_quiet_rescan_seconds': 0.1,
+            'check_directory_report_path': os.path.join(temp_dir, 'report.txt'),
+        }
+        monitor = DirectoryMonitor(config)
+        monitor.check()
+        assert monitor.check()[0] is False
+        
+        st = os.stat(path)
+        with open(path, 'r+') as f:
+            f.write('bbbbbb')
+        os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+        assert monitor.check()[1] == "未完成"
+        
+        time.sleep(0.15)
+        assert monitor.check()[1] == "等待静默"
+        time.sleep(0.15)
+        triggered, _, _ = monitor.check()
+        assert triggered is True
+        assert monitor.get_report_data()['modified_count'] == 1
+    
+    def test_directory_monitor_multiple_roots(self, temp_dir):
+        """测试多根目录：各自的规则与检查间隔，报告按根目录合并"""
+        root_a = os.path.join(temp_dir, 'a')
+        root_b = os.path.join(temp_dir, 'b')
+        root_c = os.path.join(temp_dir, 'c')
+        for root in (root_a, root_b, root_c):
+            os.makedirs(root)
+        config = {
+            'check_directory_enabled': True,
+            'check_directory_recheck_delay': 0,
+            'check_directory_report_path': os.path.join(temp_dir, 'report.txt'),
+            'check_directory_roots': [
+                root_a,
+                {'path': root_b, 'exclude_keywords': ['*.tmp']},
+                {'path': root_c, 'interval': 3600},
+            ],
+        }
+        monitor = DirectoryMonitor(config)
+        assert len(monitor.roots) == 3
+        assert monitor.roots[1].exclude_keywords == ['*.tmp']
+        assert monitor.roots[0].report_sink is monitor.roots[1].report_sink
+        assert monitor.report_sink is None
+        monitor.check()
+        
+        for root, name in ((root_a, 'x.pt'), (root_b, 'x.pt'), (root_b, 'z.tmp'), (root_c, 'w.pt')):
+            with open(os.path.join(root, name), 'w') as f:
+                f.write('x')
+        triggered, method, _ = monitor.check()
+        
+        assert triggered is True
+        assert method == "目录变化检测"
+        data = monitor.get_report_data()
+        # c 的检查间隔未到，b 中的 .tmp 被排除
+        assert data['added_count'] == 2
+        assert set(data['roots']) == {root_a, root_b}
+        assert {f['root'] for f in data['added_files']} == {root_a, root_b}
+        # 不同根目录下的同名文件以根目录前缀区分
+        assert {f['path'] for f in data['added_files']} == {
+            os.path.join(root_a, 'x.pt'), os.path.join(root_b, 'x.pt')
+        }
+        
+        # 只重置触发过的根目录
+        monitor.reset()
+        assert monitor.roots[0]._initialized is False
+        assert monitor.roots[2]._initialized is True
+
+
+class TestDiskMonitor:
+    """磁盘空间监控器测试"""
+    
+    GB = 1024 ** 3
+    
+    def test_disk_monitor_disabled_without_paths(self):
+        """测试未配置路径时不启用"""
+        monitor = DiskMonitor({'check_disk_enabled': True})
+        assert monitor.enabled is False
+    
+    def test_disk_monitor_threshold_trigger(self):
+        """测试使用率达到阈值时触发"""
+        monitor = DiskMonitor({
+            'check_disk_enabled': True,
+            'check_disk_paths': ['/data'],
+            'check_disk_usage_threshold': 95,
+        })
+        with patch('core.monitor.disk_monitor.read_disk_usage', return_value=(96 * self.GB, 4 * self.GB, 100 * self.GB)):
+            triggered, method, detail = monitor.check()
+        
+        assert triggered is True
+        assert method == "磁盘空间检测"
+        assert "96.0%" in detail
+    
+    def test_disk_monitor_predicts_time_to_full(self):
+        """测试按增长趋势预测写满时间"""
+        monitor = DiskMonitor({
+            'check_disk_enabled': True,
+            'check_disk_paths': ['/data'],
+            'check_disk_usage_threshold': 95,
+            'check_disk_full_within_hours': 6,
+            'check_disk_min_samples': 3,
+        })
+        # 每小时增长 10 GB，剩余 40 GB 时约 4 小时写满
+        clock = iter([0.0, 1800.0, 3600.0])
+        results = []
+        with patch('core.monitor.disk_monitor.time.monotonic', side_effect=lambda: next(clock)):
+            for used, avail, total in [(50, 50, 100), (55, 45, 100), (60, 40, 100)]:
+                with patch('core.monitor.disk_monitor.read_disk_usage',
+                           return_value=(used * self.GB, avail * self.GB, total * self.GB)):
+                    results.append(monitor.check())
+        
+        # 采样不足时不做预测
+        assert results[0][0] is False
+        assert results[1][0] is False
+        triggered, _, detail = results[2]
+        assert triggered is True
+        assert "预计 4.0 小时内写满" in detail
+        assert "增长 10.0 GB/小时" in detail
+        assert monitor.get_status()['/data']['hours_to_full'] == pytest.approx(4.0)
+    
+    def test_disk_monitor_reads_real_filesystem(self, temp_dir):
+        """测试对真实路径采样"""
+        monitor = DiskMonitor({
+            'check_disk_enabled': True,
+            'check_disk_paths': [temp_dir],
+            'check_disk_usage_threshold': 0,
+        })
+        triggered, _, _ = monitor.check()
+        assert triggered is False
+        assert monitor.get_status()[temp_dir]['total'] > 0
+
+
+class TestGpuWindowStats:
+    """GPU 功耗窗口统计判定测试"""
+    
+    def _run(self, monitor, powers):
+        results = []
+        for power in powers:
+            with patch('subprocess.check_output', return_value=f"0, {power}\n"):
+                results.append(monitor.check())
+        return results
+    
+    def test_single_spike_does_not_reset_idle_window(self):
+        """窗口均值判定：单个噪声采样不会打断空闲判断"""
+        monitor = GpuMonitor({
+            'check_gpu_power_enabled': True,
+            'check_gpu_power_threshold': 50.0,
+            'check_gpu_power_window_mode': 'mean',
+            'check_gpu_power_window_size': 4,
+        })
+        results = self._run(monitor, [20, 20, 120, 20])
+        assert [r[0] for r in results] == [False, False, False, True]
+        assert "mean 功耗 45.0W" in results[-1][2]
+    
+    def test_count_mode_resets_on_spike(self):
+        """默认连续计数模式保持原有行为"""
+        monitor = GpuMonitor({
+            'check_gpu_power_enabled': True,
+            'check_gpu_power_threshold': 50.0,
+            'check_gpu_power_window_mode': 'count',
+            'check_gpu_power_consecutive_checks': 4,
+        })
+        results = self._run(monitor, [20, 20, 120, 20])
+        assert not any(r[0] for r in results)
+        assert monitor.low_power_count == 1
+    
+    def test_hysteresis_keeps_latched_state(self):
+        """滞回区间内的波动不会退出满足状态"""
+        config = {
+            'check_gpu_power_enabled': True,
+            'check_gpu_power_threshold': 50.0,
+            'check_gpu_power_window_mode': 'ewma',
+            'check_gpu_power_ewma_alpha': 1.0,
+            'check_gpu_power_window_size': 3,
+        }
+        monitor = GpuMonitor(dict(config, check_gpu_power_hysteresis=10))
+        results = self._run(monitor, [40, 55, 58])
+        assert results[-1][0] is True
+        
+        monitor = GpuMonitor(config)
+        results = self._run(monitor, [40, 55, 58])
+        assert results[-1][0] is False
+    
+    def test_window_consumes_all_stream_samples(self):
+        """流式采样时，两次检查之间的每一轮采样都进入窗口"""
+        from core.utils.gpu import GpuReading, get_gpu_sampler
+        monitor = GpuMonitor({
+            'check_gpu_power_enabled': True,
+            'check_gpu_power_threshold': 50.0,
+            'check_gpu_power_window_mode': 'p95',
+            'check_gpu_power_window_size': 4,
+        })
+        sampler = get_gpu_sampler()
+        stream = MagicMock()
+        stream.samples = [(float(i + 1), [GpuReading(index=0, power_w=p)]) for i, p in enumerate([10, 12, 11, 13])]
+        stream.latest.return_value = stream.samples[-1][1]
+        sampler.stream = stream
+        
+        triggered, _, detail = monitor.check()
+        assert triggered is True
+        assert "p95 功耗 13.0W" in detail
+        # 没有新采样时窗口不变
+        assert monitor.check()[0] is True
+        assert len(monitor._series['power_w']._buffers[0]) == 4
+
+
+class TestGpuConditions:
+    """GPU 组合条件测试"""
+    
+    SMI_OUTPUT = "0, 72.00, NVIDIA H100, {mem}, 81559, 35, {util}\n"
+    
+    def test_idle_by_util_and_memory_despite_high_power(self):
+        """空闲时功耗仍高于阈值的显卡，可按利用率与显存判定"""
+        monitor = GpuMonitor({
+            'check_gpu_power_enabled': True,
+            'check_gpu_power_threshold': 50.0,
+            'check_gpu_power_consecutive_checks': 2,
+            'check_gpu_conditions': "util < 5% and memory < 1GB",
+        })
+        with patch('subprocess.check_output', return_value=self.SMI_OUTPUT.format(mem=512, util=0)) as mock:
+            assert monitor.check()[0] is False
+            assert monitor.check()[0] is True
+        # 每轮只有一次批量查询
+        assert mock.call_count == 2
+    
+    def test_any_failing_condition_resets_count(self):
+        """任一条件不满足即清零"""
+        monitor = GpuMonitor({
+            'check_gpu_power_enabled': True,
+            'check_gpu_power_consecutive_checks': 2,
+            'check_gpu_conditions': ["util < 5", "memory < 1GB"],
+        })
+        with patch('subprocess.check_output', return_value=self.SMI_OUTPUT.format(mem=512, util=0)):
+            monitor.check()
+        with patch('subprocess.check_output', return_value=self.SMI_OUTPUT.format(mem=4096, util=0)):
+            assert monitor.check()[0] is False
+        assert monitor.low_power_count == 0
+    
+    def test_window_mode_uses_per_metric_stats(self):
+        """窗口模式对每项指标分别取统计量"""
+        monitor = GpuMonitor({
+            'check_gpu_power_enabled': True,
+            'check_gpu_power_consecutive_checks': 2,
+            'check_gpu_conditions': "util < 5",
+            'check_gpu_power_window_mode': 'mean',
+            'check_gpu_power_window_size': 2,
+        })
+        outputs = [self.SMI_OUTPUT.format(mem=512, util=u) for u in (0, 8)]
+        with patch('subprocess.check_output', side_effect=outputs):
+            monitor.check()
+            triggered, _, detail = monitor.check()
+        assert triggered is True
+        assert "利用率 4.0%" in detail
+    
+    def test_invalid_conditions_never_trigger(self):
+        """无法解析的条件不回退到功耗阈值，检测不会触发"""
+        monitor = GpuMonitor({
+            'check_gpu_power_enabled': True,
+            'check_gpu_power_threshold': 100.0,
+            'check_gpu_power_consecutive_checks': 1,
+            'check_gpu_conditions': "util ~ 5",
+        })
+        assert monitor.rule is None
+        # 功耗低于阈值，回退到功耗判定时本会触发
+        with patch('subprocess.check_output', return_value=self.SMI_OUTPUT.format(mem=512, util=0)) as mock:
+            assert monitor.check() == (False, "条件配置无效", None)
+        mock.assert_not_called()
+
+
+class TestGpuProcessTracking:
+    """GPU 进程跟踪测试"""
+    
+    UUIDS = "0, GPU-aaa\n1, GPU-bbb\n"
+    
+    def _smi(self, apps):
+        """按查询参数返回 nvidia-smi 输出"""
+        def fake(args, **kwargs):
+            if args[1].startswith('--query-compute-apps'):
+                return apps.pop(0)
+            return self.UUIDS
+        return fake
+    
+    def test_triggers_after_tracked_process_releases_gpu(self):
+        """被跟踪进程消失后触发，其他用户的进程不影响判断"""
+        monitor = GpuMonitor({
+            'check_gpu_power_enabled': True,
+            'check_gpu_power_consecutive_checks': 1,
+            'check_gpu_process_names': ['train.py'],
+        })
+        other = "999, /opt/other/serve, GPU-bbb, 30000\n"
+        apps = [
+            "",  # 任务尚未启动
+            "1234, /home/me/train.py, GPU-aaa, 20000\n" + other,
+            other,
+        ]
+        with patch('subprocess.check_output', side_effect=self._smi(apps)) as mock:
+            assert monitor.check()[0] is False
+            assert monitor.check()[0] is False
+            triggered, method, detail = monitor.check()
+        assert triggered is True
+        assert method == "GPU进程检测"
+        assert "1234(/home/me/train.py)" in detail
+        # UUID 映射只查询一次
+        assert sum(1 for c in mock.call_args_list if '--query-gpu=index,uuid' in c.args[0]) == 1
+    
+    def test_pid_on_unselected_gpu_is_ignored(self):
+        """只关注指定 GPU 上的进程"""
+        monitor = GpuMonitor({
+            'check_gpu_power_enabled': True,
+            'check_gpu_power_gpu_ids': [1],
+            'check_gpu_power_consecutive_checks': 1,
+            'check_gpu_process_pids': "1234",
+        })
+        apps = ["1234, python, GPU-bbb, [N/A]\n", "1234, python, GPU-aaa, 100\n"]
+        with patch('subprocess.check_output', side_effect=self._smi(apps)):
+            assert monitor.check()[0] is False
+            assert monitor.check()[0] is True
+
+
+class _StatusHandler:
+    """本地 HTTP 服务，用于验证连接复用"""
+    
+    @staticmethod
+    def serve(body=b'{"state": "done"}', status=200, delay=0.0, etag=None, seen=None,
+              content_type="application/json"):
+        import threading
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+        
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            
+            def do_GET(self):
+                time.sleep(delay)
+                if seen is not None:
+                    seen.append(dict(self.headers))
+                if etag and self.headers.get("If-None-Match") == etag:
+                    self.send_response(304)
+                    self.send_header("ETag", etag)
+                    self.end_headers()
+                    return
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                if etag:
+                    self.send_header("ETag", etag)
+                self.end_headers()
+                self.wfile.write(body)
+            
+            def log_message(self, *args):
+                pass
+        
+        server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+
+
+class TestHttpMonitor:
+    """HTTP 轮询监控测试"""
+    
+    def test_session_reuses_connection(self):
+        """多轮检查复用同一连接，并记录耗时"""
+        from core.monitor.http_monitor import HttpMonitor
+        server = _StatusHandler.serve()
+        try:
+            monitor = HttpMonitor({
+                'check_http_enabled': True,
+                'check_http_url': f"http://127.0.0.1:{server.server_port}/status",
+                'check_http_expected_keywords': ['done'],
+            })
+            for _ in range(3):
+                assert monitor.check()[0] is True
+            status = monitor.get_status()
+            assert status["requests"] == 3
+            assert status["connections_opened"] == 1
+            assert status["last"]["bytes"] == len(b'{"state": "done"}')
+            assert "avg_wait_ms" in status
+            monitor.close()
+        finally:
+            server.shutdown()
+            server.server_close()
+    
+    def test_session_recreated_after_connection_error(self):
+        """连接失败后丢弃 Session，下次检查重建"""
+        from core.monitor.http_monitor import HttpMonitor
+        import requests
+        monitor = HttpMonitor({'check_http_enabled': True, 'check_http_url': 'http://127.0.0.1:9/status'})
+        session = monitor._get_session()
+        with patch.object(session, 'request', side_effect=requests.exceptions.ConnectionError()):
+            assert monitor.check() == (False, "连接失败", None)
+        assert monitor._session is None
+        assert monitor.get_status()["session_resets"] == 1
+        assert monitor._get_session() is not session
+
+    
+    def test_endpoints_polled_concurrently_with_quorum(self):
+        """多端点并发轮询，按 K-of-N 判定，每轮耗时约等于最慢请求"""
+        from core.monitor.http_monitor import HttpMonitor
+        servers = [_StatusHandler.serve(delay=0.3), _StatusHandler.serve(delay=0.3),
+                   _StatusHandler.serve(status=503, delay=0.3)]
+        try:
+            urls = [f"http://127.0.0.1:{s.server_port}/ready" for s in servers]
+            config = {
+                'check_http_enabled': True,
+                'check_http_endpoints': urls[:2] + [{"url": urls[2], "expected_status": 200}],
+                'check_http_expected_keywords': ['done'],
+                'check_http_quorum': 2,
+            }
+            monitor = HttpMonitor(config)
+            start = time.monotonic()
+            triggered, method, detail = monitor.check()
+            assert time.monotonic() - start < 0.8
+            assert triggered is True
+            assert detail.startswith("2/3 个端点满足条件")
+            
+            # 所有端点共享同一个连接池
+            assert len(monitor.get_status()["endpoints"]) == 3
+            assert monitor.check()[0] is True
+            assert monitor.get_status()["connections_opened"] == 3
+            
+            assert HttpMonitor(dict(config, check_http_quorum='all')).check()[0] is False
+            assert HttpMonitor(dict(config, check_http_quorum='any')).required == 1
+            monitor.close()
+        finally:
+            for server in servers:
+                server.shutdown()
+                server.server_close()
+
+    
+    def test_conditional_request_reuses_last_evaluation(self):
+        """带 ETag 的响应未变化时返回 304，沿用上次判定且不下载响应体"""
+        from core.monitor.http_monitor import HttpMonitor
+        seen = []
+        server = _StatusHandler.serve(body=b'{"state": "running"}', etag='"v1"', seen=seen)
+        try:
+            monitor = HttpMonitor({
+                'check_http_enabled': True,
+                'check_http_url': f"http://127.0.0.1:{server.server_port}/status",
+                'check_http_expected_keywords': ['done'],
+            })
+            assert monitor.check() == (False, "关键词不匹配", None)
+            with patch.object(monitor, '_evaluate') as evaluate:
+                assert monitor.check() == (False, "关键词不匹配", None)
+                evaluate.assert_not_called()
+            assert 'If-None-Match' not in seen[0]
+            assert seen[1]['If-None-Match'] == '"v1"'
+            status = monitor.get_status()
+            assert status["not_modified"] == 1
+            assert status["last"]["bytes"] == 0
+            
+            # reset 后重新下载
+            monitor.reset()
+            monitor.check()
+            assert 'If-None-Match' not in seen[2]
+            monitor.close()
+        finally:
+            server.shutdown()
+            server.server_close()
+    
+    def test_streaming_keyword_search_with_byte_cap(self):
+        """流式查找关键词：命中即停止读取，超过读取上限后放弃"""
+        from core.monitor.http_monitor import HttpMonitor
+        body = b"log line\n" * 200000 + b"training done\n"  # 约 1.7 MB
+        server = _StatusHandler.serve(body=b"done\n" + body)
+        try:
+            url = f"http://127.0.0.1:{server.server_port}/logs"
+            monitor = HttpMonitor({
+                'check_http_enabled': True,
+                'check_http_url': url,
+                'check_http_expected_keywords': ['done'],
+            })
+            assert monitor.check()[0] is True
+            assert monitor.get_status()["last"]["bytes"] < len(body)
+            monitor.close()
+        finally:
+            server.shutdown()
+            server.server_close()
+        
+        server = _StatusHandler.serve(body=body)
+        try:
+            url = f"http://127.0.0.1:{server.server_port}/logs"
+            monitor = HttpMonitor({
+                'check_http_enabled': True,
+                'check_http_url': url,
+                'check_http_expected_keywords': ['training done'],
+                'check_http_max_body_mb': 1,
+            })
+            assert monitor.check() == (False, "关键词不匹配", None)
+            last = monitor.get_status()["last"]
+            assert last["bytes"] == 1024 * 1024
+            assert last["truncated"] is True
+            
+            monitor.max_body_bytes = 4 * 1024 * 1024
+            assert monitor.check()[0] is True
+            monitor.close()
+        finally:
+            server.shutdown()
+            server.server_close()
+    
+    def test_json_assertions(self):
+        """JSON 断言：格式差异不影响判定，Content-Type 不符时不解码"""
+        from core.monitor.http_monitor import HttpMonitor
+        config = {
+            'check_http_enabled': True,
+            'check_http_json_assertions': ['$.jobs[*].state == "SUCCEEDED"', '$.progress >= 1.0'],
+        }
+        cases = [
+            (b'{"jobs":[{"state":"SUCCEEDED"},{"state":"SUCCEEDED"}],"progress":1.0}', "application/json", True),
+            (b'{"jobs": [{"state": "SUCCEEDED"}, {"state": "RUNNING"}], "progress": 1}', "application/json", "断言不满足"),
+            (b'{"jobs": [{"state": "SUCCEEDED"}], "progress": 1.0}', "text/plain", "内容类型不匹配"),
+            (b'{"jobs": [', "application/json", "JSON解析失败"),
+        ]
+        for body, content_type, expected in cases:
+            server = _StatusHandler.serve(body=body, content_type=content_type)
+            try:
+                monitor = HttpMonitor(dict(config, check_http_url=f"http://127.0.0.1:{server.server_port}/status"))
+                triggered, method, detail = monitor.check()
+                if expected is True:
+                    assert triggered is True
+                    assert '$.progress >= 1.0' in detail
+                else:
+                    assert (triggered, method) == (False, expected)
+                monitor.close()
+            finally:
+                server.shutdown()
+                server.server_close()
+        
+        monitor = HttpMonitor(dict(config, check_http_url="http://127.0.0.1:1/", check_http_json_assertions=['$.a ==']))
+        assert monitor._assertion_error is not None
+    
+    def test_body_reader_exact_limit_not_truncated(self):
+        """响应体恰好等于读取上限时不视为截断"""
+        from core.monitor.http_monitor import _BodyReader
+        
+        def reader(parts, limit):
+            response = MagicMock()
+            response.iter_content.return_value = iter(parts)
+            body = _BodyReader(response, limit)
+            return body, b"".join(body.chunks())
+        
+        body, data = reader([b"abcd", b"efgh"], 8)
+        assert (data, body.truncated, body.bytes_read) == (b"abcdefgh", False, 8)
+        body, data = reader([b"abcd", b"efgh", b"i"], 8)
+        assert (data, body.truncated, body.bytes_read) == (b"abcdefgh", True, 8)
+        body, data = reader([b"abcdef"], 4)
+        assert (data, body.truncated, body.bytes_read) == (b"abcd", True, 4)
+        body, data = reader([b"abcd", b"efgh"], 0)
+        assert (data, body.truncated, body.bytes_read) == (b"abcdefgh", False, 8)
+    
+    def test_zero_max_body_means_unlimited(self):
+        """check_http_max_body_mb 为 0 时不限制读取量"""
+        from core.monitor.http_monitor import HttpMonitor
+        server = _StatusHandler.serve(body=b"x" * 100000 + b" done")
+        try:
+            monitor = HttpMonitor({
+                'check_http_enabled': True,
+                'check_http_url': f"http://127.0.0.1:{server.server_port}/logs",
+                'check_http_expected_keywords': ['done'],
+                'check_http_max_body_mb': 0,
+            })
+            assert monitor.max_body_bytes == 0
+            assert monitor.check()[0] is True
+            assert monitor.get_status()["last"]["truncated"] is False
+            monitor.close()
+        finally:
+            server.shutdown()
+            server.server_close()
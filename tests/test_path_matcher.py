@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+"""
+路径匹配器测试
+
+测试 path_matcher 模块与目录扫描剪枝。
+"""
+
+import os
+
+from core.utils.path_matcher import PathMatcher, IGNORE_FILENAME, changed_keywords
+from core.monitor.directory_monitor import DirectoryMonitor
+
+
+class TestPathMatcher:
+    """PathMatcher 规则测试"""
+
+    def test_legacy_keyword_substring(self):
+        """旧版关键词：大小写不敏感的子串匹配"""
+        matcher = PathMatcher(["年报", "Temp"])
+        assert matcher.is_excluded("docs/2024年报.pdf")
+        assert matcher.is_excluded("a/temp_dir/x.txt")
+        assert not matcher.is_excluded("a/b/c.txt")
+
+    def test_legacy_keyword_with_backslash(self):
+        """旧版按 Windows 路径写的关键词仍能匹配以 / 分隔的相对路径"""
+        matcher = PathMatcher(["runs\\tmp"])
+        assert matcher.is_excluded("runs/tmp/a.pt")
+        assert matcher.should_descend("runs/tmp") is False
+        assert not matcher.is_excluded("runs/keep/a.pt")
+
+    def test_glob_basename(self):
+        """不含斜杠的 glob 匹配任意层级的文件名"""
+        matcher = PathMatcher(["*.tmp"])
+        assert matcher.is_excluded("x.tmp")
+        assert matcher.is_excluded("a/b/x.tmp")
+        assert not matcher.is_excluded("a/b/x.tmpl")
+
+    def test_anchored_and_dir_only(self):
+        """含斜杠的规则锚定到根目录，末尾斜杠仅匹配目录"""
+        matcher = PathMatcher(["/cache/", "logs/*.log"])
+        assert matcher.is_excluded("cache", is_dir=True)
+        assert not matcher.is_excluded("cache", is_dir=False)
+        assert not matcher.is_excluded("sub/cache", is_dir=True)
+        assert matcher.is_excluded("logs/train.log")
+        assert not matcher.is_excluded("sub/logs/train.log")
+
+    def test_double_star(self):
+        """** 匹配零或多级目录"""
+        matcher = PathMatcher(["**/ckpt_tmp/**"])
+        assert matcher.is_excluded("ckpt_tmp/a.pt")
+        assert matcher.is_excluded("runs/exp1/ckpt_tmp/a.pt")
+        assert not matcher.is_excluded("runs/exp1/ckpt/a.pt")
+
+    def test_negation_last_rule_wins(self):
+        """取反规则：后出现的规则优先"""
+        matcher = PathMatcher(["*.log", "!keep.log"])
+        assert matcher.is_excluded("a/train.log")
+        assert not matcher.is_excluded("a/keep.log")
+
+    def test_include_patterns(self):
+        """包含模式只作用于文件"""
+        matcher = PathMatcher([], ["*.pt", "*.safetensors"])
+        assert matcher.accepts_file("runs/model.pt")
+        assert matcher.accepts_file("model.safetensors")
+        assert not matcher.accepts_file("runs/events.out")
+        assert matcher.should_descend("runs")
+
+    def test_changed_keywords(self):
+        """含 / ! [ 的旧版关键词会被识别为含义变化"""
+        assert changed_keywords(["年报", "*.tmp", "/cache/", "!keep.log", "[v1]", "# /注释"]) == [
+            "/cache/", "!keep.log", "[v1]"
+        ]
+
+    def test_ignore_file(self, temp_dir):
+        """自动加载根目录下的 .tasknyaignore"""
+        with open(os.path.join(temp_dir, IGNORE_FILENAME), 'w', encoding='utf-8') as f:
+            f.write("# 注释\n\nwandb/\n*.lock\n")
+        matcher = PathMatcher.for_directory(temp_dir)
+        assert matcher.is_excluded("wandb", is_dir=True)
+        assert matcher.is_excluded("a/b.lock")
+        assert matcher.is_excluded(IGNORE_FILENAME)
+        assert not matcher.is_excluded("a/b.pt")
+
+
+class TestDirectoryScanPruning:
+    """目录扫描剪枝测试"""
+
+    def _touch(self, path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as f:
+            f.write('x')
+
+    def test_excluded_directory_not_descended(self, temp_dir):
+        """被排除目录内的文件不会出现在快照中"""
+        self._touch(os.path.join(temp_dir, 'keep', 'a.pt'))
+        self._touch(os.path.join(temp_dir, 'skip', 'deep', 'b.pt'))
+        config = {
+            'check_directory_enabled': True,
+            'check_directory_path': temp_dir,
+            'check_directory_exclude_keywords': ['/skip/'],
+        }
+        monitor = DirectoryMonitor(config)
+        monitor.check()
+        paths = set(monitor._last_snapshot.files)
+        assert os.path.join('keep', 'a.pt') in paths
+        assert not any(p.startswith('skip') for p in paths)
+
+    def test_scan_root_not_matched_by_keyword(self, temp_dir):
+        """关键词只匹配相对路径，不再误伤扫描根目录本身"""
+        root = os.path.join(temp_dir, 'report_root')
+        self._touch(os.path.join(root, 'a.txt'))
+        config = {
+            'check_directory_enabled': True,
+            'check_directory_path': root,
+            'check_directory_exclude_keywords': ['report_root'],
+        }
+        monitor = DirectoryMonitor(config)
+        monitor.check()
+        assert 'a.txt' in monitor._last_snapshot.files
+
+    def test_include_patterns_pushed_down(self, temp_dir):
+        """包含模式过滤非目标文件"""
+        self._touch(os.path.join(temp_dir, 'runs', 'model.pt'))
+        self._touch(os.path.join(temp_dir, 'runs', 'events.log'))
+        config = {
+            'check_directory_enabled': True,
+            'check_directory_path': temp_dir,
+            'check_directory_include_patterns': ['*.pt'],
+        }
+        monitor = DirectoryMonitor(config)
+        monitor.check()
+        assert set(monitor._last_snapshot.files) == {os.path.join('runs', 'model.pt')}
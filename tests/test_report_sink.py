@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+"""
+报告输出测试
+
+测试报告文件轮转、压缩、自身排除与按时间查询。
+"""
+
+import os
+import gzip
+import json
+
+from core.utils.report_sink import ReportSink
+from core.monitor.directory_monitor import DirectoryMonitor
+
+
+def _records(start, count):
+    return [{"ts": f"2024-01-01 00:{start + i:02d}:00", "n": start + i} for i in range(count)]
+
+
+class TestReportSink:
+    """轮转报告文件测试"""
+
+    def test_rotates_and_keeps_backup_count(self, temp_dir):
+        """超过大小上限时轮转，只保留指定数量的历史分段"""
+        path = os.path.join(temp_dir, 'report.jsonl')
+        sink = ReportSink(path, max_bytes=100, backup_count=2)
+        for i in range(5):
+            sink.write_records(_records(i * 3, 3))
+
+        assert len(sink.segments()) <= 3
+        assert os.path.exists(path + '.1')
+        assert os.path.exists(path + '.2')
+        assert not os.path.exists(path + '.3')
+
+    def test_compressed_segments_readable(self, temp_dir):
+        """压缩的历史分段可以被查询读取"""
+        path = os.path.join(temp_dir, 'report.jsonl')
+        sink = ReportSink(path, max_bytes=1, backup_count=3, compress=True)
+        sink.write_records(_records(0, 2))
+        sink.write_records(_records(2, 2))
+
+        assert os.path.exists(path + '.1.gz')
+        with gzip.open(path + '.1.gz', 'rt', encoding='utf-8') as f:
+            assert json.loads(f.readline())['n'] == 2
+        assert [r['n'] for r in sink.query()] == [0, 1, 2, 3]
+
+    def test_query_by_timestamp(self, temp_dir):
+        """按时间范围查询跨分段的记录"""
+        path = os.path.join(temp_dir, 'report.jsonl')
+        sink = ReportSink(path, max_bytes=300, backup_count=10)
+        for i in range(0, 60, 6):
+            sink.write_records(_records(i, 6))
+
+        found = [r['n'] for r in sink.query("2024-01-01 00:20:00", "2024-01-01 00:25:00")]
+        assert found == [20, 21, 22, 23, 24, 25]
+
+    def test_query_seeks_within_large_file(self, temp_dir):
+        """未轮转的大文件内按时间戳二分定位"""
+        path = os.path.join(temp_dir, 'report.jsonl')
+        sink = ReportSink(path)
+        sink.write_records(
+            {"ts": f"2024-01-01 {i // 60:02d}:{i % 60:02d}:00", "n": i} for i in range(1000)
+        )
+        found = [r['n'] for r in sink.query("2024-01-01 10:00:00", "2024-01-01 10:02:00")]
+        assert found == [600, 601, 602]
+
+    def test_exclude_rules_only_inside_scan_root(self, temp_dir):
+        """报告文件在扫描目录外时不生成排除规则"""
+        inside = ReportSink(os.path.join(temp_dir, 'data', 'r.txt'))
+        outside = ReportSink(os.path.join(temp_dir, 'r.txt'))
+        scan_root = os.path.join(temp_dir, 'data')
+        assert inside.exclude_rules(scan_root) == ['/r.txt', '/r.txt.*']
+        assert outside.exclude_rules(scan_root) == []
+
+
+class TestDirectoryMonitorReportSink:
+    """目录监控报告输出测试"""
+
+    def test_default_report_not_detected_as_change(self, temp_dir):
+        """扫描目录内的默认报告文件及其分段不会触发变化"""
+        config = {
+            'check_directory_enabled': True,
+            'check_directory_path': temp_dir,
+            'check_directory_recheck_delay': 0,
+            'check_directory_report_format': 'jsonl',
+            'check_directory_report_max_mb': 0.0001,
+        }
+        monitor = DirectoryMonitor(config)
+        monitor.check()
+
+        with open(os.path.join(temp_dir, 'a.pt'), 'w') as f:
+            f.write('x')
+        assert monitor.check()[0] is True
+        assert os.path.exists(os.path.join(temp_dir, 'tasknya_monitor_report.jsonl.1'))
+
+        # 报告写入与轮转产生的文件不会被当作新增
+        triggered, _, _ = monitor.check()
+        assert triggered is False
+        assert [r['name'] for r in monitor.query_reports()] == ['a.pt']
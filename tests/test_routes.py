@@ -11,6 +11,7 @@ import pytest
 import json
 import tempfile
 import shutil
+from unittest.mock import MagicMock, patch
 
 # 添加项目路径
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -185,3 +186,16 @@ class TestIndexRoute:
         html = response.data.decode('utf-8')
         # 应该包含 HTML 结构
         assert '<html' in html or '<!DOCTYPE' in html
+
+
+class TestMonitorStatusHttp:
+    """状态接口中的 HTTP 请求统计"""
+    
+    def test_status_includes_http_latency(self, app_client):
+        monitor = MagicMock()
+        monitor.enabled = True
+        monitor.get_status.return_value = {"requests": 2, "avg_wait_ms": 1.5}
+        state = app_client.application.monitor_state
+        with patch.object(state, 'get_monitor', return_value=monitor):
+            data = json.loads(app_client.get('/api/monitor/status').data)
+        assert data['http'] == {"requests": 2, "avg_wait_ms": 1.5}
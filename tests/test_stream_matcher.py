@@ -0,0 +1,36 @@
+# -*- coding: utf-8 -*-
+"""
+流式关键词匹配测试
+"""
+
+from core.utils.stream_matcher import StreamMatcher
+
+
+class TestStreamMatcher:
+    """流式关键词匹配器测试"""
+
+    def test_keyword_across_chunk_boundary(self):
+        """关键词被拆在两块之间也能命中"""
+        matcher = StreamMatcher(["SUCCEEDED"])
+        assert matcher.search([b"state: SUCC", b"EEDED\n"]) == "SUCCEEDED"
+        assert matcher.search([b"S", b"U", b"C", b"CEEDE", b"D"]) == "SUCCEEDED"
+        assert matcher.search([b"state: SUCC", b"ESS"]) is None
+
+    def test_multibyte_keyword_split_inside_character(self):
+        """按字节匹配，多字节字符被拆开时不受影响"""
+        data = "任务已完成".encode("utf-8")
+        matcher = StreamMatcher(["已完成"])
+        assert matcher.search([data[:7], data[7:]]) == "已完成"
+        assert matcher.search(["任务已完成".encode("gbk")], encoding="GBK") == "已完成"
+
+    def test_stops_consuming_after_match(self):
+        """命中后不再读取后续块"""
+        consumed = []
+
+        def chunks():
+            for chunk in [b"xx done", b"more", b"even more"]:
+                consumed.append(chunk)
+                yield chunk
+
+        assert StreamMatcher(["done", "more"]).search(chunks()) == "done"
+        assert consumed == [b"xx done"]
@@ -5,10 +5,17 @@ GPU 工具模块测试
 测试 GPU 信息获取功能。
 """
 
+import time
+import threading
+
 import pytest
 from unittest.mock import patch, MagicMock
 
 from core.utils import get_gpu_info, get_gpu_power_info
+from core.utils.gpu import (
+    GpuReading, GpuSampler, NvmlBackend, SmiStreamSampler,
+    get_gpu_sampler, get_nvml_backend, set_nvml_backend,
+)
 
 
 class TestGpuUtils:
@@ -81,3 +88,310 @@ class TestGpuUtils:
             # 应该返回空字典或 None
             assert power_info is not None
             assert len(power_info) == 0
+
+
+class FakeNvml:
+    """NVML 替身模块，在无显卡的机器上模拟 pynvml"""
+    
+    NVML_TEMPERATURE_GPU = 0
+    
+    class NVMLError(Exception):
+        pass
+    
+    def __init__(self, powers):
+        self.powers = powers  # 毫瓦
+        self.init_calls = 0
+        self.handle_calls = 0
+    
+    def nvmlInit(self):
+        self.init_calls += 1
+    
+    def nvmlShutdown(self):
+        pass
+    
+    def nvmlDeviceGetCount(self):
+        return len(self.powers)
+    
+    def nvmlDeviceGetHandleByIndex(self, index):
+        self.handle_calls += 1
+        return index
+    
+    def nvmlDeviceGetName(self, handle):
+        return b"NVIDIA A100"
+    
+    def nvmlDeviceGetPowerUsage(self, handle):
+        if self.powers[handle] is None:
+            raise self.NVMLError("not supported")
+        return self.powers[handle]
+    
+    def nvmlDeviceGetUtilizationRates(self, handle):
+        return MagicMock(gpu=90)
+    
+    def nvmlDeviceGetMemoryInfo(self, handle):
+        return MagicMock(used=2048 * 1024 * 1024, total=40960 * 1024 * 1024)
+    
+    def nvmlDeviceGetTemperature(self, handle, sensor):
+        return 55
+    
+    def nvmlDeviceGetComputeRunningProcesses(self, handle):
+        return [MagicMock(pid=4321, usedGpuMemory=512 * 1024 * 1024)] if handle == 0 else []
+    
+    def nvmlSystemGetProcessName(self, pid):
+        return b"/usr/bin/python3"
+
+
+class TestNvmlBackend:
+    """NVML 后端测试"""
+    
+    def test_nvml_used_without_spawning_nvidia_smi(self):
+        """NVML 可用时不调用 nvidia-smi，设备句柄只获取一次"""
+        fake = FakeNvml([150000, 30500])
+        set_nvml_backend(NvmlBackend(module=fake))
+        
+        with patch('subprocess.check_output') as mock_output:
+            assert get_gpu_power_info() == {0: 150.0, 1: 30.5}
+            assert get_gpu_power_info() == {0: 150.0, 1: 30.5}
+            info = get_gpu_info()
+            mock_output.assert_not_called()
+        
+        assert fake.init_calls == 1
+        assert fake.handle_calls == 2
+        assert "GPU 1 (NVIDIA A100)" in info
+        assert "150W" in info
+        assert "2048/40960MB" in info
+    
+    def test_unsupported_field_is_skipped(self):
+        """不支持功耗读取的 GPU 不出现在功耗结果中"""
+        set_nvml_backend(NvmlBackend(module=FakeNvml([None, 40000])))
+        assert get_gpu_power_info() == {1: 40.0}
+    
+    def test_fallback_to_nvidia_smi_when_init_fails(self):
+        """NVML 初始化失败时回退到 nvidia-smi"""
+        fake = FakeNvml([1000])
+        fake.nvmlInit = MagicMock(side_effect=RuntimeError("driver not loaded"))
+        set_nvml_backend(NvmlBackend(module=fake))
+        
+        with patch('subprocess.check_output', return_value="0, 45.00\n"):
+            assert get_gpu_power_info() == {0: 45.0}
+        assert get_nvml_backend().available is False
+    
+    def test_read_processes(self):
+        """通过 NVML 读取计算进程"""
+        from core.utils.gpu import GpuProcess
+        set_nvml_backend(NvmlBackend(module=FakeNvml([20000, 20000])))
+        assert get_nvml_backend().read_processes() == [
+            GpuProcess(pid=4321, gpu_index=0, name="/usr/bin/python3", used_memory_mb=512.0)]
+    
+    def test_gpu_monitor_uses_nvml(self):
+        """GPU 监控器优先使用 NVML 读数"""
+        from core.monitor import GpuMonitor
+        set_nvml_backend(NvmlBackend(module=FakeNvml([20000])))
+        monitor = GpuMonitor({
+            'check_gpu_power_enabled': True,
+            'check_gpu_power_threshold': 50.0,
+            'check_gpu_power_consecutive_checks': 1,
+        })
+        with patch('subprocess.check_output') as mock_output:
+            triggered, method, _ = monitor.check()
+            mock_output.assert_not_called()
+        assert triggered is True
+        assert method == "GPU功耗检测"
+
+
+class TestGpuSampler:
+    """共享 GPU 采样器测试"""
+    
+    def test_notification_reuses_trigger_reading(self):
+        """GPU 监控触发后，通知直接复用触发时的读数"""
+        from core.monitor import GpuMonitor
+        monitor = GpuMonitor({
+            'check_gpu_power_enabled': True,
+            'check_gpu_power_threshold': 50.0,
+            'check_gpu_power_consecutive_checks': 1,
+        })
+        output = "0, 30.00, NVIDIA A100, 1024, 40960, 55, 3\n"
+        with patch('subprocess.check_output', return_value=output) as mock_output:
+            triggered, _, _ = monitor.check()
+            info = get_gpu_info()
+        
+        assert triggered is True
+        assert mock_output.call_count == 1
+        assert "GPU 0 (NVIDIA A100)" in info
+        assert "30W" in info
+    
+    def test_expired_reading_is_requeried(self):
+        """缓存过期后重新查询"""
+        sampler = get_gpu_sampler()
+        sampler.publish([GpuReading(index=0, name="old", power_w=1.0)])
+        assert sampler.latest() is not None
+        assert sampler.latest(max_age=-1) is None
+    
+    def test_monitor_always_queries_fresh(self):
+        """监控器判断条件时不使用缓存"""
+        from core.monitor import GpuMonitor
+        monitor = GpuMonitor({'check_gpu_power_enabled': True, 'check_gpu_power_consecutive_checks': 5})
+        with patch('subprocess.check_output', return_value="0, 30.00\n") as mock_output:
+            monitor.check()
+            monitor.check()
+        assert mock_output.call_count == 2
+
+
+class FakeSmiProcess:
+    """nvidia-smi --loop-ms 子进程替身，按给定行输出后退出（或保持静默）"""
+    
+    def __init__(self, lines, hang=False):
+        self._lines = lines
+        self._hang = hang
+        self._exited = threading.Event()
+        self.killed = False
+        self.stdout = self._iter()
+    
+    def _iter(self):
+        for line in self._lines:
+            yield line
+        if self._hang:
+            # 模拟驱动卡死：进程仍在但不再输出
+            self._exited.wait(5)
+        self._exited.set()
+    
+    def poll(self):
+        return 0 if self._exited.is_set() and not self._hang else None
+    
+    def kill(self):
+        self.killed = True
+        self._exited.set()
+    
+    def wait(self, timeout=None):
+        return 0
+
+
+def _wait_for(predicate, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+class TestSmiStreamSampler:
+    """nvidia-smi 流式采样测试"""
+    
+    LINES = [
+        "0, 30.00, NVIDIA A100, 1024, 40960, 55, 3\n",
+        "1, 40.00, NVIDIA A100, 2048, 40960, 56, 5\n",
+        "0, 31.00, NVIDIA A100, 1024, 40960, 55, 3\n",
+        "1, 41.00, NVIDIA A100, 2048, 40960, 56, 5\n",
+    ]
+    
+    def test_stream_groups_rounds_into_samples(self):
+        """每轮所有 GPU 的读数组成一个采样，进程只启动一次"""
+        procs = []
+        
+        def popen(cmd, **kwargs):
+            assert '--loop-ms=500' in cmd
+            procs.append(FakeSmiProcess(self.LINES, hang=True))
+            return procs[-1]
+        
+        sampler = SmiStreamSampler(interval_ms=500, popen=popen)
+        sampler.ensure_running()
+        assert _wait_for(lambda: len(sampler.samples) == 2)
+        readings = sampler.latest()
+        assert [r.power_w for r in readings] == [31.0, 41.0]
+        assert len(procs) == 1
+        sampler.stop()
+        assert procs[0].killed
+    
+    def test_restart_after_child_dies(self):
+        """子进程退出后按退避重启"""
+        procs = []
+        
+        def popen(cmd, **kwargs):
+            procs.append(FakeSmiProcess(self.LINES[:2]))
+            return procs[-1]
+        
+        sampler = SmiStreamSampler(popen=popen)
+        sampler.ensure_running()
+        assert _wait_for(lambda: procs[0].poll() is not None)
+        sampler._next_start = 0
+        sampler.ensure_running()
+        assert sampler.restarts == 1
+        assert len(procs) == 2
+    
+    def test_watchdog_kills_silent_child(self):
+        """子进程长时间无输出时被看门狗终止并重启"""
+        procs = []
+        
+        def popen(cmd, **kwargs):
+            procs.append(FakeSmiProcess([], hang=True))
+            return procs[-1]
+        
+        sampler = SmiStreamSampler(watchdog_timeout=0.05, popen=popen)
+        sampler.ensure_running()
+        time.sleep(0.1)
+        sampler._next_start = 0
+        sampler.ensure_running()
+        assert procs[0].killed
+        assert len(procs) == 2
+        sampler.stop()
+    
+    def test_missing_nvidia_smi_falls_back_to_single_query(self):
+        """无法启动 nvidia-smi 时回退到单次查询（带超时）"""
+        sampler = GpuSampler()
+        sampler.stream = SmiStreamSampler(popen=MagicMock(side_effect=FileNotFoundError))
+        with patch('subprocess.check_output', return_value="0, 30.00\n") as mock_output:
+            readings = sampler.refresh()
+        assert readings[0].power_w == 30.0
+        assert sampler.stream.available is False
+        assert mock_output.call_args[1]['timeout'] > 0
+    
+    def test_reenabling_stream_registers_exit_hook_once(self):
+        """重复启用流式采样时退出钩子只注册一次"""
+        sampler = GpuSampler()
+        with patch('core.utils.gpu.atexit.register') as register:
+            sampler.enable_stream(500)
+            sampler.enable_stream(1000)
+            sampler.enable_stream(2000)
+        assert register.call_count == 1
+        sampler.stream.stop()
+
+
+class TestGpuUsageMeter:
+    """任务期间 GPU 用量统计测试"""
+    
+    def test_trapezoid_energy_and_time_weighted_util(self):
+        """能耗按梯形法积分，利用率按时间加权"""
+        from core.utils.gpu import GpuReading, GpuUsageMeter
+        meter = GpuUsageMeter()
+        meter.add([GpuReading(index=0, power_w=100, util_percent=0, memory_used_mb=1000)], ts=0)
+        meter.add([GpuReading(index=0, power_w=300, util_percent=100, memory_used_mb=4000)], ts=1800)
+        meter.add([GpuReading(index=0, power_w=300, util_percent=100, memory_used_mb=2000)], ts=3600)
+        usage = meter.snapshot()[0]
+        # 半小时 200W 平均 + 半小时 300W = 0.25 kWh
+        assert usage["energy_kwh"] == pytest.approx(0.25)
+        assert usage["avg_util_percent"] == pytest.approx(75.0)
+        assert usage["peak_memory_mb"] == 4000
+    
+    def test_published_readings_feed_usage_context(self):
+        """采样器发布的读数计入统计，并转换为模板变量"""
+        from core.utils.gpu import get_gpu_sampler, gpu_usage_context
+        from core.notifier.message_builder import MessageBuilder
+        sampler = get_gpu_sampler()
+        with patch('subprocess.check_output', return_value="0, 250.00, A100, 30000, 40960, 60, 90\n"):
+            sampler.refresh()
+        readings = sampler.latest()
+        sampler.publish(readings)  # 同一轮读数不重复计入
+        builder = MessageBuilder({})
+        # 只有一个采样时不输出能耗与均值
+        context = builder.build_context({"gpu_usage": sampler.usage.snapshot()})
+        assert context["gpu_energy_kwh"] == ""
+        assert context["gpu_avg_util"] == ""
+        assert context["gpu_usage"] == ""
+        
+        sampler.usage.add(readings, ts=time.monotonic() + 3600)
+        context = builder.build_context({"gpu_usage": sampler.usage.snapshot()})
+        assert context["gpu_avg_util"] == "90.0"
+        assert context["gpu_peak_memory"] == "30000"
+        assert context["gpu_energy_kwh"] == "0.250"
+        assert context["gpu_usage"].startswith("GPU 0: 能耗 0.250 kWh, 平均利用率 90.0%")
+        assert gpu_usage_context(None)["gpu_energy_kwh"] == ""
@@ -100,3 +100,57 @@ class TestGenericWebhookNotifier:
             assert "new_file.txt" in body['added']
             assert "备份" not in body['added']  # 确认已从中移除
             assert body['actions'] == "备份"  # 确认在聚合变量中
+
+    def test_directory_report_moved_variables(self, config):
+        """测试移动条目的报告变量"""
+        config["body"] = '{"moved": "${report_moved_list}", "count": "${report_moved_count}", "changes": "${report_change_list}"}'
+        notifier = GenericWebhookNotifier(config)
+
+        info = {
+            "project_name": "Test",
+            "report": {
+                "summary": "新增 0, 删除 0, 修改 0, 移动 1",
+                "moved_count": 1,
+                "added_files": [],
+                "removed_files": [],
+                "modified_files": [],
+                "moved_files": [
+                    {"path": "ckpt_final", "old_path": "ckpt_tmp", "size_str": "1 KB", "action": "", "is_dir": False}
+                ],
+                "actions": []
+            }
+        }
+
+        with patch('requests.request') as mock_request:
+            mock_request.return_value.status_code = 200
+            notifier.send(info)
+
+            body = json.loads(mock_request.call_args[1]['data'])
+            assert "ckpt_tmp -> ckpt_final" in body['moved']
+            assert body['count'] == "1"
+            assert "[移动]" in body['changes']
+
+    def test_directory_report_rollup_variable(self, config):
+        """测试目录汇总变量"""
+        config["body"] = '{"rollup": "${report_rollup}"}'
+        notifier = GenericWebhookNotifier(config)
+
+        info = {
+            "project_name": "Test",
+            "report": {
+                "summary": "新增 12, 删除 0, 修改 0",
+                "added_count": 12,
+                "added_files": [],
+                "removed_files": [],
+                "modified_files": [],
+                "rollup_text": "runs/exp42: +12 文件, +38.4 GB",
+                "actions": []
+            }
+        }
+
+        with patch('requests.request') as mock_request:
+            mock_request.return_value.status_code = 200
+            notifier.send(info)
+
+            body = json.loads(mock_request.call_args[1]['data'])
+            assert body['rollup'] == "runs/exp42: +12 文件, +38.4 GB"